@@ -0,0 +1,59 @@
+"""
+Проект: Lkeep
+Автор: Иван Ашихмин
+Год: 2025
+Специально для проекта "Код на салфетке"
+https://pressanybutton.ru/category/servis-na-fastapi/
+"""
+
+import asyncio
+import statistics
+import sys
+
+from httpx import ASGITransport, AsyncClient
+
+from benchmarks.redirect_benchmark import drop_user, measure, seed_link
+from lkeep.apps.stats.click_counter import click_counter
+from lkeep.core.settings import settings
+from lkeep.main import app
+
+
+async def main(requests: int) -> None:
+    """
+    Сравнивает время перенаправления с учётом переходов и без него.
+
+    :param requests: Количество запросов в каждом режиме.
+    :type requests: int
+    :returns: None
+    """
+    async with app.router.lifespan_context(app):
+        user_id, short_link = await seed_link()
+        enabled = click_counter.enabled
+        redirect_status = settings.links_settings.link_redirect_status_code
+
+        try:
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://benchmark") as client:
+                await measure(
+                    client=client,
+                    url=f"/{short_link}",
+                    requests=max(requests // 10, 1),
+                    expected_status=redirect_status,
+                )
+                for counting in (False, True):
+                    click_counter.enabled = counting
+                    timings = await measure(
+                        client=client, url=f"/{short_link}", requests=requests, expected_status=redirect_status
+                    )
+                    percentiles = statistics.quantiles(timings, n=100)
+                    print(
+                        f"{'clicks counted' if counting else 'clicks ignored':<30} "
+                        f"mean={statistics.fmean(timings):8.1f}us "
+                        f"p50={percentiles[49]:8.1f}us p99={percentiles[98]:8.1f}us"
+                    )
+        finally:
+            click_counter.enabled = enabled
+            await drop_user(user_id=user_id)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(requests=int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
@@ -0,0 +1,129 @@
+"""
+Проект: Lkeep
+Автор: Иван Ашихмин
+Год: 2025
+Специально для проекта "Код на салфетке"
+https://pressanybutton.ru/category/servis-na-fastapi/
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+
+from sqlalchemy import insert, select
+
+from benchmarks.redirect_benchmark import drop_user, seed_link
+from lkeep.apps.links.managers import LinksManager
+from lkeep.apps.links.schemas import LinkSchema
+from lkeep.core.core_dependency.db_dependency import db_dependency
+from lkeep.core.core_dependency.redis_dependency import redis_dependency
+from lkeep.database.models import Link
+
+
+async def seed_links(user_id: uuid.UUID, count: int) -> None:
+    """
+    Создаёт ссылки временного пользователя одной командой.
+
+    :param user_id: Идентификатор временного пользователя.
+    :type user_id: uuid.UUID
+    :param count: Количество ссылок.
+    :type count: int
+    :returns: None
+    """
+    async with db_dependency.db_session() as session:
+        await session.execute(
+            insert(Link).values(
+                [
+                    {
+                        "full_link": f"https://example.com/benchmark/{index}",
+                        "short_link": uuid.uuid4().hex[:12],
+                        "owner_id": user_id,
+                    }
+                    for index in range(count)
+                ]
+            )
+        )
+        await session.commit()
+
+
+async def get_links_orm(user_id: uuid.UUID, limit: int) -> list[LinkSchema]:
+    """
+    Выбирает страницу ссылок ORM-объектами и проверяет каждую ссылку отдельно, как до перехода на выборку столбцов.
+
+    :param user_id: Идентификатор владельца ссылок.
+    :type user_id: uuid.UUID
+    :param limit: Количество ссылок на странице.
+    :type limit: int
+    :returns: Ссылки страницы.
+    :rtype: list[LinkSchema]
+    """
+    async with db_dependency.db_read_session() as session:
+        query = (
+            select(Link).where(Link.owner_id == user_id).order_by(Link.created_at.desc(), Link.id.desc()).limit(limit)
+        )
+        result = await session.execute(query)
+
+        return [LinkSchema.model_validate(link, from_attributes=True) for link in result.scalars().all()]
+
+
+async def measure(get_links: Callable[[], Awaitable[list[LinkSchema]]], requests: int) -> list[float]:
+    """
+    Выбирает страницу последовательно и замеряет время каждой выборки.
+
+    :param get_links: Функция выборки страницы.
+    :type get_links: Callable[[], Awaitable[list[LinkSchema]]]
+    :param requests: Количество выборок.
+    :type requests: int
+    :returns: Время выполнения каждой выборки в микросекундах.
+    :rtype: list[float]
+    """
+    timings = []
+    for _ in range(requests):
+        started_at = time.perf_counter()
+        await get_links()
+        timings.append((time.perf_counter() - started_at) * 1_000_000)
+
+    return timings
+
+
+async def main(requests: int, page_size: int = 500) -> None:
+    """
+    Сравнивает выборку страницы ссылок ORM-объектами с выборкой столбцов и пакетной проверкой схем.
+
+    Кроме общего времени выводится время в пересчёте на одну ссылку страницы.
+
+    :param requests: Количество выборок каждым способом.
+    :type requests: int
+    :param page_size: Количество ссылок на странице.
+    :type page_size: int
+    :returns: None
+    """
+    manager = LinksManager(db=db_dependency, redis=redis_dependency)
+    user_id, _ = await seed_link()
+    await seed_links(user_id=user_id, count=page_size - 1)
+    modes = {
+        "orm entities": lambda: get_links_orm(user_id=user_id, limit=page_size),
+        "columns + TypeAdapter": lambda: manager.get_links(user_id=user_id, limit=page_size),
+    }
+
+    try:
+        for name, get_links in modes.items():
+            await measure(get_links=get_links, requests=max(requests // 10, 1))
+            timings = await measure(get_links=get_links, requests=requests)
+            percentiles = statistics.quantiles(timings, n=100)
+            mean = statistics.fmean(timings)
+            print(
+                f"{name:<30} mean={mean:8.1f}us p50={percentiles[49]:8.1f}us p99={percentiles[98]:8.1f}us "
+                f"per_row={mean / page_size:6.2f}us"
+            )
+    finally:
+        await drop_user(user_id=user_id)
+        await redis_dependency.close_pool()
+        await db_dependency.dispose_engine()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(requests=int(sys.argv[1]) if len(sys.argv) > 1 else 1000))
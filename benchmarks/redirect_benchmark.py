@@ -0,0 +1,135 @@
+"""
+Проект: Lkeep
+Автор: Иван Ашихмин
+Год: 2025
+Специально для проекта "Код на салфетке"
+https://pressanybutton.ru/category/servis-na-fastapi/
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import delete, insert
+
+from lkeep.apps.links.bloom_filter import links_bloom_filter
+from lkeep.apps.links.managers import LinksManager
+from lkeep.core.core_dependency.db_dependency import db_dependency
+from lkeep.core.core_dependency.redis_dependency import redis_dependency
+from lkeep.core.settings import settings
+from lkeep.database.models import Link, User
+from lkeep.main import app
+
+
+async def seed_link() -> tuple[uuid.UUID, str]:
+    """
+    Создаёт временного пользователя и ссылку для замеров.
+
+    Ссылка создаётся после завершения перестройки фильтра Блума, запущенной при старте приложения, и сразу
+    добавляется в фильтр: ссылка, созданная во время перестройки, какое-то время считалась бы отсутствующей.
+
+    :returns: Идентификатор пользователя и короткий идентификатор ссылки.
+    :rtype: tuple[uuid.UUID, str]
+    """
+    user_id = uuid.uuid4()
+    short_link = uuid.uuid4().hex[:12]
+
+    async with redis_dependency.get_client() as client:
+        while await client.exists(links_bloom_filter.lock_key):
+            await asyncio.sleep(0.1)
+
+    async with db_dependency.db_session() as session:
+        await session.execute(
+            insert(User).values(id=user_id, email=f"bench-{user_id.hex}@example.com", hashed_password="-")
+        )
+        await session.execute(
+            insert(Link).values(full_link="https://example.com/benchmark", short_link=short_link, owner_id=user_id)
+        )
+        await session.commit()
+
+    await LinksManager(db=db_dependency, redis=redis_dependency).register_short_links(short_link)
+
+    return user_id, short_link
+
+
+async def drop_user(user_id: uuid.UUID) -> None:
+    """
+    Удаляет временного пользователя вместе с его ссылками.
+
+    :param user_id: Идентификатор временного пользователя.
+    :type user_id: uuid.UUID
+    :returns: None
+    """
+    async with db_dependency.db_session() as session:
+        await session.execute(delete(User).where(User.id == user_id))
+        await session.commit()
+
+
+async def measure(client: AsyncClient, url: str, requests: int, expected_status: int) -> list[float]:
+    """
+    Выполняет запросы последовательно и замеряет время каждого.
+
+    Код каждого ответа сверяется с ожидаемым, чтобы не замерять, например, закэшированные ответы 404.
+
+    :param client: HTTP-клиент, подключённый к приложению.
+    :type client: AsyncClient
+    :param url: Адрес запроса.
+    :type url: str
+    :param requests: Количество запросов.
+    :type requests: int
+    :param expected_status: Ожидаемый код ответа.
+    :type expected_status: int
+    :raises RuntimeError: Если код ответа отличается от ожидаемого.
+    :returns: Время выполнения каждого запроса в микросекундах.
+    :rtype: list[float]
+    """
+    timings = []
+    for _ in range(requests):
+        started_at = time.perf_counter()
+        response = await client.get(url)
+        timings.append((time.perf_counter() - started_at) * 1_000_000)
+        if response.status_code != expected_status:
+            raise RuntimeError(f"GET {url} returned {response.status_code}, expected {expected_status}")
+
+    return timings
+
+
+async def main(requests: int) -> None:
+    """
+    Сравнивает JSON-эндпоинт получения ссылки с эндпоинтом перенаправления.
+
+    Обе ссылки прогреваются, поэтому разница показывает накладные расходы самого обработчика,
+    а не обращения к Redis или базе данных.
+
+    :param requests: Количество запросов к каждому эндпоинту.
+    :type requests: int
+    :returns: None
+    """
+    async with app.router.lifespan_context(app):
+        user_id, short_link = await seed_link()
+        endpoints = {
+            "GET /api/v1/links/get_link": (f"/api/v1/links/get_link?short_link={short_link}", 200),
+            "GET /{short_link}": (f"/{short_link}", settings.links_settings.link_redirect_status_code),
+        }
+
+        try:
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://benchmark") as client:
+                for name, (url, expected_status) in endpoints.items():
+                    await measure(
+                        client=client, url=url, requests=max(requests // 10, 1), expected_status=expected_status
+                    )
+                    timings = await measure(client=client, url=url, requests=requests, expected_status=expected_status)
+                    percentiles = statistics.quantiles(timings, n=100)
+                    print(
+                        f"{name:<30} mean={statistics.fmean(timings):8.1f}us "
+                        f"p50={percentiles[49]:8.1f}us p99={percentiles[98]:8.1f}us"
+                    )
+        finally:
+            await drop_user(user_id=user_id)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(requests=int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
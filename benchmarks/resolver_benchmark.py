@@ -0,0 +1,75 @@
+"""
+Проект: Lkeep
+Автор: Иван Ашихмин
+Год: 2025
+Специально для проекта "Код на салфетке"
+https://pressanybutton.ru/category/servis-na-fastapi/
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+
+from benchmarks.redirect_benchmark import drop_user, seed_link
+from lkeep.apps.links.managers import LinksManager
+from lkeep.core.core_dependency.db_dependency import db_dependency
+from lkeep.core.core_dependency.redis_dependency import redis_dependency
+from lkeep.core.settings import settings
+
+
+async def measure(manager: LinksManager, short_link: str, requests: int) -> list[float]:
+    """
+    Читает ссылку из базы данных последовательно и замеряет время каждого чтения.
+
+    :param manager: Менеджер ссылок.
+    :type manager: LinksManager
+    :param short_link: Сокращенный идентификатор ссылки.
+    :type short_link: str
+    :param requests: Количество чтений.
+    :type requests: int
+    :returns: Время выполнения каждого чтения в микросекундах.
+    :rtype: list[float]
+    """
+    timings = []
+    for _ in range(requests):
+        started_at = time.perf_counter()
+        await manager.fetch_link(short_link=short_link)
+        timings.append((time.perf_counter() - started_at) * 1_000_000)
+
+    return timings
+
+
+async def main(requests: int) -> None:
+    """
+    Сравнивает чтение полной ссылки из базы данных через SQLAlchemy и через подготовленное выражение asyncpg.
+
+    Кэши не используются, поэтому замер показывает стоимость одного обращения к базе данных при промахе.
+
+    :param requests: Количество чтений каждым способом.
+    :type requests: int
+    :returns: None
+    """
+    manager = LinksManager(db=db_dependency, redis=redis_dependency)
+    user_id, short_link = await seed_link()
+    resolver = settings.links_settings.link_resolver
+
+    try:
+        for mode in ("orm", "asyncpg"):
+            settings.links_settings.link_resolver = mode
+            await measure(manager=manager, short_link=short_link, requests=max(requests // 10, 1))
+            timings = await measure(manager=manager, short_link=short_link, requests=requests)
+            percentiles = statistics.quantiles(timings, n=100)
+            print(
+                f"{mode:<30} mean={statistics.fmean(timings):8.1f}us "
+                f"p50={percentiles[49]:8.1f}us p99={percentiles[98]:8.1f}us"
+            )
+    finally:
+        settings.links_settings.link_resolver = resolver
+        await drop_user(user_id=user_id)
+        await redis_dependency.close_pool()
+        await db_dependency.dispose_engine()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(requests=int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
@@ -0,0 +1,94 @@
+"""
+Проект: Lkeep
+Автор: Иван Ашихмин
+Год: 2025
+Специально для проекта "Код на салфетке"
+https://pressanybutton.ru/category/servis-na-fastapi/
+"""
+
+import asyncio
+import datetime
+import statistics
+import sys
+import uuid
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from starlette.responses import JSONResponse
+
+from benchmarks.redirect_benchmark import measure
+from lkeep.apps.links.schemas import LinkSchema, LinksPageSchema
+from lkeep.core.responses import PydanticJSONResponse
+
+
+def build_page(size: int) -> LinksPageSchema:
+    """
+    Создаёт страницу из заданного количества ссылок.
+
+    :param size: Количество ссылок на странице.
+    :type size: int
+    :returns: Страница ссылок.
+    :rtype: LinksPageSchema
+    """
+    created_at = datetime.datetime.now(datetime.UTC)
+    items = [
+        LinkSchema(
+            id=uuid.uuid4(),
+            full_link=f"https://example.com/benchmark/{index}",
+            short_link=uuid.uuid4().hex[:12],
+            created_at=created_at,
+        )
+        for index in range(size)
+    ]
+
+    return LinksPageSchema(items=items, next_cursor=None)
+
+
+def build_app(page: LinksPageSchema) -> FastAPI:
+    """
+    Создаёт приложение с двумя эндпоинтами, возвращающими одну и ту же страницу ссылок.
+
+    :param page: Страница ссылок.
+    :type page: LinksPageSchema
+    :returns: Приложение FastAPI.
+    :rtype: FastAPI
+    """
+    app = FastAPI()
+
+    @app.get("/json", response_model=LinksPageSchema, response_class=JSONResponse)
+    async def get_json() -> LinksPageSchema:
+        return page
+
+    @app.get("/pydantic", response_model=LinksPageSchema)
+    async def get_pydantic() -> PydanticJSONResponse:
+        return PydanticJSONResponse(content=page)
+
+    return app
+
+
+async def main(requests: int) -> None:
+    """
+    Сравнивает ответ со страницей ссылок через ``response_model`` и стандартный JSONResponse с ответом
+    PydanticJSONResponse, возвращаемым напрямую.
+
+    :param requests: Количество запросов к каждому эндпоинту для каждого размера страницы.
+    :type requests: int
+    :returns: None
+    """
+    for size in (50, 500):
+        app = build_app(page=build_page(size=size))
+
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://benchmark") as client:
+            for name in ("json", "pydantic"):
+                await measure(client=client, url=f"/{name}", requests=max(requests // 10, 1))
+                timings = await measure(client=client, url=f"/{name}", requests=requests)
+                percentiles = statistics.quantiles(timings, n=100)
+                mean = statistics.fmean(timings)
+                print(
+                    f"{f'{size} links, {name}':<30} mean={mean:8.1f}us "
+                    f"p50={percentiles[49]:8.1f}us p99={percentiles[98]:8.1f}us rps={1_000_000 / mean:8.1f}"
+                )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(requests=int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
@@ -11,9 +11,11 @@ from fastapi import APIRouter
 from lkeep.apps.auth.routes import auth_router
 from lkeep.apps.links.routes import links_router
 from lkeep.apps.profile.routes import profile_router
+from lkeep.apps.stats.routes import stats_router
 
 apps_router = APIRouter(prefix="/api/v1")
 
 apps_router.include_router(router=auth_router)
 apps_router.include_router(router=profile_router)
 apps_router.include_router(router=links_router)
+apps_router.include_router(router=stats_router)
@@ -9,8 +9,8 @@ from lkeep.apps.auth.handlers import AuthHandler
 from lkeep.apps.auth.managers import UserManager
 from lkeep.apps.auth.schemas import AuthUser, GetUserByID
 from lkeep.apps.auth.utils import get_token_from_cookies
-from lkeep.core.core_dependency.db_dependency import DBDependency
-from lkeep.core.core_dependency.redis_dependency import RedisDependency
+from lkeep.core.core_dependency.db_dependency import get_db_dependency
+from lkeep.core.core_dependency.redis_dependency import get_redis_dependency
 from lkeep.core.settings import settings
 
 
@@ -76,5 +76,5 @@ class AdminAuthProvider(AuthProvider):
 
 
 def get_admin_auth_provider() -> AdminAuthProvider:
-    manager = UserManager(db=DBDependency(), redis=RedisDependency())
+    manager = UserManager(db=get_db_dependency(), redis=get_redis_dependency())
     return AdminAuthProvider(handler=AuthHandler(), manager=manager)
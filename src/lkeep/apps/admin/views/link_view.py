@@ -1,9 +1,14 @@
 from typing import Any
 
+from sqlalchemy import Select, inspect
+from sqlalchemy.orm import load_only
 from starlette.requests import Request
 from starlette_admin import StringField
 from starlette_admin.contrib.sqla import ModelView
 
+from lkeep.apps.links.managers import LinksManager
+from lkeep.core.core_dependency.db_dependency import get_db_dependency
+from lkeep.core.core_dependency.redis_dependency import get_redis_dependency
 from lkeep.database.models import Link
 
 
@@ -15,6 +20,39 @@ class LinkViewView(ModelView):
         StringField("owner_id", label="owner_id", read_only=True),
     ]
 
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.manager = LinksManager(db=get_db_dependency(), redis=get_redis_dependency())
+
+    def get_list_query(self, request: Request) -> Select:
+        return (
+            super().get_list_query(request).options(load_only(Link.id, Link.full_link, Link.short_link, Link.owner_id))
+        )
+
     async def before_create(self, request: Request, data: dict[str, Any], link: Link):
         admin_user = request.state.user
         link.owner_id = admin_user["id"]
+        link.full_link_hash = None
+
+    async def after_create(self, request: Request, link: Link) -> None:
+        await self.manager.register_short_links(link.short_link)
+        await self.manager.bump_links_version(link.owner_id)
+
+    async def before_edit(self, request: Request, data: dict[str, Any], link: Link) -> None:
+        state = inspect(link)
+        request.state.old_short_links = state.attrs.short_link.history.deleted
+        if state.attrs.full_link.history.deleted:
+            link.full_link_hash = None
+
+    async def after_edit(self, request: Request, link: Link) -> None:
+        old_short_links = request.state.old_short_links
+        if old_short_links:
+            await self.manager.unregister_short_links(*old_short_links)
+            await self.manager.register_short_links(link.short_link)
+        else:
+            await self.manager.invalidate_links_cache(link.short_link)
+        await self.manager.bump_links_version(link.owner_id)
+
+    async def after_delete(self, request: Request, link: Link) -> None:
+        await self.manager.unregister_short_links(link.short_link)
+        await self.manager.bump_links_version(link.owner_id)
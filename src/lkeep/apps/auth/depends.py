@@ -50,3 +50,24 @@ async def get_current_user(
     user.session_id = session_id
 
     return user
+
+
+async def get_current_superuser(
+    user: Annotated[UserVerifySchema, Depends(get_current_user)],
+    manager: UserManager = Depends(UserManager),
+) -> UserVerifySchema:
+    """
+    Получает текущего пользователя и проверяет, что он обладает правами суперпользователя.
+
+    :param user: Текущий авторизованный пользователь.
+    :type user: UserVerifySchema
+    :param manager: Менеджер пользователей, используется для проверки прав пользователя.
+    :type manager: UserManager
+    :returns: Схема с информацией о текущем пользователе.
+    :rtype: UserVerifySchema
+    :raises HTTPException: Если пользователь не является суперпользователем.
+    """
+    if not await manager.is_superuser(user_id=user.id):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+
+    return user
@@ -19,8 +19,11 @@ from lkeep.apps.auth.schemas import (
     UserReturnData,
     UserVerifySchema,
 )
-from lkeep.core.core_dependency.db_dependency import DBDependency
-from lkeep.core.core_dependency.redis_dependency import RedisDependency
+from lkeep.core.core_dependency.db_dependency import DBDependency, get_db_dependency
+from lkeep.core.core_dependency.redis_dependency import (
+    RedisDependency,
+    get_redis_dependency,
+)
 from lkeep.database.models import User
 
 
@@ -30,14 +33,16 @@ class UserManager:
     """
 
     def __init__(
-        self, db: DBDependency = Depends(DBDependency), redis: RedisDependency = Depends(RedisDependency)
+        self,
+        db: DBDependency = Depends(get_db_dependency),
+        redis: RedisDependency = Depends(get_redis_dependency),
     ) -> None:
         """
         Инициализирует экземпляр класса.
 
-        :param db: Зависимость для базы данных. По умолчанию используется Depends(DBDependency).
+        :param db: Зависимость для базы данных. По умолчанию используется общий для процесса экземпляр.
         :type db: DBDependency
-        :param redis: Зависимость для Redis. По умолчанию используется Depends(RedisDependency).
+        :param redis: Зависимость для Redis. По умолчанию используется общий для процесса экземпляр.
         :type redis: RedisDependency
         """
         self.db = db
@@ -123,7 +128,7 @@ class UserManager:
         :returns: Схема данных пользователя, если пользователь найден; None, если пользователь не найден.
         :rtype: UserVerifySchema | None
         """
-        async with self.db.db_session() as session:
+        async with self.db.db_read_session() as session:
             query = select(self.model.id, self.model.email).where(self.model.id == user_id)
 
             result = await session.execute(query)
@@ -134,6 +139,20 @@ class UserManager:
 
             return None
 
+    async def is_superuser(self, user_id: uuid.UUID | str) -> bool:
+        """
+        Проверяет, является ли пользователь суперпользователем.
+
+        :param user_id: Идентификатор пользователя.
+        :type user_id: uuid.UUID | str
+        :returns: True, если пользователь существует и обладает правами суперпользователя.
+        :rtype: bool
+        """
+        async with self.db.db_read_session() as session:
+            query = select(self.model.is_superuser).where(self.model.id == user_id)
+
+            return bool(await session.scalar(query))
+
     async def store_access_token(self, token: str, user_id: uuid.UUID | str, session_id: str) -> None:
         """
         Сохраняет токен доступа в хранилище (Redis).
@@ -0,0 +1,316 @@
+"""
+Проект: Lkeep
+Автор: Иван Ашихмин
+Год: 2025
+Специально для проекта "Код на салфетке"
+https://pressanybutton.ru/category/servis-na-fastapi/
+"""
+
+import datetime
+import hashlib
+import math
+
+from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+from sqlalchemy import select
+
+from lkeep.apps.links.schemas import BloomFilterStatsSchema
+from lkeep.core.core_dependency.db_dependency import DBDependency
+from lkeep.core.core_dependency.redis_dependency import RedisDependency
+from lkeep.core.settings import settings
+from lkeep.database.models import Link
+
+
+class LinksBloomFilter:
+    """
+    Считающий фильтр Блума существующих коротких ссылок, хранящийся в Redis.
+
+    Каждая позиция фильтра - 4-битный счётчик, доступный через команду BITFIELD, поэтому ссылки можно не только
+    добавлять, но и удалять. Фильтр общий для всех процессов приложения. Пока фильтр не построен, любая ссылка
+    считается возможно существующей.
+
+    :ivar key_prefix: Префикс ключей фильтра в Redis.
+    :type key_prefix: str
+    :ivar counter_type: Тип счётчика в терминах команды BITFIELD.
+    :type counter_type: str
+    :ivar counter_max: Максимальное значение счётчика.
+    :type counter_max: int
+    :ivar links_per_command: Количество ссылок, счётчики которых изменяются одним вызовом скрипта.
+    :type links_per_command: int
+    :ivar change_script: Lua-скрипт, изменяющий счётчики одной командой BITFIELD и количество ссылок в фильтре.
+        Позиции передаются одной строкой, поэтому клиенту не нужно кодировать по четыре аргумента на каждый
+        счётчик. Если фильтра нет, скрипт ничего не делает: иначе BITFIELD создал бы почти пустой фильтр,
+        и все существующие ссылки стали бы считаться отсутствующими до его перестроения.
+    :type change_script: str
+    """
+
+    key_prefix = "link:bloom"
+    counter_type = "u4"
+    counter_max = 15
+    links_per_command = 100
+    change_script = """
+        if redis.call("EXISTS", KEYS[1]) == 0 then
+            return 0
+        end
+        local arguments = {"OVERFLOW", "SAT"}
+        for position in string.gmatch(ARGV[3], "%d+") do
+            table.insert(arguments, "INCRBY")
+            table.insert(arguments, ARGV[1])
+            table.insert(arguments, "#" .. position)
+            table.insert(arguments, ARGV[2])
+        end
+        redis.call("BITFIELD", KEYS[1], unpack(arguments))
+        redis.call("INCRBY", KEYS[2], ARGV[2] * ARGV[4])
+        return 1
+    """
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        """
+        Вычисляет размер фильтра и количество хеш-функций под заданную ёмкость и долю ложных срабатываний.
+
+        :param capacity: Ожидаемое количество коротких ссылок.
+        :type capacity: int
+        :param error_rate: Допустимая доля ложноположительных ответов при заполнении до ёмкости.
+        :type error_rate: float
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.key = f"{self.key_prefix}:{self.size}:{self.hash_count}"
+        self.count_key = f"{self.key}:count"
+        self.lock_key = f"{self.key}:lock"
+
+    def _get_positions(self, short_link: str) -> list[int]:
+        """
+        Вычисляет позиции счётчиков для короткой ссылки методом двойного хеширования.
+
+        :param short_link: Сокращенный идентификатор ссылки.
+        :type short_link: str
+        :returns: Номера счётчиков фильтра.
+        :rtype: list[int]
+        """
+        digest = hashlib.blake2b(short_link.encode(), digest_size=16).digest()
+        first_hash = int.from_bytes(digest[:8], "big")
+        second_hash = int.from_bytes(digest[8:], "big") | 1
+
+        return [(first_hash + i * second_hash) % self.size for i in range(self.hash_count)]
+
+    def queue_contains(self, pipe: Pipeline, short_link: str) -> None:
+        """
+        Добавляет в конвейер команды проверки короткой ссылки.
+
+        Результат двух добавленных команд разбирается методом :meth:`parse_contains`.
+
+        :param pipe: Конвейер Redis.
+        :type pipe: Pipeline
+        :param short_link: Сокращенный идентификатор ссылки.
+        :type short_link: str
+        :returns: None
+        """
+        pipe.exists(self.key)
+        arguments = []
+        for position in self._get_positions(short_link=short_link):
+            arguments.extend(("GET", self.counter_type, f"#{position}"))
+        pipe.execute_command("BITFIELD", self.key, *arguments)
+
+    @staticmethod
+    def parse_contains(exists: int, counters: list[int]) -> bool:
+        """
+        Разбирает ответ на команды, добавленные методом :meth:`queue_contains`.
+
+        :param exists: Результат команды EXISTS для ключа фильтра.
+        :type exists: int
+        :param counters: Значения счётчиков фильтра.
+        :type counters: list[int]
+        :returns: False, если ссылки точно нет, иначе True.
+        :rtype: bool
+        """
+        return not exists or all(counters)
+
+    async def contains(self, redis: RedisDependency, short_link: str) -> bool:
+        """
+        Проверяет, может ли короткая ссылка существовать.
+
+        :param redis: Зависимость Redis.
+        :type redis: RedisDependency
+        :param short_link: Сокращенный идентификатор ссылки.
+        :type short_link: str
+        :returns: False, если ссылки точно нет, иначе True.
+        :rtype: bool
+        """
+        async with redis.get_client() as client, client.pipeline(transaction=False) as pipe:
+            self.queue_contains(pipe=pipe, short_link=short_link)
+            exists, counters = await pipe.execute()
+
+        return self.parse_contains(exists=exists, counters=counters)
+
+    async def _change(self, client: Redis, short_links: tuple[str, ...], increment: int) -> None:
+        """
+        Изменяет счётчики коротких ссылок с насыщением на границах диапазона.
+
+        Пока фильтр не построен, изменения пропускаются, и он продолжает пропускать все ссылки.
+
+        :param client: Клиент Redis.
+        :type client: Redis
+        :param short_links: Сокращенные идентификаторы ссылок.
+        :type short_links: tuple[str, ...]
+        :param increment: Величина изменения: 1 при добавлении, -1 при удалении.
+        :type increment: int
+        :returns: None
+        """
+        if not short_links:
+            return
+
+        change_counters = client.register_script(self.change_script)
+
+        async with client.pipeline(transaction=False) as pipe:
+            for offset in range(0, len(short_links), self.links_per_command):
+                chunk = short_links[offset : offset + self.links_per_command]
+                positions = []
+                for short_link in chunk:
+                    positions.extend(self._get_positions(short_link=short_link))
+                await change_counters(
+                    keys=[self.key, self.count_key],
+                    args=[self.counter_type, increment, " ".join(map(str, positions)), len(chunk)],
+                    client=pipe,
+                )
+            await pipe.execute()
+
+    async def add(self, redis: RedisDependency, *short_links: str) -> None:
+        """
+        Добавляет короткие ссылки в фильтр.
+
+        :param redis: Зависимость Redis.
+        :type redis: RedisDependency
+        :param short_links: Сокращенные идентификаторы созданных ссылок.
+        :type short_links: str
+        :returns: None
+        """
+        async with redis.get_client() as client:
+            await self._change(client=client, short_links=short_links, increment=1)
+
+    async def remove(self, redis: RedisDependency, *short_links: str) -> None:
+        """
+        Удаляет короткие ссылки из фильтра.
+
+        :param redis: Зависимость Redis.
+        :type redis: RedisDependency
+        :param short_links: Сокращенные идентификаторы удалённых ссылок.
+        :type short_links: str
+        :returns: None
+        """
+        async with redis.get_client() as client:
+            await self._change(client=client, short_links=short_links, increment=-1)
+
+    async def rebuild(self, db: DBDependency, redis: RedisDependency, batch_size: int = 10000) -> bool:
+        """
+        Строит фильтр заново по всем коротким ссылкам из базы данных.
+
+        Счётчики собираются в памяти процесса и записываются в Redis одной командой, после чего атомарно
+        подменяют текущий фильтр. Ссылки, созданные во время построения и не попавшие в выборку, добавляются
+        после подмены. Одновременно фильтр строит только один процесс.
+
+        :param db: Зависимость базы данных.
+        :type db: DBDependency
+        :param redis: Зависимость Redis.
+        :type redis: RedisDependency
+        :param batch_size: Количество строк, получаемых из базы данных за одну выборку.
+        :type batch_size: int
+        :returns: True, если фильтр был построен, False, если его уже строит другой процесс.
+        :rtype: bool
+        """
+        async with redis.get_client() as client:
+            if not await client.set(self.lock_key, 1, nx=True, ex=600):
+                return False
+
+            try:
+                started_at = datetime.datetime.now(datetime.UTC) - datetime.timedelta(seconds=5)
+                counters = bytearray((self.size + 1) // 2)
+                recent_links = set()
+                items = 0
+
+                async with db.db_session() as session:
+                    query = select(Link.short_link, Link.created_at).execution_options(yield_per=batch_size)
+                    async for short_link, created_at in await session.stream(query):
+                        items += 1
+                        if created_at >= started_at:
+                            recent_links.add(short_link)
+                        for position in self._get_positions(short_link=short_link):
+                            self._increment_counter(counters=counters, position=position)
+
+                temporary_key = f"{self.key}:building"
+                async with client.pipeline(transaction=True) as pipe:
+                    pipe.set(temporary_key, bytes(counters))
+                    pipe.rename(temporary_key, self.key)
+                    pipe.set(self.count_key, items)
+                    await pipe.execute()
+
+                async with db.db_session() as session:
+                    query = select(Link.short_link).where(Link.created_at >= started_at)
+                    result = await session.scalars(query)
+                    missed_links = [short_link for short_link in result.all() if short_link not in recent_links]
+
+                for offset in range(0, len(missed_links), batch_size):
+                    await self._change(
+                        client=client, short_links=tuple(missed_links[offset : offset + batch_size]), increment=1
+                    )
+            finally:
+                await client.delete(self.lock_key)
+
+        return True
+
+    def _increment_counter(self, counters: bytearray, position: int) -> None:
+        """
+        Увеличивает 4-битный счётчик в локальном буфере с насыщением на максимальном значении.
+
+        Порядок полубайтов совпадает с порядком, который использует BITFIELD: чётные счётчики занимают старшие
+        4 бита байта, нечётные - младшие.
+
+        :param counters: Буфер счётчиков.
+        :type counters: bytearray
+        :param position: Номер счётчика.
+        :type position: int
+        :returns: None
+        """
+        index, is_low = divmod(position, 2)
+        value = counters[index]
+
+        if is_low:
+            if value & 0x0F < self.counter_max:
+                counters[index] = value + 1
+        elif value >> 4 < self.counter_max:
+            counters[index] = value + 0x10
+
+    async def get_stats(self, redis: RedisDependency) -> BloomFilterStatsSchema:
+        """
+        Возвращает параметры фильтра и оценку текущей доли ложных срабатываний.
+
+        :param redis: Зависимость Redis.
+        :type redis: RedisDependency
+        :returns: Статистика фильтра.
+        :rtype: BloomFilterStatsSchema
+        """
+        async with redis.get_client() as client, client.pipeline(transaction=False) as pipe:
+            pipe.exists(self.key)
+            pipe.get(self.count_key)
+            exists, items = await pipe.execute()
+
+        items = max(int(items or 0), 0)
+        false_positive_rate = (1 - math.exp(-self.hash_count * items / self.size)) ** self.hash_count
+
+        return BloomFilterStatsSchema(
+            is_built=bool(exists),
+            capacity=self.capacity,
+            size=self.size,
+            hash_count=self.hash_count,
+            items=items,
+            target_false_positive_rate=self.error_rate,
+            estimated_false_positive_rate=false_positive_rate,
+        )
+
+
+links_bloom_filter = LinksBloomFilter(
+    capacity=settings.links_settings.link_bloom_capacity,
+    error_rate=settings.links_settings.link_bloom_error_rate,
+)
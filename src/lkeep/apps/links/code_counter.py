@@ -0,0 +1,135 @@
+"""
+Проект: Lkeep
+Автор: Иван Ашихмин
+Год: 2025
+Специально для проекта "Код на салфетке"
+https://pressanybutton.ru/category/servis-na-fastapi/
+"""
+
+import asyncio
+import hashlib
+import math
+import string
+from collections import deque
+
+from sqlalchemy import func, select
+
+from lkeep.core.core_dependency.db_dependency import DBDependency
+from lkeep.core.settings import settings
+from lkeep.database.models import short_link_sequence
+
+
+class ShortCodeCounter:
+    """
+    Генератор коротких ссылок из значений последовательности базы данных.
+
+    Процесс резервирует у последовательности сразу блок значений и дальше выдаёт коды без обращений к базе данных.
+    Значение кодируется в base62 фиксированной длины, поэтому разные значения всегда дают разные коды.
+    При включённой перестановке значение предварительно проходит через обратимое аффинное отображение
+    ``x * multiplier + offset`` по модулю количества возможных кодов, чтобы соседние ссылки не шли подряд.
+
+    :ivar alphabet: Алфавит кодирования.
+    :type alphabet: str
+    """
+
+    alphabet = string.digits + string.ascii_letters
+
+    def __init__(self, length: int, block_size: int, obfuscate: bool, secret: str) -> None:
+        """
+        Создаёт генератор и вычисляет параметры перестановки.
+
+        :param length: Длина коротких ссылок.
+        :type length: int
+        :param block_size: Количество значений, резервируемых за одно обращение к базе данных.
+        :type block_size: int
+        :param obfuscate: Переставлять ли значения счётчика.
+        :type obfuscate: bool
+        :param secret: Секрет, из которого выводятся параметры перестановки.
+        :type secret: str
+        """
+        self.length = length
+        self.block_size = block_size
+        self.capacity = len(self.alphabet) ** length
+        self.multiplier = 1
+        self.offset = 0
+        self._values: deque[int] = deque()
+        self._lock = asyncio.Lock()
+
+        if obfuscate:
+            digest = hashlib.blake2b(secret.encode(), digest_size=32, person=b"lkeep-short-link").digest()
+            self.multiplier = int.from_bytes(digest[:16], "big") % self.capacity
+            self.offset = int.from_bytes(digest[16:], "big") % self.capacity
+            while math.gcd(self.multiplier, self.capacity) != 1:
+                self.multiplier += 1
+
+    def encode(self, value: int) -> str:
+        """
+        Преобразует значение счётчика в короткую ссылку.
+
+        :param value: Значение последовательности.
+        :type value: int
+        :raises ValueError: Если значение не помещается в короткую ссылку заданной длины.
+        :returns: Короткая ссылка.
+        :rtype: str
+        """
+        if not 0 <= value < self.capacity:
+            raise ValueError("Short link counter is out of range")
+
+        value = (value * self.multiplier + self.offset) % self.capacity
+        base = len(self.alphabet)
+        characters = []
+        for _ in range(self.length):
+            value, index = divmod(value, base)
+            characters.append(self.alphabet[index])
+
+        return "".join(reversed(characters))
+
+    async def _reserve(self, db: DBDependency) -> None:
+        """
+        Резервирует у последовательности очередной блок значений.
+
+        :param db: Зависимость базы данных.
+        :type db: DBDependency
+        :returns: None
+        """
+        async with db.db_session() as session:
+            query = select(short_link_sequence.next_value()).select_from(func.generate_series(1, self.block_size))
+            result = await session.scalars(query)
+            self._values.extend(result.all())
+
+    async def next_code(self, db: DBDependency) -> str:
+        """
+        Возвращает новую короткую ссылку.
+
+        :param db: Зависимость базы данных.
+        :type db: DBDependency
+        :returns: Короткая ссылка, не выдававшаяся ранее.
+        :rtype: str
+        """
+        if not self._values:
+            async with self._lock:
+                if not self._values:
+                    await self._reserve(db=db)
+
+        return self.encode(value=self._values.popleft())
+
+    async def next_codes(self, db: DBDependency, count: int) -> list[str]:
+        """
+        Возвращает несколько новых коротких ссылок.
+
+        :param db: Зависимость базы данных.
+        :type db: DBDependency
+        :param count: Требуемое количество ссылок.
+        :type count: int
+        :returns: Короткие ссылки, не выдававшиеся ранее.
+        :rtype: list[str]
+        """
+        return [await self.next_code(db=db) for _ in range(count)]
+
+
+short_code_counter = ShortCodeCounter(
+    length=settings.link_length,
+    block_size=settings.links_settings.link_code_block_size,
+    obfuscate=settings.links_settings.link_code_obfuscate,
+    secret=settings.secret_key.get_secret_value(),
+)
@@ -0,0 +1,151 @@
+"""
+Проект: Lkeep
+Автор: Иван Ашихмин
+Год: 2025
+Специально для проекта "Код на салфетке"
+https://pressanybutton.ru/category/servis-na-fastapi/
+"""
+
+import secrets
+
+from redis.exceptions import RedisError
+from sqlalchemy import select
+
+from lkeep.core.core_dependency.db_dependency import DBDependency
+from lkeep.core.core_dependency.redis_dependency import RedisDependency
+from lkeep.core.settings import settings
+from lkeep.database.models import Link
+
+
+def generate_short_code(length: int) -> str:
+    """
+    Генерирует случайную короткую ссылку.
+
+    :param length: Длина короткой ссылки.
+    :type length: int
+    :returns: Случайная строка из символов, допустимых в URL.
+    :rtype: str
+    """
+    return secrets.token_urlsafe(length)[:length]
+
+
+class ShortCodePool:
+    """
+    Пул заранее сгенерированных коротких ссылок, которых нет в базе данных.
+
+    Пул хранится в множестве Redis и общий для всех процессов: создание ссылки забирает из него код одной командой
+    SPOP, а фоновая задача пополняет его пачками, отбрасывая коды, уже занятые в базе данных.
+
+    :ivar key_prefix: Префикс ключей пула в Redis.
+    :type key_prefix: str
+    """
+
+    key_prefix = "link:code_pool"
+
+    def __init__(self, length: int, size: int, batch_size: int) -> None:
+        """
+        Создаёт пул коротких ссылок заданной длины.
+
+        :param length: Длина коротких ссылок.
+        :type length: int
+        :param size: Количество свободных кодов, до которого пополняется пул.
+        :type size: int
+        :param batch_size: Количество кодов, генерируемых и проверяемых за одну итерацию пополнения.
+        :type batch_size: int
+        """
+        self.length = length
+        self.size = size
+        self.batch_size = batch_size
+        self.key = f"{self.key_prefix}:{length}"
+        self.lock_key = f"{self.key}:lock"
+
+    async def pop_many(self, redis: RedisDependency, count: int) -> list[str]:
+        """
+        Забирает из пула несколько свободных кодов одной командой.
+
+        :param redis: Зависимость Redis.
+        :type redis: RedisDependency
+        :param count: Требуемое количество кодов.
+        :type count: int
+        :returns: Короткие ссылки; их может оказаться меньше запрошенного, если пул опустел или Redis недоступен.
+        :rtype: list[str]
+        """
+        try:
+            async with redis.get_client() as client:
+                return await client.spop(self.key, count)
+        except RedisError:
+            return []
+
+    async def push(self, redis: RedisDependency, *short_links: str) -> None:
+        """
+        Возвращает в пул коды, которые были забраны, но не понадобились.
+
+        :param redis: Зависимость Redis.
+        :type redis: RedisDependency
+        :param short_links: Неиспользованные короткие ссылки из пула.
+        :type short_links: str
+        :returns: None
+        """
+        if not short_links:
+            return
+
+        try:
+            async with redis.get_client() as client:
+                await client.sadd(self.key, *short_links)
+        except RedisError:
+            pass
+
+    async def refill(self, db: DBDependency, redis: RedisDependency) -> int:
+        """
+        Пополняет пул до заданного размера.
+
+        Одновременно пул пополняет только один процесс. Код, попавший в пул, может быть занят позже, например
+        ссылкой, созданной в обход пула, поэтому при вставке конфликт уникальности всё равно обрабатывается.
+
+        :param db: Зависимость базы данных.
+        :type db: DBDependency
+        :param redis: Зависимость Redis.
+        :type redis: RedisDependency
+        :returns: Количество добавленных в пул кодов.
+        :rtype: int
+        """
+        added = 0
+
+        async with redis.get_client() as client:
+            if not await client.set(self.lock_key, 1, nx=True, ex=300):
+                return added
+
+            try:
+                while (missing := self.size - await client.scard(self.key)) > 0:
+                    candidates = {generate_short_code(length=self.length) for _ in range(min(missing, self.batch_size))}
+
+                    async with db.db_session() as session:
+                        query = select(Link.short_link).where(Link.short_link.in_(candidates))
+                        result = await session.scalars(query)
+                        free_codes = candidates.difference(result.all())
+
+                    if free_codes:
+                        added += await client.sadd(self.key, *free_codes)
+            finally:
+                await client.delete(self.lock_key)
+
+        return added
+
+    async def get_size(self, redis: RedisDependency) -> int:
+        """
+        Возвращает текущее количество свободных кодов в пуле.
+
+        :param redis: Зависимость Redis.
+        :type redis: RedisDependency
+        :returns: Размер пула.
+        :rtype: int
+        """
+        async with redis.get_client() as client:
+            return await client.scard(self.key)
+
+
+short_code_pool = ShortCodePool(
+    length=settings.link_length,
+    size=settings.links_settings.link_code_pool_size,
+    batch_size=settings.links_settings.link_code_pool_batch_size,
+)
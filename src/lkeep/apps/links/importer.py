@@ -0,0 +1,250 @@
+"""
+Проект: Lkeep
+Автор: Иван Ашихмин
+Год: 2025
+Специально для проекта "Код на салфетке"
+https://pressanybutton.ru/category/servis-na-fastapi/
+"""
+
+import asyncio
+import csv
+import itertools
+import uuid
+from collections.abc import Callable
+from urllib.parse import urlsplit
+
+from asyncpg import Connection
+
+from lkeep.apps.links.managers import LinksManager
+from lkeep.apps.links.schemas import ImportLinkErrorSchema, ImportLinksResultSchema
+from lkeep.core.core_dependency.db_dependency import DBDependency
+from lkeep.core.core_dependency.redis_dependency import RedisDependency
+from lkeep.core.settings import settings
+
+
+class LinksImporter:
+    """
+    Импорт ссылок пользователя из CSV-файла.
+
+    Файл читается построчно, корректные строки пачками копируются командой COPY во временную таблицу и оттуда
+    переносятся в таблицу ссылок одним запросом. Коды, оказавшиеся занятыми, заменяются случайными прямо
+    в базе данных, и перенос повторяется только для них.
+
+    В режиме без дублей хеш полной ссылки вычисляется при переносе, как и при создании ссылки через API.
+    Строки с адресом, который уже есть у владельца или повторяется в файле, пропускаются и учитываются
+    как импортированные.
+
+    :ivar staging_table: Имя временной таблицы для загрузки пачки.
+    :type staging_table: str
+    :ivar max_attempts: Количество попыток переноса пачки с заменой занятых кодов.
+    :type max_attempts: int
+    """
+
+    staging_table = "link_import"
+    max_attempts = 5
+
+    def __init__(self, db: DBDependency, redis: RedisDependency) -> None:
+        """
+        Создаёт импорт с зависимостями доступа к базе данных и Redis.
+
+        :param db: Зависимость базы данных.
+        :type db: DBDependency
+        :param redis: Зависимость Redis, через которую обновляются фильтр Блума и кэш ссылок.
+        :type redis: RedisDependency
+        """
+        self.db = db
+        self.manager = LinksManager(db=db, redis=redis)
+        self.batch_size = settings.links_settings.link_import_batch_size
+        self.max_errors = settings.links_settings.link_import_max_errors
+
+    @staticmethod
+    def _parse_row(row: list[str]) -> str:
+        """
+        Извлекает полную ссылку из строки файла.
+
+        :param row: Значения строки CSV; ссылка берётся из первого столбца.
+        :type row: list[str]
+        :raises ValueError: Если ссылка пустая или не является HTTP(S)-адресом.
+        :returns: Полная ссылка.
+        :rtype: str
+        """
+        full_link = row[0].strip() if row else ""
+        if not full_link:
+            raise ValueError("Empty link")
+
+        url = urlsplit(full_link)
+        if url.scheme not in ("http", "https") or not url.netloc:
+            raise ValueError("Link must be an absolute http(s) URL")
+
+        return full_link
+
+    def _add_error(self, result: ImportLinksResultSchema, row_number: int, error: str) -> None:
+        """
+        Учитывает строку, которую не удалось импортировать.
+
+        :param result: Ход импорта.
+        :type result: ImportLinksResultSchema
+        :param row_number: Номер строки файла.
+        :type row_number: int
+        :param error: Описание ошибки.
+        :type error: str
+        :returns: None
+        """
+        result.failed += 1
+        if len(result.errors) < self.max_errors:
+            result.errors.append(ImportLinkErrorSchema(row=row_number, error=error))
+
+    async def run(
+        self,
+        file_path: str,
+        user_id: uuid.UUID,
+        on_progress: Callable[[ImportLinksResultSchema], None] | None = None,
+    ) -> ImportLinksResultSchema:
+        """
+        Импортирует ссылки из файла.
+
+        Первый столбец каждой строки - полная ссылка; строка заголовка ``full_link`` пропускается.
+        Файл читается в отдельном потоке порциями по размеру пачки, чтобы не блокировать цикл событий.
+        Каждая пачка загружается в отдельной транзакции.
+
+        :param file_path: Путь к CSV-файлу.
+        :type file_path: str
+        :param user_id: Идентификатор владельца ссылок.
+        :type user_id: uuid.UUID
+        :param on_progress: Функция, вызываемая после загрузки каждой пачки.
+        :type on_progress: Callable[[ImportLinksResultSchema], None] | None
+        :returns: Итог импорта.
+        :rtype: ImportLinksResultSchema
+        """
+        result = ImportLinksResultSchema()
+
+        async with self.db.db_engine.connect() as connection:
+            raw_connection = await connection.get_raw_connection()
+            driver_connection = raw_connection.driver_connection
+            await driver_connection.execute(
+                f"CREATE TEMPORARY TABLE IF NOT EXISTS {self.staging_table} "
+                "(row_number integer NOT NULL, id uuid NOT NULL, full_link text NOT NULL, short_link text NOT NULL)"
+            )
+
+            try:
+                file = await asyncio.to_thread(open, file_path, newline="", encoding="utf-8-sig")
+                with file:
+                    rows = enumerate(csv.reader(file), start=1)
+                    batch = []
+                    while chunk := await asyncio.to_thread(list, itertools.islice(rows, self.batch_size)):
+                        for row_number, row in chunk:
+                            if row_number == 1 and row and row[0].strip().lower() == "full_link":
+                                continue
+
+                            result.processed += 1
+                            try:
+                                batch.append((row_number, self._parse_row(row=row)))
+                            except ValueError as error:
+                                self._add_error(result=result, row_number=row_number, error=str(error))
+
+                            if len(batch) >= self.batch_size:
+                                await self._load_batch(
+                                    connection=driver_connection, batch=batch, user_id=user_id, result=result
+                                )
+                                batch = []
+                                if on_progress is not None:
+                                    on_progress(result)
+
+                    if batch:
+                        await self._load_batch(
+                            connection=driver_connection, batch=batch, user_id=user_id, result=result
+                        )
+            finally:
+                await driver_connection.execute(f"DROP TABLE IF EXISTS {self.staging_table}")
+
+        if on_progress is not None:
+            on_progress(result)
+
+        return result
+
+    async def _load_batch(
+        self,
+        connection: Connection,
+        batch: list[tuple[int, str]],
+        user_id: uuid.UUID,
+        result: ImportLinksResultSchema,
+    ) -> None:
+        """
+        Загружает пачку строк во временную таблицу и переносит их в таблицу ссылок.
+
+        :param connection: Соединение asyncpg.
+        :type connection: Connection
+        :param batch: Номера строк файла и полные ссылки.
+        :type batch: list[tuple[int, str]]
+        :param user_id: Идентификатор владельца ссылок.
+        :type user_id: uuid.UUID
+        :param result: Ход импорта, который обновляется по итогам пачки.
+        :type result: ImportLinksResultSchema
+        :returns: None
+        """
+        short_links = await self.manager.generate_short_codes(count=len(batch))
+        records = [
+            (row_number, uuid.uuid4(), full_link, short_link)
+            for (row_number, full_link), short_link in zip(batch, short_links)
+        ]
+        imported_links = []
+        deduplicate = settings.links_settings.link_deduplicate
+        full_link_hash = "sha256(convert_to(full_link, 'UTF8'))" if deduplicate else "NULL"
+        duplicates = 0
+
+        async with connection.transaction():
+            await connection.execute(f"TRUNCATE {self.staging_table}")
+            await connection.copy_records_to_table(
+                self.staging_table, records=records, columns=("row_number", "id", "full_link", "short_link")
+            )
+
+            for _ in range(self.max_attempts):
+                rows = await connection.fetch(
+                    f"""
+                    WITH inserted AS (
+                        INSERT INTO link (id, full_link, short_link, owner_id, full_link_hash, created_at)
+                        SELECT id, full_link, short_link, $1, {full_link_hash}, now() FROM {self.staging_table}
+                        ON CONFLICT DO NOTHING
+                        RETURNING id
+                    )
+                    DELETE FROM {self.staging_table} AS staging USING inserted
+                    WHERE staging.id = inserted.id
+                    RETURNING staging.short_link
+                    """,
+                    user_id,
+                )
+                imported_links.extend(row["short_link"] for row in rows)
+
+                if deduplicate:
+                    duplicates += len(
+                        await connection.fetch(
+                            f"""
+                            DELETE FROM {self.staging_table} AS staging USING link
+                            WHERE link.owner_id = $1
+                                AND link.full_link_hash = sha256(convert_to(staging.full_link, 'UTF8'))
+                            RETURNING staging.id
+                            """,
+                            user_id,
+                        )
+                    )
+
+                if len(imported_links) + duplicates == len(records):
+                    break
+
+                await connection.execute(
+                    f"""
+                    UPDATE {self.staging_table}
+                    SET short_link = substr(translate(encode(uuid_send(gen_random_uuid()), 'base64'), '+/', '-_'), 1, $1)
+                    """,
+                    settings.link_length,
+                )
+
+            failed_rows = await connection.fetch(f"SELECT row_number FROM {self.staging_table} ORDER BY row_number")
+
+        for row in failed_rows:
+            self._add_error(result=result, row_number=row["row_number"], error="Could not allocate a short link")
+
+        result.imported += len(imported_links) + duplicates
+        await self.manager.register_short_links(*imported_links)
+        if imported_links:
+            await self.manager.bump_links_version(user_id)
@@ -0,0 +1,216 @@
+"""
+Проект: Lkeep
+Автор: Иван Ашихмин
+Год: 2025
+Специально для проекта "Код на салфетке"
+https://pressanybutton.ru/category/servis-na-fastapi/
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+
+from redis.exceptions import RedisError
+
+from lkeep.apps.links.schemas import LocalCacheStatsSchema
+from lkeep.core.core_dependency.redis_dependency import RedisDependency
+from lkeep.core.settings import settings
+
+
+class LocalLinksCache:
+    """
+    Ограниченный LRU-кэш коротких ссылок с временем жизни записей, хранящийся в памяти процесса.
+
+    Отсутствующие ссылки хранятся как пустая строка с меньшим временем жизни. Вместе со ссылкой хранится
+    её ограничение переходов. Удаление и изменение ссылок
+    в любом процессе рассылается через канал Redis, поэтому кэши всех процессов сбрасываются согласованно.
+
+    :ivar invalidation_channel: Канал Redis, через который рассылаются устаревшие короткие ссылки.
+    :type invalidation_channel: str
+    :ivar missing_value: Значение, которым помечаются отсутствующие ссылки.
+    :type missing_value: str
+    :ivar links_per_message: Количество коротких ссылок в одном сообщении канала, разделённых пробелами.
+    :type links_per_message: int
+    """
+
+    invalidation_channel = "link:invalidate"
+    missing_value = ""
+    links_per_message = 1000
+
+    def __init__(self, max_size: int, ttl: int, negative_ttl: int) -> None:
+        """
+        Создаёт пустой кэш.
+
+        :param max_size: Максимальное количество записей, после которого вытесняются самые давние.
+        :type max_size: int
+        :param ttl: Время жизни записи о найденной ссылке в секундах.
+        :type ttl: int
+        :param negative_ttl: Время жизни записи об отсутствующей ссылке в секундах.
+        :type negative_ttl: int
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: OrderedDict[str, tuple[str, float, int | None]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, short_link: str) -> tuple[str, float, int | None] | None:
+        """
+        Возвращает запись из кэша.
+
+        :param short_link: Сокращенный идентификатор ссылки.
+        :type short_link: str
+        :returns: Полная ссылка или пустая строка для известной отсутствующей ссылки вместе с оставшимся временем
+            жизни записи в секундах и ограничением переходов ссылки либо None при промахе.
+        :rtype: tuple[str, float, int | None] | None
+        """
+        entry = self._entries.get(short_link)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        full_link, expires_at, max_clicks = entry
+        ttl = expires_at - time.monotonic()
+        if ttl <= 0:
+            del self._entries[short_link]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(short_link)
+        self.hits += 1
+        return full_link, ttl, max_clicks
+
+    def set(
+        self, short_link: str, full_link: str | None, ttl: float | None = None, max_clicks: int | None = None
+    ) -> None:
+        """
+        Сохраняет результат разрешения короткой ссылки.
+
+        :param short_link: Сокращенный идентификатор ссылки.
+        :type short_link: str
+        :param full_link: Полная ссылка или None, если ссылка не существует.
+        :type full_link: str | None
+        :param ttl: Время в секундах, дольше которого запись хранить нельзя, например до истечения ссылки;
+            при 0 запись не сохраняется.
+        :type ttl: float | None
+        :param max_clicks: Количество переходов, после которого ссылка перестаёт открываться.
+        :type max_clicks: int | None
+        :returns: None
+        """
+        if self.max_size <= 0 or ttl == 0:
+            return
+
+        default_ttl = self.ttl if full_link else self.negative_ttl
+        ttl = default_ttl if ttl is None else min(default_ttl, ttl)
+        self._entries[short_link] = (full_link or self.missing_value, time.monotonic() + ttl, max_clicks)
+        self._entries.move_to_end(short_link)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, *short_links: str) -> None:
+        """
+        Удаляет записи о коротких ссылках из кэша процесса.
+
+        :param short_links: Сокращенные идентификаторы устаревших ссылок.
+        :type short_links: str
+        :returns: None
+        """
+        for short_link in short_links:
+            if self._entries.pop(short_link, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        """
+        Полностью очищает кэш процесса.
+
+        :returns: None
+        """
+        self._entries.clear()
+
+    def get_stats(self) -> LocalCacheStatsSchema:
+        """
+        Возвращает счётчики работы кэша.
+
+        :returns: Статистика попаданий, промахов и вытеснений.
+        :rtype: LocalCacheStatsSchema
+        """
+        return LocalCacheStatsSchema(
+            size=len(self._entries),
+            max_size=self.max_size,
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            expirations=self.expirations,
+            invalidations=self.invalidations,
+        )
+
+    async def publish_invalidation(self, redis: RedisDependency, *short_links: str) -> None:
+        """
+        Сбрасывает записи в текущем процессе и рассылает их остальным процессам.
+
+        :param redis: Зависимость Redis, через которую отправляется сообщение.
+        :type redis: RedisDependency
+        :param short_links: Сокращенные идентификаторы устаревших ссылок.
+        :type short_links: str
+        :returns: None
+        """
+        self.invalidate(*short_links)
+
+        async with redis.get_client() as client, client.pipeline(transaction=False) as pipe:
+            for offset in range(0, len(short_links), self.links_per_message):
+                message = " ".join(short_links[offset : offset + self.links_per_message])
+                pipe.publish(self.invalidation_channel, message)
+            await pipe.execute()
+
+    async def listen_invalidations(
+        self, redis: RedisDependency, poll_timeout: float = 1.0, retry_delay: float = 1.0
+    ) -> None:
+        """
+        Слушает канал инвалидации и сбрасывает устаревшие записи до отмены задачи.
+
+        После потери соединения кэш очищается целиком, так как часть сообщений могла быть пропущена.
+
+        :param redis: Зависимость Redis, через которую выполняется подписка.
+        :type redis: RedisDependency
+        :param poll_timeout: Время ожидания очередного сообщения в секундах.
+        :type poll_timeout: float
+        :param retry_delay: Пауза перед повторной подпиской после ошибки в секундах.
+        :type retry_delay: float
+        :returns: None
+        """
+        while True:
+            try:
+                async with redis.client.pubsub(ignore_subscribe_messages=True) as pubsub:
+                    await pubsub.subscribe(self.invalidation_channel)
+                    self.clear()
+                    while True:
+                        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=poll_timeout)
+                        if message is not None:
+                            self.invalidate(*message["data"].split())
+            except (RedisError, OSError):
+                self.clear()
+                await asyncio.sleep(retry_delay)
+
+
+local_links_cache = LocalLinksCache(
+    max_size=settings.links_settings.link_local_cache_size,
+    ttl=settings.links_settings.link_local_cache_ttl,
+    negative_ttl=settings.links_settings.link_local_negative_cache_ttl,
+)
+
+
+def get_local_links_cache() -> LocalLinksCache:
+    """
+    Возвращает общий для процесса кэш коротких ссылок.
+
+    :returns: Кэш ссылок в памяти процесса.
+    :rtype: LocalLinksCache
+    """
+    return local_links_cache
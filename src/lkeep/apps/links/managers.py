@@ -6,119 +6,931 @@
 https://pressanybutton.ru/category/servis-na-fastapi/
 """
 
+import asyncio
+import datetime
+import hashlib
+import logging
+import time
 import uuid
+from collections.abc import AsyncGenerator, Sequence
 
 from fastapi import Depends
-from sqlalchemy import delete, insert, select
+from redis.exceptions import RedisError
+from sqlalchemy import (
+    UUID,
+    LargeBinary,
+    Row,
+    any_,
+    bindparam,
+    delete,
+    exists,
+    func,
+    insert,
+    or_,
+    select,
+    tuple_,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.sql.expression import BindParameter
 
-from lkeep.apps.links.schemas import GetLinkSchema, LinkSchema
-from lkeep.core.core_dependency.db_dependency import DBDependency
-from lkeep.database.models import Link
+from lkeep.apps.links.bloom_filter import links_bloom_filter
+from lkeep.apps.links.code_counter import short_code_counter
+from lkeep.apps.links.code_pool import generate_short_code, short_code_pool
+from lkeep.apps.links.local_cache import local_links_cache
+from lkeep.apps.links.schemas import (
+    BloomFilterStatsSchema,
+    GetLinkSchema,
+    LinkSchema,
+    links_adapter,
+)
+from lkeep.core.core_dependency.db_dependency import DBDependency, get_db_dependency
+from lkeep.core.core_dependency.redis_dependency import (
+    RedisDependency,
+    get_redis_dependency,
+)
+from lkeep.core.settings import settings
+from lkeep.database.models import ClickHourly, Link
+
+logger = logging.getLogger(__name__)
 
 
 class LinksManager:
     """
     Менеджер для выполнения операций над ссылками в базе данных.
+
+    :ivar cache_prefix: Префикс ключей кэша коротких ссылок в Redis.
+    :type cache_prefix: str
+    :ivar missing_value: Значение, которым в кэше помечаются отсутствующие ссылки.
+    :type missing_value: str
+    :ivar limited_prefix: Префикс, которым в кэше помечаются ссылки с ограничением переходов; за ним следуют
+        ограничение и через пробел полная ссылка.
+    :type limited_prefix: str
+    :ivar limited_clicks_key: Ключ хеша Redis с количеством разрешённых переходов по ссылкам с ограничением.
+    :type limited_clicks_key: str
+    :ivar link_statement: Запрос действующей ссылки, выполняемый напрямую через asyncpg. Драйвер подготавливает
+        его один раз на соединение и дальше выполняет по имени из своего кэша подготовленных выражений.
+    :type link_statement: str
+    :ivar links_version_prefix: Префикс ключей версий наборов ссылок пользователей в Redis.
+    :type links_version_prefix: str
+    :ivar links_version_ttl: Время жизни версии набора ссылок в Redis в секундах с момента последнего изменения.
+    :type links_version_ttl: int
+    :ivar import_owner_prefix: Префикс ключей владельцев задач импорта ссылок в Redis.
+    :type import_owner_prefix: str
+    :ivar import_owner_ttl: Время жизни записи о владельце задачи импорта в секундах, совпадающее со временем
+        хранения результатов задач Celery по умолчанию.
+    :type import_owner_ttl: int
     """
 
-    def __init__(self, db: DBDependency = Depends(DBDependency)) -> None:
+    cache_prefix = "link"
+    missing_value = ""
+    limited_prefix = "~"
+    limited_clicks_key = "link:limited_clicks"
+    link_statement = (
+        "SELECT full_link, expires_at, max_clicks, clicks FROM link "
+        "WHERE short_link = $1 AND (expires_at IS NULL OR expires_at > now())"
+    )
+    links_version_prefix = "link:version"
+    links_version_ttl = 7 * 24 * 3600
+    import_owner_prefix = "import"
+    import_owner_ttl = 24 * 3600
+
+    def __init__(
+        self,
+        db: DBDependency = Depends(get_db_dependency),
+        redis: RedisDependency = Depends(get_redis_dependency),
+    ) -> None:
         """
-        Инициализирует менеджер с зависимостью доступа к базе данных.
+        Инициализирует менеджер с зависимостями доступа к базе данных и Redis.
 
         :param db: Объект для получения асинхронных сессий с базой данных.
         :type db: DBDependency
+        :param redis: Объект для получения клиента Redis, используемого как кэш ссылок.
+        :type redis: RedisDependency
         """
         self.db = db
+        self.redis = redis
         self.link_model = Link
 
+    def _get_cache_key(self, short_link: str) -> str:
+        """
+        Формирует ключ кэша для короткой ссылки.
+
+        :param short_link: Сокращенный идентификатор ссылки.
+        :type short_link: str
+        :returns: Ключ записи в Redis.
+        :rtype: str
+        """
+        return f"{self.cache_prefix}:{short_link}"
+
+    @staticmethod
+    def _hash_full_link(full_link: str) -> bytes:
+        """
+        Вычисляет хеш полной ссылки для поиска ссылок владельца с тем же адресом.
+
+        :param full_link: Полная ссылка.
+        :type full_link: str
+        :returns: SHA-256 ссылки в кодировке UTF-8.
+        :rtype: bytes
+        """
+        return hashlib.sha256(full_link.encode()).digest()
+
+    @staticmethod
+    def _bind_link_ids(link_ids: list[uuid.UUID]) -> BindParameter:
+        """
+        Передаёт список идентификаторов ссылок одним параметром-массивом для использования с ``ANY``.
+
+        :param link_ids: Идентификаторы ссылок.
+        :type link_ids: list[uuid.UUID]
+        :returns: Параметр запроса.
+        :rtype: BindParameter
+        """
+        return bindparam("link_ids", value=link_ids, type_=ARRAY(UUID(as_uuid=True)))
+
     async def get_link(self, short_link: str) -> GetLinkSchema | None:
         """
         Возвращает полную ссылку по короткому идентификатору.
 
         :param short_link: Сокращенный идентификатор ссылки.
         :type short_link: str
-        :returns: Найденная ссылка или None, если запись отсутствует.
+        :returns: Найденная ссылка или None, если запись отсутствует или истекла.
         :rtype: GetLinkSchema | None
         """
-        async with self.db.db_session() as session:
-            query = select(self.link_model.full_link).where(self.link_model.short_link == short_link)
+        full_link, _, _ = await self.get_full_link(short_link=short_link)
 
-            result = await session.execute(query)
-            link = result.scalar_one_or_none()
+        if full_link:
+            return GetLinkSchema(full_link=full_link)
+
+        return None
+
+    async def get_full_link(self, short_link: str) -> tuple[str | None, float | None, int | None]:
+        """
+        Возвращает полную ссылку, сначала обращаясь к кэшу Redis, а при промахе - к базе данных.
+
+        Вместе с чтением кэша за тот же запрос к Redis проверяется фильтр Блума: если ссылки точно нет,
+        база данных не запрашивается. Результат запроса к базе данных сохраняется в кэш, в том числе отсутствие
+        ссылки, но с меньшим временем жизни. При недоступности Redis запрос выполняется напрямую к базе данных.
+
+        Ссылка ищется на реплике. Промах, прошедший фильтр Блума, может означать отставание реплики от только что
+        созданной ссылки, поэтому перед кэшированием отсутствия ссылка перепроверяется в основной базе.
+
+        Истёкшие ссылки считаются отсутствующими. Запись о ссылке со сроком действия хранится в кэше не дольше,
+        чем ссылка остаётся действительной; оставшееся время жизни записи возвращается вместе с результатом,
+        чтобы кэш процесса не продлевал его. Ссылки с ограничением переходов хранятся в кэше вместе
+        с ограничением с префиксом :attr:`limited_prefix` не дольше ``link_limited_cache_ttl`` секунд. При чтении
+        такой ссылки из базы данных счётчик её разрешённых переходов в Redis заполняется уже учтёнными переходами,
+        если его ещё нет.
 
-            if link:
-                return GetLinkSchema(full_link=link)
+        :param short_link: Сокращенный идентификатор ссылки.
+        :type short_link: str
+        :returns: Полная ссылка или None, если запись отсутствует, время в секундах, в течение которого
+            результат можно кэшировать, или None, если оно не ограничено, и ограничение переходов ссылки.
+        :rtype: tuple[str | None, float | None, int | None]
+        """
+        cache_key = self._get_cache_key(short_link=short_link)
 
+        try:
+            async with self.redis.get_client() as client, client.pipeline(transaction=False) as pipe:
+                pipe.get(cache_key)
+                pipe.pttl(cache_key)
+                links_bloom_filter.queue_contains(pipe=pipe, short_link=short_link)
+                cached_link, cache_ttl, bloom_exists, bloom_counters = await pipe.execute()
+        except RedisError:
+            cached_link, cache_ttl, bloom_exists, bloom_counters = None, -2, 0, []
+
+        if cached_link is not None:
+            ttl = cache_ttl / 1000 if cache_ttl > 0 else None
+            if cached_link.startswith(self.limited_prefix):
+                max_clicks, full_link = cached_link.removeprefix(self.limited_prefix).split(" ", 1)
+                return full_link, ttl, int(max_clicks)
+
+            return cached_link or None, ttl, None
+
+        if not links_bloom_filter.parse_contains(exists=bloom_exists, counters=bloom_counters):
+            return None, None, None
+
+        link = await self.fetch_link(short_link=short_link)
+
+        if link is None:
+            link = await self.fetch_link(short_link=short_link, primary=True)
+
+        full_link, expires_at, max_clicks, clicks = link or (None, None, None, None)
+        ttl = self._get_remaining_ttl(expires_at=expires_at)
+        cached_link = full_link
+        if max_clicks is not None:
+            limited_ttl = settings.links_settings.link_limited_cache_ttl
+            ttl = limited_ttl if ttl is None else min(ttl, limited_ttl)
+            cached_link = f"{self.limited_prefix}{max_clicks} {full_link}"
+
+        try:
+            async with self.redis.get_client() as client, client.pipeline(transaction=False) as pipe:
+                if not full_link:
+                    pipe.set(cache_key, self.missing_value, ex=settings.links_settings.link_negative_cache_ttl)
+                else:
+                    pipe.set(cache_key, cached_link, px=self._get_cache_ttl_ms(ttl=ttl))
+                    if max_clicks is not None:
+                        pipe.hsetnx(self.limited_clicks_key, short_link, clicks)
+                await pipe.execute()
+        except RedisError:
+            pass
+
+        return full_link, ttl, max_clicks
+
+    async def count_limited_click(self, short_link: str, max_clicks: int) -> bool:
+        """
+        Учитывает переход по ссылке с ограничением переходов и проверяет, не исчерпано ли ограничение.
+
+        Счётчик увеличивается атомарно, поэтому ограничение соблюдается точно даже при одновременных переходах
+        в разных процессах. На первом отклонённом переходе записи о ссылке сбрасываются во всех кэшах; в базе
+        данных ссылка помечается истёкшей при ближайшем переносе счётчиков. При недоступности Redis переход
+        разрешается, а ограничение соблюдается с точностью до переноса счётчиков.
+
+        :param short_link: Сокращенный идентификатор ссылки.
+        :type short_link: str
+        :param max_clicks: Количество переходов, после которого ссылка перестаёт открываться.
+        :type max_clicks: int
+        :returns: True, если переход разрешён, иначе False.
+        :rtype: bool
+        """
+        try:
+            async with self.redis.get_client() as client:
+                clicks = await client.hincrby(self.limited_clicks_key, short_link, 1)
+        except RedisError:
+            return True
+
+        if clicks == max_clicks + 1:
+            await self.invalidate_links_cache(short_link)
+
+        return clicks <= max_clicks
+
+    @staticmethod
+    def _get_remaining_ttl(expires_at: datetime.datetime | None) -> float | None:
+        """
+        Вычисляет, сколько секунд ссылка остаётся действительной.
+
+        :param expires_at: Время истечения ссылки.
+        :type expires_at: datetime.datetime | None
+        :returns: Положительное количество секунд или None, если срок действия не задан.
+        :rtype: float | None
+        """
+        if expires_at is None:
             return None
 
-    async def get_links(self, user_id: uuid.UUID) -> list[LinkSchema]:
+        return max((expires_at - datetime.datetime.now(datetime.UTC)).total_seconds(), 0.001)
+
+    @staticmethod
+    def _get_cache_ttl_ms(ttl: float | None) -> int:
+        """
+        Вычисляет время жизни записи о найденной ссылке в кэше Redis.
+
+        :param ttl: Время в секундах, в течение которого ссылка остаётся действительной.
+        :type ttl: float | None
+        :returns: Время жизни записи в миллисекундах, не превышающее ``link_cache_ttl``.
+        :rtype: int
+        """
+        cache_ttl = settings.links_settings.link_cache_ttl
+        if ttl is None:
+            return cache_ttl * 1000
+
+        return max(int(min(cache_ttl, ttl) * 1000), 1)
+
+    async def warm_up_cache(self) -> int:
+        """
+        Заполняет кэш Redis и кэш текущего процесса самыми посещаемыми за последнее время ссылками.
+
+        Ссылки выбираются по почасовым итогам переходов за ``link_warmup_lookback`` секунд. Если итогов нет,
+        например когда события переходов не сохраняются, ссылки выбираются по общему счётчику переходов.
+        Выбранные ссылки записываются в Redis одним конвейером с теми же временами жизни, что и при обычном
+        разрешении. Ссылки с ограничением переходов пропускаются, так как хранятся в кэше лишь несколько секунд.
+
+        :returns: Количество загруженных в кэш ссылок.
+        :rtype: int
+        """
+        links_settings = settings.links_settings
+        if links_settings.link_warmup_size <= 0:
+            return 0
+
+        active_links = select(self.link_model.short_link, self.link_model.full_link, self.link_model.expires_at).where(
+            or_(self.link_model.expires_at.is_(None), self.link_model.expires_at > func.now()),
+            self.link_model.max_clicks.is_(None),
+        )
+        queries = []
+
+        if settings.stats_settings.stats_click_events:
+            total_clicks = func.sum(ClickHourly.clicks).label("total_clicks")
+            recent_links = (
+                select(ClickHourly.short_link, total_clicks)
+                .where(ClickHourly.hour >= func.now() - datetime.timedelta(seconds=links_settings.link_warmup_lookback))
+                .group_by(ClickHourly.short_link)
+                .order_by(total_clicks.desc())
+                .limit(links_settings.link_warmup_size)
+                .subquery()
+            )
+            queries.append(active_links.join(recent_links, recent_links.c.short_link == self.link_model.short_link))
+
+        queries.append(
+            active_links.where(self.link_model.clicks > 0)
+            .order_by(self.link_model.clicks.desc())
+            .limit(links_settings.link_warmup_size)
+        )
+
+        links = []
+        async with self.db.db_read_session() as session:
+            for query in queries:
+                links = (await session.execute(query)).all()
+                if links:
+                    break
+
+        if not links:
+            logger.info("Link cache warm-up found no visited links to load")
+            return 0
+
+        async with self.redis.get_client() as client, client.pipeline(transaction=False) as pipe:
+            for short_link, full_link, expires_at in links:
+                ttl = self._get_remaining_ttl(expires_at=expires_at)
+                pipe.set(self._get_cache_key(short_link=short_link), full_link, px=self._get_cache_ttl_ms(ttl=ttl))
+                local_links_cache.set(short_link, full_link, ttl=ttl)
+            await pipe.execute()
+
+        logger.info("Link cache warmed up with %d links", len(links))
+
+        return len(links)
+
+    async def fetch_link(
+        self, short_link: str, primary: bool = False
+    ) -> tuple[str, datetime.datetime | None, int | None, int] | None:
+        """
+        Читает действующую ссылку из базы данных в обход кэшей.
+
+        Способ чтения задаётся настройкой ``link_resolver``: запрос SQLAlchemy в сессии (orm) или подготовленное
+        выражение, выполняемое на соединении asyncpg из того же пула (asyncpg). Второй способ не строит
+        и не компилирует запрос и не создаёт сессию.
+
+        :param short_link: Сокращенный идентификатор ссылки.
+        :type short_link: str
+        :param primary: Читать ли из основной базы вместо реплики.
+        :type primary: bool
+        :returns: Полная ссылка, время её истечения, максимальное количество переходов и количество уже
+            перенесённых в базу данных переходов или None, если ссылка отсутствует или уже истекла.
+        :rtype: tuple[str, datetime.datetime | None, int | None, int] | None
+        """
+        if settings.links_settings.link_resolver == "asyncpg":
+            connect = self.db.db_engine.connect() if primary else self.db.db_read_connection()
+            async with connect as connection:
+                raw_connection = await connection.get_raw_connection()
+                link = await raw_connection.driver_connection.fetchrow(self.link_statement, short_link)
+        else:
+            query = select(
+                self.link_model.full_link,
+                self.link_model.expires_at,
+                self.link_model.max_clicks,
+                self.link_model.clicks,
+            ).where(
+                self.link_model.short_link == short_link,
+                or_(self.link_model.expires_at.is_(None), self.link_model.expires_at > func.now()),
+            )
+            session_factory = self.db.db_session if primary else self.db.db_read_session
+            async with session_factory() as session:
+                link = (await session.execute(query)).first()
+
+        return tuple(link) if link is not None else None
+
+    async def invalidate_links_cache(self, *short_links: str) -> None:
+        """
+        Удаляет записи о коротких ссылках из кэша Redis и из кэшей всех процессов приложения.
+
+        :param short_links: Сокращенные идентификаторы ссылок, записи о которых устарели.
+        :type short_links: str
+        :returns: None
+        """
+        if not short_links:
+            return
+
+        async with self.redis.get_client() as client:
+            await client.delete(*(self._get_cache_key(short_link=short_link) for short_link in short_links))
+
+        await local_links_cache.publish_invalidation(self.redis, *short_links)
+
+    def _get_links_version_key(self, user_id: uuid.UUID) -> str:
+        """
+        Формирует ключ версии набора ссылок пользователя.
+
+        :param user_id: Идентификатор владельца ссылок.
+        :type user_id: uuid.UUID
+        :returns: Ключ записи в Redis.
+        :rtype: str
+        """
+        return f"{self.links_version_prefix}:{user_id}"
+
+    async def get_links_version(self, user_id: uuid.UUID) -> int | None:
+        """
+        Возвращает версию набора ссылок пользователя, меняющуюся при каждом создании и удалении его ссылок.
+
+        Отсутствующая версия создаётся из текущего времени в наносекундах, поэтому после потери ключа или очистки
+        Redis новые значения не повторяют выданные раньше.
+
+        :param user_id: Идентификатор владельца ссылок.
+        :type user_id: uuid.UUID
+        :returns: Версия набора ссылок или None, если Redis недоступен.
+        :rtype: int | None
+        """
+        key = self._get_links_version_key(user_id=user_id)
+
+        try:
+            async with self.redis.get_client() as client, client.pipeline(transaction=False) as pipe:
+                pipe.set(key, time.time_ns(), nx=True, ex=self.links_version_ttl)
+                pipe.get(key)
+                _, version = await pipe.execute()
+        except RedisError:
+            return None
+
+        return int(version)
+
+    async def bump_links_version(self, *user_ids: uuid.UUID) -> None:
+        """
+        Увеличивает версии наборов ссылок пользователей, делая недействительными выданные им ETag.
+
+        :param user_ids: Идентификаторы владельцев изменённых ссылок.
+        :type user_ids: uuid.UUID
+        :returns: None
+        """
+        if not user_ids:
+            return
+
+        try:
+            async with self.redis.get_client() as client, client.pipeline(transaction=False) as pipe:
+                for user_id in set(user_ids):
+                    key = self._get_links_version_key(user_id=user_id)
+                    pipe.set(key, time.time_ns(), nx=True, ex=self.links_version_ttl)
+                    pipe.incr(key)
+                    pipe.expire(key, self.links_version_ttl)
+                await pipe.execute()
+        except RedisError:
+            pass
+
+    async def set_import_owner(self, task_id: str, user_id: uuid.UUID) -> None:
+        """
+        Запоминает владельца задачи импорта ссылок.
+
+        :param task_id: Идентификатор задачи импорта.
+        :type task_id: str
+        :param user_id: Идентификатор пользователя, запустившего импорт.
+        :type user_id: uuid.UUID
+        :returns: None
+        """
+        async with self.redis.get_client() as client:
+            await client.set(f"{self.import_owner_prefix}:{task_id}", str(user_id), ex=self.import_owner_ttl)
+
+    async def get_import_owner(self, task_id: str) -> str | None:
+        """
+        Возвращает владельца задачи импорта ссылок.
+
+        :param task_id: Идентификатор задачи импорта.
+        :type task_id: str
+        :returns: Идентификатор пользователя, запустившего импорт, или None, если задача неизвестна.
+        :rtype: str | None
+        """
+        async with self.redis.get_client() as client:
+            return await client.get(f"{self.import_owner_prefix}:{task_id}")
+
+    async def register_short_links(self, *short_links: str) -> None:
+        """
+        Добавляет созданные короткие ссылки в фильтр Блума и сбрасывает записи об их отсутствии в кэше.
+
+        :param short_links: Сокращенные идентификаторы созданных ссылок.
+        :type short_links: str
+        :returns: None
+        """
+        if not short_links:
+            return
+
+        await links_bloom_filter.add(self.redis, *short_links)
+        await self.invalidate_links_cache(*short_links)
+
+    async def unregister_short_links(self, *short_links: str) -> None:
+        """
+        Удаляет короткие ссылки из фильтра Блума, из кэша и из счётчиков переходов по ссылкам с ограничением.
+
+        :param short_links: Сокращенные идентификаторы удалённых ссылок.
+        :type short_links: str
+        :returns: None
+        """
+        if not short_links:
+            return
+
+        await links_bloom_filter.remove(self.redis, *short_links)
+        await self.invalidate_links_cache(*short_links)
+
+        async with self.redis.get_client() as client:
+            await client.hdel(self.limited_clicks_key, *short_links)
+
+    async def rebuild_bloom_filter(self) -> bool:
+        """
+        Строит фильтр Блума заново по всем коротким ссылкам из базы данных.
+
+        :returns: True, если фильтр был построен, False, если его уже строит другой процесс.
+        :rtype: bool
+        """
+        return await links_bloom_filter.rebuild(db=self.db, redis=self.redis)
+
+    async def get_bloom_stats(self) -> BloomFilterStatsSchema:
+        """
+        Возвращает статистику фильтра Блума коротких ссылок.
+
+        :returns: Параметры фильтра и оценка доли ложных срабатываний.
+        :rtype: BloomFilterStatsSchema
+        """
+        return await links_bloom_filter.get_stats(self.redis)
+
+    async def take_short_code(self) -> str | None:
+        """
+        Возвращает новую короткую ссылку способом, выбранным в настройках.
+
+        При стратегии ``counter`` код получается из зарезервированного блока значений последовательности,
+        при стратегии ``pool`` - забирается из пула заранее сгенерированных кодов.
+
+        :returns: Короткая ссылка или None, если пул пуст или недоступен.
+        :rtype: str | None
         """
-        Получает список ссылок, принадлежащих пользователю.
+        short_links = await self.take_short_codes(count=1)
+
+        return short_links[0] if short_links else None
+
+    async def take_short_codes(self, count: int) -> list[str]:
+        """
+        Возвращает несколько новых коротких ссылок способом, выбранным в настройках.
+
+        :param count: Требуемое количество ссылок.
+        :type count: int
+        :returns: Короткие ссылки; из пула их может вернуться меньше запрошенного.
+        :rtype: list[str]
+        """
+        if settings.links_settings.link_code_strategy == "counter":
+            return await short_code_counter.next_codes(db=self.db, count=count)
+
+        return await short_code_pool.pop_many(self.redis, count)
+
+    async def generate_short_codes(self, count: int) -> list[str]:
+        """
+        Генерирует короткие ссылки для массовой загрузки, не забирая коды из пула.
+
+        :param count: Требуемое количество ссылок.
+        :type count: int
+        :returns: Короткие ссылки.
+        :rtype: list[str]
+        """
+        if settings.links_settings.link_code_strategy == "counter":
+            return await short_code_counter.next_codes(db=self.db, count=count)
+
+        return [generate_short_code(length=settings.link_length) for _ in range(count)]
+
+    async def release_short_codes(self, *short_links: str) -> None:
+        """
+        Возвращает в пул коды, полученные методом :meth:`take_short_codes`, но не понадобившиеся.
+
+        При стратегии ``counter`` значения последовательности не возвращаются.
+
+        :param short_links: Неиспользованные короткие ссылки.
+        :type short_links: str
+        :returns: None
+        """
+        if settings.links_settings.link_code_strategy == "pool":
+            await short_code_pool.push(self.redis, *short_links)
+
+    async def refill_short_code_pool(self) -> int:
+        """
+        Пополняет пул заранее сгенерированных коротких ссылок, если новые ссылки берутся из пула.
+
+        :returns: Количество добавленных в пул кодов.
+        :rtype: int
+        """
+        if settings.links_settings.link_code_strategy != "pool":
+            return 0
+
+        return await short_code_pool.refill(db=self.db, redis=self.redis)
+
+    async def get_links(
+        self,
+        user_id: uuid.UUID,
+        limit: int,
+        after: tuple[datetime.datetime, uuid.UUID] | None = None,
+        primary: bool = False,
+    ) -> list[LinkSchema]:
+        """
+        Получает страницу ссылок пользователя, начиная с самых новых.
+
+        Страницы выбираются по ключу ``(created_at, id)``, поэтому каждая из них читается диапазоном индекса
+        ``ix_link_owner_id_created_at_id`` независимо от глубины. Выбираются только столбцы схемы
+        :class:`LinkSchema`, а полученные строки проверяются одним вызовом :data:`links_adapter` без создания
+        ORM-объектов.
 
         :param user_id: Идентификатор владельца ссылок.
         :type user_id: uuid.UUID
+        :param limit: Максимальное количество ссылок на странице.
+        :type limit: int
+        :param after: Время создания и идентификатор последней ссылки предыдущей страницы.
+        :type after: tuple[datetime.datetime, uuid.UUID] | None
+        :param primary: Читать ли из основной базы вместо реплики.
+        :type primary: bool
         :returns: Список ссылок пользователя.
         :rtype: list[LinkSchema]
         """
-        async with self.db.db_session() as session:
-            query = select(self.link_model).where(self.link_model.owner_id == user_id)
+        session_factory = self.db.db_session if primary else self.db.db_read_session
+        async with session_factory() as session:
+            query = (
+                select(*(getattr(self.link_model, field) for field in LinkSchema.model_fields))
+                .where(self.link_model.owner_id == user_id)
+                .order_by(self.link_model.created_at.desc(), self.link_model.id.desc())
+                .limit(limit)
+            )
+            if after is not None:
+                query = query.where(tuple_(self.link_model.created_at, self.link_model.id) < after)
 
             result = await session.execute(query)
-            links = result.scalars().all()
 
-            return [LinkSchema.model_validate(link, from_attributes=True) for link in links]
+            return links_adapter.validate_python(result.all(), from_attributes=True)
 
-    async def create_link(self, full_link: str, user_id: uuid.UUID, short_link: str) -> LinkSchema:
+    async def stream_links(self, user_id: uuid.UUID) -> AsyncGenerator[Sequence[Row]]:
+        """
+        Выбирает все ссылки пользователя серверным курсором, отдавая их пачками.
+
+        В памяти одновременно находится только одна пачка из ``link_export_batch_size`` строк; ORM-объекты
+        не создаются.
+
+        :param user_id: Идентификатор владельца ссылок.
+        :type user_id: uuid.UUID
+        :returns: Асинхронный генератор пачек строк с полями id, full_link, short_link и created_at.
+        :rtype: AsyncGenerator[Sequence[Row]]
+        """
+        async with self.db.db_read_session() as session:
+            query = (
+                select(
+                    self.link_model.id,
+                    self.link_model.full_link,
+                    self.link_model.short_link,
+                    self.link_model.created_at,
+                )
+                .where(self.link_model.owner_id == user_id)
+                .order_by(self.link_model.created_at.desc(), self.link_model.id.desc())
+                .execution_options(yield_per=settings.links_settings.link_export_batch_size)
+            )
+
+            result = await session.stream(query)
+            async for rows in result.partitions():
+                yield rows
+
+    async def create_link(
+        self,
+        full_link: str,
+        user_id: uuid.UUID,
+        short_link: str,
+        expires_at: datetime.datetime | None = None,
+        max_clicks: int | None = None,
+    ) -> LinkSchema:
         """
         Создает новую ссылку и возвращает сохраненную запись.
 
+        Короткая ссылка добавляется в фильтр Блума, запись о ее отсутствии удаляется из кэша, а версия набора
+        ссылок владельца увеличивается.
+
+        В режиме без дублей вставка и поиск существующей ссылки владельца с тем же адресом выполняются одним
+        запросом: ``INSERT ... ON CONFLICT DO NOTHING RETURNING`` по уникальному индексу на владельца и хеш
+        адреса, объединённый с выборкой существующей записи на случай конфликта. Ссылки со сроком действия
+        или ограничением переходов в этом режиме не участвуют и всегда создаются заново.
+
         :param full_link: Полный адрес, который требуется сократить.
         :type full_link: str
         :param user_id: Идентификатор владельца ссылки.
         :type user_id: uuid.UUID
         :param short_link: Сгенерированное короткое представление ссылки.
         :type short_link: str
-        :returns: Созданная ссылка с заполненными полями.
+        :param expires_at: Время, после которого ссылка перестаёт открываться.
+        :type expires_at: datetime.datetime | None
+        :param max_clicks: Количество переходов, после которого ссылка перестаёт открываться.
+        :type max_clicks: int | None
+        :returns: Созданная ссылка с заполненными полями либо существующая ссылка с тем же адресом;
+            во втором случае ее короткое представление отличается от переданного.
         :rtype: LinkSchema
         """
+        if not settings.links_settings.link_deduplicate or expires_at is not None or max_clicks is not None:
+            async with self.db.db_session() as session:
+                query = (
+                    insert(self.link_model)
+                    .values(
+                        full_link=full_link,
+                        short_link=short_link,
+                        owner_id=user_id,
+                        expires_at=expires_at,
+                        max_clicks=max_clicks,
+                    )
+                    .returning(self.link_model)
+                )
+
+                result = await session.execute(query)
+                await session.commit()
+                link = result.scalar()
+
+            await self.register_short_links(short_link)
+            await self.bump_links_version(user_id)
+
+            return LinkSchema.model_validate(link, from_attributes=True)
+
+        full_link_hash = self._hash_full_link(full_link=full_link)
+        inserted = (
+            postgresql_insert(self.link_model)
+            .values(full_link=full_link, short_link=short_link, owner_id=user_id, full_link_hash=full_link_hash)
+            .on_conflict_do_nothing(index_elements=[self.link_model.owner_id, self.link_model.full_link_hash])
+            .returning(*self.link_model.__table__.c)
+            .cte("inserted")
+        )
+        existing = select(*self.link_model.__table__.c).where(
+            self.link_model.owner_id == user_id,
+            self.link_model.full_link_hash == full_link_hash,
+            ~exists(select(inserted.c.id)),
+        )
+        query = select(inserted).union_all(existing)
+
+        async with self.db.db_session() as session:
+            link = (await session.execute(query)).first()
+            if link is None:
+                query = select(self.link_model).where(
+                    self.link_model.owner_id == user_id, self.link_model.full_link_hash == full_link_hash
+                )
+                link = await session.scalar(query)
+            await session.commit()
+
+        if link.short_link == short_link:
+            await self.register_short_links(short_link)
+            await self.bump_links_version(user_id)
+
+        return LinkSchema.model_validate(link, from_attributes=True)
+
+    async def create_links(
+        self, links: list[tuple[str, str, datetime.datetime | None, int | None]], user_id: uuid.UUID
+    ) -> list[LinkSchema]:
+        """
+        Создает несколько ссылок многострочными командами INSERT в одной транзакции.
+
+        Строки вставляются пачками по ``link_bulk_chunk_size``. Ссылки, короткий адрес которых уже занят,
+        пропускаются и не попадают в результат.
+
+        В режиме без дублей вместо ссылок, полный адрес которых у владельца уже есть, возвращаются существующие
+        ссылки; они загружаются одним запросом после вставки. Ссылки со сроком действия или ограничением переходов
+        в этом режиме всегда создаются заново, а полные адреса остальных ссылок должны быть уникальны.
+
+        :param links: Полный адрес, сгенерированное короткое представление, время истечения и максимальное
+            количество переходов каждой ссылки.
+        :type links: list[tuple[str, str, datetime.datetime | None, int | None]]
+        :param user_id: Идентификатор владельца ссылок.
+        :type user_id: uuid.UUID
+        :returns: Созданные ссылки в произвольном порядке.
+        :rtype: list[LinkSchema]
+        """
+        chunk_size = settings.links_settings.link_bulk_chunk_size
+        deduplicate = settings.links_settings.link_deduplicate
+        created_links = []
+        existing_links = []
+
+        async with self.db.db_session() as session:
+            for offset in range(0, len(links), chunk_size):
+                query = postgresql_insert(self.link_model).values(
+                    [
+                        {
+                            "full_link": full_link,
+                            "short_link": short_link,
+                            "owner_id": user_id,
+                            "full_link_hash": (
+                                self._hash_full_link(full_link=full_link)
+                                if deduplicate and expires_at is None and max_clicks is None
+                                else None
+                            ),
+                            "expires_at": expires_at,
+                            "max_clicks": max_clicks,
+                        }
+                        for full_link, short_link, expires_at, max_clicks in links[offset : offset + chunk_size]
+                    ]
+                )
+                if deduplicate:
+                    query = query.on_conflict_do_nothing()
+                else:
+                    query = query.on_conflict_do_nothing(index_elements=[self.link_model.short_link])
+
+                result = await session.execute(query.returning(self.link_model))
+                created_links.extend(result.scalars().all())
+
+            if deduplicate and len(created_links) < len(links):
+                created_full_links = {link.full_link for link in created_links if link.full_link_hash is not None}
+                query = select(self.link_model).where(
+                    self.link_model.owner_id == user_id,
+                    self.link_model.full_link_hash == any_(bindparam("full_link_hashes", type_=ARRAY(LargeBinary))),
+                )
+                full_link_hashes = [
+                    self._hash_full_link(full_link=full_link)
+                    for full_link, _, expires_at, max_clicks in links
+                    if full_link not in created_full_links and expires_at is None and max_clicks is None
+                ]
+                result = await session.scalars(query, {"full_link_hashes": full_link_hashes})
+                existing_links.extend(result.all())
+
+            await session.commit()
+
+        await self.register_short_links(*(link.short_link for link in created_links))
+        if created_links:
+            await self.bump_links_version(user_id)
+
+        return [LinkSchema.model_validate(link, from_attributes=True) for link in created_links + existing_links]
+
+    async def delete_links(self, link_ids: list[uuid.UUID], user_id: uuid.UUID) -> list[uuid.UUID]:
+        """
+        Удаляет ссылки пользователя одной командой, проверяя владельца в том же запросе.
+
+        Удалённые ссылки убираются из фильтра Блума, их записи сбрасываются в кэше, а версия набора ссылок
+        пользователя увеличивается.
+
+        :param link_ids: Идентификаторы ссылок, которые требуется удалить.
+        :type link_ids: list[uuid.UUID]
+        :param user_id: Идентификатор пользователя, запрашивающего удаление.
+        :type user_id: uuid.UUID
+        :returns: Идентификаторы удалённых ссылок.
+        :rtype: list[uuid.UUID]
+        """
         async with self.db.db_session() as session:
             query = (
-                insert(self.link_model)
-                .values(full_link=full_link, short_link=short_link, owner_id=user_id)
-                .returning(self.link_model)
+                delete(self.link_model)
+                .where(
+                    self.link_model.id == any_(self._bind_link_ids(link_ids=link_ids)),
+                    self.link_model.owner_id == user_id,
+                )
+                .returning(self.link_model.id, self.link_model.short_link)
             )
 
             result = await session.execute(query)
             await session.commit()
-            link = result.scalar()
+            deleted_links = result.all()
 
-            return LinkSchema.model_validate(link, from_attributes=True)
+        await self.unregister_short_links(*(short_link for _, short_link in deleted_links))
+        if deleted_links:
+            await self.bump_links_version(user_id)
 
-    async def get_link_owner(self, link_id: uuid.UUID) -> uuid.UUID | None:
+        return [link_id for link_id, _ in deleted_links]
+
+    async def purge_expired_links(self) -> int:
         """
-        Возвращает идентификатор владельца ссылки.
+        Удаляет истёкшие ссылки небольшими пачками, каждую в отдельной транзакции.
+
+        Пачка выбирается по частичному индексу ``ix_link_expires_at`` с ``FOR UPDATE SKIP LOCKED``, поэтому
+        удаление не ждёт строк, заблокированных другими транзакциями, и само держит блокировки недолго. Между
+        пачками выдерживается пауза, чтобы мёртвые строки появлялись равномерно и разбирались автоочисткой
+        постепенно. За один запуск удаляется не больше ``link_expired_purge_max_batches`` пачек, остальное -
+        при следующих запусках.
 
-        :param link_id: Идентификатор ссылки.
-        :type link_id: uuid.UUID
-        :returns: Идентификатор владельца или None, если ссылка не найдена.
-        :rtype: uuid.UUID | None
+        :returns: Количество удалённых ссылок.
+        :rtype: int
         """
-        async with self.db.db_session() as session:
-            query = select(self.link_model.owner_id).where(self.link_model.id == link_id)
+        links_settings = settings.links_settings
+        expired_links = (
+            select(self.link_model.id)
+            .where(self.link_model.expires_at <= func.now())
+            .order_by(self.link_model.expires_at)
+            .limit(links_settings.link_expired_purge_batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        query = (
+            delete(self.link_model)
+            .where(self.link_model.id.in_(expired_links))
+            .returning(self.link_model.short_link, self.link_model.owner_id)
+        )
+        purged = 0
 
-            result = await session.execute(query)
-            return result.scalar_one_or_none()
+        for batch in range(links_settings.link_expired_purge_max_batches):
+            if batch:
+                await asyncio.sleep(links_settings.link_expired_purge_pause)
+
+            async with self.db.db_session() as session:
+                result = await session.execute(query)
+                await session.commit()
+                purged_links = result.all()
+
+            await self.unregister_short_links(*(short_link for short_link, _ in purged_links))
+            await self.bump_links_version(*(owner_id for _, owner_id in purged_links))
+            purged += len(purged_links)
+
+            if len(purged_links) < links_settings.link_expired_purge_batch_size:
+                break
 
-    async def delete_link(self, link_id: uuid.UUID) -> None:
+        return purged
+
+    async def get_existing_link_ids(self, link_ids: list[uuid.UUID]) -> list[uuid.UUID]:
         """
-        Удаляет ссылку по ее идентификатору.
+        Возвращает идентификаторы ссылок, которые есть в базе данных.
 
-        :param link_id: Идентификатор ссылки, которую требуется удалить.
-        :type link_id: uuid.UUID
-        :returns: None
+        :param link_ids: Проверяемые идентификаторы ссылок.
+        :type link_ids: list[uuid.UUID]
+        :returns: Идентификаторы существующих ссылок.
+        :rtype: list[uuid.UUID]
         """
         async with self.db.db_session() as session:
-            query = delete(self.link_model).where(self.link_model.id == link_id)
+            query = select(self.link_model.id).where(self.link_model.id == any_(self._bind_link_ids(link_ids=link_ids)))
 
-            await session.execute(query)
-            await session.commit()
+            result = await session.scalars(query)
+            return list(result.all())
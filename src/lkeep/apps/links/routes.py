@@ -6,54 +6,188 @@
 https://pressanybutton.ru/category/servis-na-fastapi/
 """
 
-from typing import Annotated
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    UploadFile,
+)
 from starlette import status
+from starlette.responses import RedirectResponse, Response, StreamingResponse
 
-from lkeep.apps.auth.depends import get_current_user
+from lkeep.apps.auth.depends import get_current_superuser, get_current_user
 from lkeep.apps.auth.schemas import UserVerifySchema
+from lkeep.apps.links.local_cache import local_links_cache
+from lkeep.apps.links.managers import LinksManager
 from lkeep.apps.links.schemas import (
+    BloomFilterStatsSchema,
     CreateLinkSchema,
     DeleteLinkSchema,
+    DeleteLinksResultSchema,
+    DeleteLinksSchema,
     GetLinkSchema,
+    ImportLinksStatusSchema,
+    ImportLinksTaskSchema,
     LinkSchema,
+    LinksPageSchema,
+    LocalCacheStatsSchema,
 )
 from lkeep.apps.links.services import LinksService
+from lkeep.apps.stats.click_counter import click_counter
+from lkeep.apps.stats.depends import get_visitor
+from lkeep.core.core_dependency.db_dependency import db_dependency
+from lkeep.core.core_dependency.redis_dependency import redis_dependency
+from lkeep.core.responses import PydanticJSONResponse
+from lkeep.core.settings import settings
 
 links_router = APIRouter(prefix="/links", tags=["links"])
+redirect_router = APIRouter(tags=["redirect"])
+
+links_resolver = LinksService(
+    manager=LinksManager(db=db_dependency, redis=redis_dependency),
+    local_cache=local_links_cache,
+    click_counter=click_counter,
+)
 
 
 @links_router.get("/get_link", response_model=GetLinkSchema | None, status_code=status.HTTP_200_OK)
-async def get_link(short_link: str, service: LinksService = Depends(LinksService)) -> GetLinkSchema | None:
+async def get_link(
+    short_link: str,
+    visitor: Annotated[str, Depends(get_visitor)],
+    service: LinksService = Depends(LinksService),
+) -> PydanticJSONResponse:
     """
     Возвращает полную ссылку по сокращенному идентификатору.
 
     :param short_link: Короткий идентификатор ссылки.
     :type short_link: str
+    :param visitor: Адрес и User-Agent посетителя.
+    :type visitor: str
     :param service: Сервис ссылок, содержащий бизнес-логику.
     :type service: LinksService
-    :returns: Полная ссылка либо None, если запись не найдена.
-    :rtype: GetLinkSchema | None
+    :returns: Полная ссылка либо None, если запись не найдена, с заголовком Cache-Control.
+    :rtype: PydanticJSONResponse
     """
-    return await service.get_link(short_link=short_link)
+    link, max_age = await service.get_link(short_link=short_link, visitor=visitor)
+
+    return PydanticJSONResponse(content=link, headers={"Cache-Control": service.get_cache_control(max_age=max_age)})
 
 
-@links_router.get("/get_user_links", response_model=list[LinkSchema], status_code=status.HTTP_200_OK)
+@links_router.get("/get_user_links", response_model=LinksPageSchema, status_code=status.HTTP_200_OK)
 async def get_user_links(
-    user: Annotated[UserVerifySchema, Depends(get_current_user)], service: LinksService = Depends(LinksService)
-) -> list[LinkSchema]:
+    user: Annotated[UserVerifySchema, Depends(get_current_user)],
+    limit: Annotated[int, Query(ge=1, le=settings.links_settings.link_page_max_size)] = (
+        settings.links_settings.link_page_size
+    ),
+    cursor: str | None = None,
+    if_none_match: Annotated[str | None, Header()] = None,
+    service: LinksService = Depends(LinksService),
+) -> Response:
     """
-    Возвращает список ссылок текущего пользователя.
+    Возвращает страницу ссылок текущего пользователя, начиная с самых новых.
+
+    Ответ помечается ETag, зависящим от версии набора ссылок пользователя. Если клиент прислал тот же тег
+    в заголовке If-None-Match, возвращается ответ 304 без запроса к базе данных.
 
     :param user: Авторизованный пользователь, для которого запрашиваются ссылки.
     :type user: UserVerifySchema
+    :param limit: Максимальное количество ссылок на странице.
+    :type limit: int
+    :param cursor: Курсор из ответа с предыдущей страницей.
+    :type cursor: str | None
+    :param if_none_match: ETag страницы, сохранённой клиентом.
+    :type if_none_match: str | None
     :param service: Сервис ссылок, выполняющий выборку данных.
     :type service: LinksService
-    :returns: Коллекция ссылок пользователя.
-    :rtype: list[LinkSchema]
+    :returns: Ссылки страницы и курсор следующей страницы либо пустой ответ 304, если страница не изменилась.
+    :rtype: Response
+    """
+    etag = await service.get_links_etag(user=user, limit=limit, cursor=cursor)
+    headers = {"Cache-Control": "private, no-cache"}
+
+    if etag is not None:
+        headers["ETag"] = etag
+        if service.match_etag(etag=etag, if_none_match=if_none_match):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    links = await service.get_links(user=user, limit=limit, cursor=cursor, primary=etag is not None)
+
+    return PydanticJSONResponse(content=links, headers=headers)
+
+
+@links_router.get("/export_links", response_class=StreamingResponse, status_code=status.HTTP_200_OK)
+async def export_links(
+    user: Annotated[UserVerifySchema, Depends(get_current_user)],
+    export_format: Annotated[Literal["ndjson", "csv"], Query(alias="format")] = "ndjson",
+    service: LinksService = Depends(LinksService),
+) -> StreamingResponse:
+    """
+    Выгружает все ссылки текущего пользователя потоком в формате NDJSON или CSV.
+
+    :param user: Авторизованный пользователь, ссылки которого выгружаются.
+    :type user: UserVerifySchema
+    :param export_format: Формат выгрузки.
+    :type export_format: str
+    :param service: Сервис ссылок, формирующий выгрузку.
+    :type service: LinksService
+    :returns: Потоковый ответ с файлом выгрузки.
+    :rtype: StreamingResponse
+    """
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+
+    return StreamingResponse(
+        content=service.export_links(user=user, export_format=export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="links.{export_format}"'},
+    )
+
+
+@links_router.post("/import_links", response_model=ImportLinksTaskSchema, status_code=status.HTTP_202_ACCEPTED)
+async def import_links(
+    file: UploadFile,
+    user: Annotated[UserVerifySchema, Depends(get_current_user)],
+    service: LinksService = Depends(LinksService),
+) -> ImportLinksTaskSchema:
+    """
+    Запускает фоновый импорт ссылок из CSV-файла, в первом столбце которого указаны полные ссылки.
+
+    :param file: Загруженный CSV-файл.
+    :type file: UploadFile
+    :param user: Пользователь, которому будут принадлежать ссылки.
+    :type user: UserVerifySchema
+    :param service: Сервис ссылок, ставящий задачу импорта в очередь.
+    :type service: LinksService
+    :returns: Идентификатор задачи импорта.
+    :rtype: ImportLinksTaskSchema
     """
-    return await service.get_links(user=user)
+    return await service.import_links(file=file, user=user)
+
+
+@links_router.get("/import_status/{task_id}", response_model=ImportLinksStatusSchema, status_code=status.HTTP_200_OK)
+async def get_import_status(
+    task_id: str,
+    user: Annotated[UserVerifySchema, Depends(get_current_user)],
+    service: LinksService = Depends(LinksService),
+) -> ImportLinksStatusSchema:
+    """
+    Возвращает состояние задачи импорта ссылок, ход импорта и ошибки по строкам.
+
+    :param task_id: Идентификатор задачи импорта.
+    :type task_id: str
+    :param user: Пользователь, запустивший импорт.
+    :type user: UserVerifySchema
+    :param service: Сервис ссылок, получающий состояние задачи.
+    :type service: LinksService
+    :returns: Состояние задачи импорта.
+    :rtype: ImportLinksStatusSchema
+    """
+    return await service.get_import_status(task_id=task_id, user=user)
 
 
 @links_router.post("/create_link", response_model=LinkSchema, status_code=status.HTTP_201_CREATED)
@@ -61,7 +195,7 @@ async def create_link(
     link_data: CreateLinkSchema,
     user: Annotated[UserVerifySchema, Depends(get_current_user)],
     service: LinksService = Depends(LinksService),
-) -> LinkSchema:
+) -> PydanticJSONResponse:
     """
     Создает новую сокращенную ссылку для пользователя.
 
@@ -72,9 +206,36 @@ async def create_link(
     :param service: Сервис ссылок, отвечающий за генерацию и сохранение записи.
     :type service: LinksService
     :returns: Созданная ссылка с коротким идентификатором.
-    :rtype: LinkSchema
+    :rtype: PydanticJSONResponse
+    """
+    return PydanticJSONResponse(
+        content=await service.create_link(link_data=link_data, user=user), status_code=status.HTTP_201_CREATED
+    )
+
+
+@links_router.post("/create_links", response_model=list[LinkSchema], status_code=status.HTTP_201_CREATED)
+async def create_links(
+    links_data: Annotated[
+        list[CreateLinkSchema], Body(min_length=1, max_length=settings.links_settings.link_bulk_max_size)
+    ],
+    user: Annotated[UserVerifySchema, Depends(get_current_user)],
+    service: LinksService = Depends(LinksService),
+) -> PydanticJSONResponse:
+    """
+    Создает несколько сокращенных ссылок для пользователя за один запрос.
+
+    :param links_data: Список данных с полными адресами ссылок.
+    :type links_data: list[CreateLinkSchema]
+    :param user: Пользователь, для которого создаются ссылки.
+    :type user: UserVerifySchema
+    :param service: Сервис ссылок, отвечающий за генерацию и сохранение записей.
+    :type service: LinksService
+    :returns: Созданные ссылки в порядке запроса.
+    :rtype: PydanticJSONResponse
     """
-    return await service.create_link(link_data=link_data, user=user)
+    return PydanticJSONResponse(
+        content=await service.create_links(links_data=links_data, user=user), status_code=status.HTTP_201_CREATED
+    )
 
 
 @links_router.delete("/delete_link", status_code=status.HTTP_204_NO_CONTENT)
@@ -95,3 +256,92 @@ async def delete_link(
     :returns: None
     """
     await service.delete_link(link_data=link_data, user=user)
+
+
+@links_router.delete("/delete_links", response_model=DeleteLinksResultSchema, status_code=status.HTTP_200_OK)
+async def delete_links(
+    links_data: DeleteLinksSchema,
+    user: Annotated[UserVerifySchema, Depends(get_current_user)],
+    service: LinksService = Depends(LinksService),
+) -> PydanticJSONResponse:
+    """
+    Удаляет несколько ссылок текущего пользователя за один запрос.
+
+    :param links_data: Данные с идентификаторами ссылок для удаления.
+    :type links_data: DeleteLinksSchema
+    :param user: Авторизованный пользователь, запрашивающий удаление.
+    :type user: UserVerifySchema
+    :param service: Сервис ссылок, выполняющий удаление.
+    :type service: LinksService
+    :returns: Идентификаторы удалённых, чужих и несуществующих ссылок.
+    :rtype: PydanticJSONResponse
+    """
+    return PydanticJSONResponse(content=await service.delete_links(links_data=links_data, user=user))
+
+
+@links_router.get("/cache_stats", response_model=LocalCacheStatsSchema, status_code=status.HTTP_200_OK)
+async def get_cache_stats(
+    user: Annotated[UserVerifySchema, Depends(get_current_superuser)], service: LinksService = Depends(LinksService)
+) -> LocalCacheStatsSchema:
+    """
+    Возвращает статистику кэша ссылок в памяти обработавшего запрос процесса.
+
+    Доступна только суперпользователям.
+
+    :param user: Суперпользователь, запрашивающий статистику.
+    :type user: UserVerifySchema
+    :param service: Сервис ссылок, предоставляющий доступ к кэшу.
+    :type service: LinksService
+    :returns: Счётчики попаданий, промахов и вытеснений.
+    :rtype: LocalCacheStatsSchema
+    """
+    return await service.get_cache_stats()
+
+
+@links_router.get("/bloom_stats", response_model=BloomFilterStatsSchema, status_code=status.HTTP_200_OK)
+async def get_bloom_stats(
+    user: Annotated[UserVerifySchema, Depends(get_current_superuser)], service: LinksService = Depends(LinksService)
+) -> BloomFilterStatsSchema:
+    """
+    Возвращает параметры фильтра Блума коротких ссылок и оценку доли его ложных срабатываний.
+
+    Доступна только суперпользователям.
+
+    :param user: Суперпользователь, запрашивающий статистику.
+    :type user: UserVerifySchema
+    :param service: Сервис ссылок, предоставляющий доступ к фильтру.
+    :type service: LinksService
+    :returns: Статистика фильтра.
+    :rtype: BloomFilterStatsSchema
+    """
+    return await service.get_bloom_stats()
+
+
+@redirect_router.get("/{short_link}", response_model=None, status_code=status.HTTP_302_FOUND)
+async def redirect_link(short_link: str, request: Request) -> RedirectResponse:
+    """
+    Перенаправляет на полную ссылку по сокращенному идентификатору.
+
+    Использует заранее созданный сервис вместо построения цепочки зависимостей на каждый запрос
+    и возвращает ответ без валидации схемы.
+
+    :param short_link: Короткий идентификатор ссылки.
+    :type short_link: str
+    :param request: Текущий запрос, из которого берутся данные посетителя.
+    :type request: Request
+    :returns: Ответ с перенаправлением на полную ссылку и заголовком Cache-Control.
+    :rtype: RedirectResponse
+    :raises HTTPException: Если ссылка не найдена.
+    """
+    full_link, max_age = await links_resolver.resolve_link(short_link=short_link, visitor=get_visitor(request=request))
+
+    if full_link is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Link not found", headers={"Cache-Control": "no-cache"}
+        )
+
+    return RedirectResponse(
+        url=full_link,
+        status_code=settings.links_settings.link_redirect_status_code,
+        headers={"Cache-Control": links_resolver.get_cache_control(max_age=max_age)},
+    )
@@ -7,9 +7,11 @@ https://pressanybutton.ru/category/servis-na-fastapi/
 """
 
 import uuid
-from datetime import datetime
+from datetime import UTC, datetime
 
-from pydantic import BaseModel
+from pydantic import AwareDatetime, BaseModel, Field, TypeAdapter, field_validator
+
+from lkeep.core.settings import settings
 
 
 class BaseFullLink(BaseModel):
@@ -31,10 +33,34 @@ class DeleteLinkSchema(BaseModel):
 class LinkSchema(BaseFullLink, DeleteLinkSchema):
     """
     Полная схема ссылки с коротким адресом и метаданными.
+
+    :ivar expires_at: Время, после которого ссылка перестаёт открываться.
+    :type expires_at: datetime | None
+    :ivar max_clicks: Количество переходов, после которого ссылка перестаёт открываться.
+    :type max_clicks: int | None
     """
 
     short_link: str
     created_at: datetime
+    expires_at: datetime | None = None
+    max_clicks: int | None = None
+
+
+links_adapter = TypeAdapter(list[LinkSchema])
+
+
+class LinksPageSchema(BaseModel):
+    """
+    Схема страницы списка ссылок пользователя.
+
+    :ivar items: Ссылки страницы, начиная с самых новых.
+    :type items: list[LinkSchema]
+    :ivar next_cursor: Курсор следующей страницы или None, если страница последняя.
+    :type next_cursor: str | None
+    """
+
+    items: list[LinkSchema]
+    next_cursor: str | None
 
 
 class GetLinkSchema(BaseFullLink):
@@ -42,4 +68,197 @@ class GetLinkSchema(BaseFullLink):
 
 
 class CreateLinkSchema(BaseFullLink):
-    """Схема запроса на создание новой ссылки."""
+    """
+    Схема запроса на создание новой ссылки.
+
+    :ivar expires_at: Время с часовым поясом в будущем, после которого ссылка перестаёт открываться и удаляется.
+    :type expires_at: AwareDatetime | None
+    :ivar max_clicks: Количество переходов, после которого ссылка перестаёт открываться. Ограничение
+        проверяется при каждом переходе; задаётся только при включённом подсчёте переходов.
+    :type max_clicks: int | None
+    """
+
+    expires_at: AwareDatetime | None = None
+    max_clicks: int | None = Field(default=None, ge=1)
+
+    @field_validator("expires_at")
+    @classmethod
+    def check_expires_at(cls, value: datetime | None) -> datetime | None:
+        """
+        Проверяет, что время истечения ссылки ещё не наступило.
+
+        :param value: Время истечения ссылки.
+        :type value: datetime | None
+        :raises ValueError: Если время истечения уже прошло.
+        :returns: Время истечения ссылки.
+        :rtype: datetime | None
+        """
+        if value is not None and value <= datetime.now(UTC):
+            raise ValueError("expires_at must be in the future")
+
+        return value
+
+    @field_validator("max_clicks")
+    @classmethod
+    def check_max_clicks(cls, value: int | None) -> int | None:
+        """
+        Проверяет, что ограничение переходов можно соблюсти.
+
+        Исчерпанная ссылка помечается истёкшей при переносе счётчиков в базу данных, поэтому без подсчёта
+        переходов она никогда не была бы удалена.
+
+        :param value: Количество переходов, после которого ссылка перестаёт открываться.
+        :type value: int | None
+        :raises ValueError: Если подсчёт переходов выключен.
+        :returns: Количество переходов.
+        :rtype: int | None
+        """
+        if value is not None and not settings.stats_settings.stats_click_counting:
+            raise ValueError("max_clicks requires click counting to be enabled")
+
+        return value
+
+
+class DeleteLinksSchema(BaseModel):
+    """
+    Схема запроса на удаление нескольких ссылок.
+
+    :ivar ids: Идентификаторы удаляемых ссылок.
+    :type ids: list[uuid.UUID]
+    """
+
+    ids: list[uuid.UUID] = Field(min_length=1, max_length=settings.links_settings.link_bulk_max_size)
+
+
+class DeleteLinksResultSchema(BaseModel):
+    """
+    Схема результата удаления нескольких ссылок.
+
+    :ivar deleted: Идентификаторы удалённых ссылок.
+    :type deleted: list[uuid.UUID]
+    :ivar not_owned: Идентификаторы ссылок, принадлежащих другим пользователям.
+    :type not_owned: list[uuid.UUID]
+    :ivar not_found: Идентификаторы несуществующих ссылок.
+    :type not_found: list[uuid.UUID]
+    """
+
+    deleted: list[uuid.UUID]
+    not_owned: list[uuid.UUID]
+    not_found: list[uuid.UUID]
+
+
+class ImportLinkErrorSchema(BaseModel):
+    """
+    Схема ошибки импорта отдельной строки файла.
+
+    :ivar row: Номер строки файла, начиная с единицы.
+    :type row: int
+    :ivar error: Описание ошибки.
+    :type error: str
+    """
+
+    row: int
+    error: str
+
+
+class ImportLinksResultSchema(BaseModel):
+    """
+    Схема хода и результата импорта ссылок.
+
+    :ivar processed: Количество обработанных строк файла.
+    :type processed: int
+    :ivar imported: Количество созданных ссылок.
+    :type imported: int
+    :ivar failed: Количество строк, которые не удалось импортировать.
+    :type failed: int
+    :ivar errors: Ошибки по строкам; сохраняются только первые ``link_import_max_errors``.
+    :type errors: list[ImportLinkErrorSchema]
+    """
+
+    processed: int = 0
+    imported: int = 0
+    failed: int = 0
+    errors: list[ImportLinkErrorSchema] = []
+
+
+class ImportLinksTaskSchema(BaseModel):
+    """
+    Схема ответа на запуск импорта ссылок.
+
+    :ivar task_id: Идентификатор задачи импорта.
+    :type task_id: str
+    """
+
+    task_id: str
+
+
+class ImportLinksStatusSchema(ImportLinksTaskSchema):
+    """
+    Схема состояния задачи импорта ссылок.
+
+    :ivar state: Состояние задачи Celery: PENDING, PROGRESS, SUCCESS или FAILURE.
+    :type state: str
+    :ivar progress: Ход импорта или его итог, если задача уже выполняется или завершена.
+    :type progress: ImportLinksResultSchema | None
+    """
+
+    state: str
+    progress: ImportLinksResultSchema | None = None
+
+
+class LocalCacheStatsSchema(BaseModel):
+    """
+    Схема статистики кэша ссылок в памяти процесса.
+
+    :ivar size: Текущее количество записей в кэше.
+    :type size: int
+    :ivar max_size: Максимальное количество записей в кэше.
+    :type max_size: int
+    :ivar hits: Количество попаданий в кэш.
+    :type hits: int
+    :ivar misses: Количество промахов, включая обращения к устаревшим записям.
+    :type misses: int
+    :ivar evictions: Количество записей, вытесненных из-за превышения размера.
+    :type evictions: int
+    :ivar expirations: Количество записей, удалённых по истечении времени жизни.
+    :type expirations: int
+    :ivar invalidations: Количество записей, сброшенных после изменения или удаления ссылки.
+    :type invalidations: int
+    """
+
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    invalidations: int
+
+
+class BloomFilterStatsSchema(BaseModel):
+    """
+    Схема статистики фильтра Блума коротких ссылок.
+
+    :ivar is_built: Флаг наличия построенного фильтра в Redis.
+    :type is_built: bool
+    :ivar capacity: Ожидаемое количество ссылок, на которое рассчитан фильтр.
+    :type capacity: int
+    :ivar size: Количество счётчиков фильтра.
+    :type size: int
+    :ivar hash_count: Количество хеш-функций.
+    :type hash_count: int
+    :ivar items: Текущее количество ссылок в фильтре.
+    :type items: int
+    :ivar target_false_positive_rate: Доля ложных срабатываний при заполнении до ёмкости.
+    :type target_false_positive_rate: float
+    :ivar estimated_false_positive_rate: Оценка доли ложных срабатываний при текущем заполнении.
+    :type estimated_false_positive_rate: float
+    """
+
+    is_built: bool
+    capacity: int
+    size: int
+    hash_count: int
+    items: int
+    target_false_positive_rate: float
+    estimated_false_positive_rate: float
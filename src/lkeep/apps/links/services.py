@@ -6,64 +6,382 @@
 https://pressanybutton.ru/category/servis-na-fastapi/
 """
 
-import secrets
+import base64
+import csv
+import datetime
+import hashlib
+import io
+import json
+import os
+import shutil
+import uuid
+from collections.abc import AsyncGenerator
 
-from fastapi import Depends, HTTPException
+from celery.result import AsyncResult
+from fastapi import Depends, HTTPException, UploadFile
 from sqlalchemy.exc import IntegrityError
 from starlette import status
+from starlette.concurrency import run_in_threadpool
 
 from lkeep.apps.auth.schemas import UserVerifySchema
+from lkeep.apps.links.code_pool import generate_short_code
+from lkeep.apps.links.local_cache import LocalLinksCache, get_local_links_cache
 from lkeep.apps.links.managers import LinksManager
 from lkeep.apps.links.schemas import (
+    BloomFilterStatsSchema,
     CreateLinkSchema,
     DeleteLinkSchema,
+    DeleteLinksResultSchema,
+    DeleteLinksSchema,
     GetLinkSchema,
+    ImportLinksResultSchema,
+    ImportLinksStatusSchema,
+    ImportLinksTaskSchema,
     LinkSchema,
+    LinksPageSchema,
+    LocalCacheStatsSchema,
 )
+from lkeep.apps.links.tasks import import_links
+from lkeep.apps.stats.click_counter import ClickCounter, get_click_counter
+from lkeep.core.celery_config import celery_app
 from lkeep.core.settings import settings
 
 
 class LinksService:
     """
     Сервисный слой для работы с пользовательскими ссылками.
+
+    :ivar export_fields: Поля ссылок в выгрузке в порядке следования.
+    :type export_fields: tuple[str, ...]
     """
 
-    def __init__(self, manager: LinksManager = Depends(LinksManager)) -> None:
+    export_fields = ("id", "full_link", "short_link", "created_at")
+
+    def __init__(
+        self,
+        manager: LinksManager = Depends(LinksManager),
+        local_cache: LocalLinksCache = Depends(get_local_links_cache),
+        click_counter: ClickCounter = Depends(get_click_counter),
+    ) -> None:
         """
         Создает сервис со связанным менеджером ссылок.
 
         :param manager: Менеджер, выполняющий операции с базой данных.
         :type manager: LinksManager
+        :param local_cache: Кэш ссылок в памяти процесса, проверяемый до обращения к менеджеру.
+        :type local_cache: LocalLinksCache
+        :param click_counter: Буфер, в котором учитываются переходы по найденным ссылкам.
+        :type click_counter: ClickCounter
         """
         self.manager = manager
+        self.local_cache = local_cache
+        self.click_counter = click_counter
 
-    async def get_link(self, short_link: str) -> GetLinkSchema | None:
+    async def get_link(self, short_link: str, visitor: str | None = None) -> tuple[GetLinkSchema | None, int]:
         """
         Получает полную ссылку по ее короткому представлению.
 
         :param short_link: Сокращенный идентификатор ссылки.
         :type short_link: str
-        :returns: Полная ссылка или None, если запись отсутствует.
-        :rtype: GetLinkSchema | None
+        :param visitor: Адрес и User-Agent посетителя для оценки уникальных посетителей.
+        :type visitor: str | None
+        :returns: Полная ссылка или None, если запись отсутствует, и время в секундах, в течение которого ответ
+            можно кэшировать на стороне клиента.
+        :rtype: tuple[GetLinkSchema | None, int]
+        """
+        full_link, max_age = await self.resolve_link(short_link=short_link, visitor=visitor)
+
+        if full_link:
+            return GetLinkSchema(full_link=full_link), max_age
+
+        return None, max_age
+
+    async def resolve_link(self, short_link: str, visitor: str | None = None) -> tuple[str | None, int]:
+        """
+        Возвращает полную ссылку, сначала проверяя кэш процесса, а при промахе обращаясь к менеджеру.
+
+        Переход по найденной ссылке учитывается в буфере процесса без дополнительных обращений к Redis.
+        Время кэширования ответа клиентом ограничено ``link_http_cache_max_age`` и оставшимся временем жизни
+        записи в кэше, поэтому клиент не хранит ссылку дольше, чем она действительна. Каждый переход по ссылке
+        с ограничением переходов сверяется с ограничением в Redis, а ответы с такими ссылками клиентом
+        не кэшируются.
+
+        :param short_link: Сокращенный идентификатор ссылки.
+        :type short_link: str
+        :param visitor: Адрес и User-Agent посетителя для оценки уникальных посетителей.
+        :type visitor: str | None
+        :returns: Полная ссылка или None, если запись отсутствует или истекла, и время в секундах, в течение
+            которого ответ можно кэшировать на стороне клиента (0 - нельзя).
+        :rtype: tuple[str | None, int]
+        """
+        cached = self.local_cache.get(short_link)
+        if cached is None:
+            full_link, ttl, max_clicks = await self.manager.get_full_link(short_link=short_link)
+            self.local_cache.set(short_link, full_link, ttl=ttl, max_clicks=max_clicks)
+        else:
+            full_link, ttl, max_clicks = cached
+
+        if not full_link:
+            return None, 0
+
+        if max_clicks is not None and not await self.manager.count_limited_click(
+            short_link=short_link, max_clicks=max_clicks
+        ):
+            return None, 0
+
+        self.click_counter.record(short_link=short_link, visitor=visitor)
+
+        if max_clicks is not None:
+            return full_link, 0
+
+        max_age = settings.links_settings.link_http_cache_max_age
+        if ttl is not None:
+            max_age = min(max_age, int(ttl))
+
+        return full_link, max_age
+
+    @staticmethod
+    def get_cache_control(max_age: int) -> str:
+        """
+        Формирует значение заголовка Cache-Control для ответа с разрешённой ссылкой.
+
+        :param max_age: Время в секундах, в течение которого ответ можно кэшировать.
+        :type max_age: int
+        :returns: Значение заголовка.
+        :rtype: str
         """
-        return await self.manager.get_link(short_link=short_link)
+        if max_age > 0:
+            return f"public, max-age={max_age}"
+
+        return "no-cache"
 
-    async def get_links(self, user: UserVerifySchema) -> list[LinkSchema]:
+    async def get_cache_stats(self) -> LocalCacheStatsSchema:
         """
-        Возвращает все ссылки, принадлежащие пользователю.
+        Возвращает статистику кэша ссылок текущего процесса.
+
+        :returns: Счётчики попаданий, промахов и вытеснений.
+        :rtype: LocalCacheStatsSchema
+        """
+        return self.local_cache.get_stats()
+
+    async def get_bloom_stats(self) -> BloomFilterStatsSchema:
+        """
+        Возвращает статистику фильтра Блума коротких ссылок.
+
+        :returns: Параметры фильтра и оценка доли ложных срабатываний.
+        :rtype: BloomFilterStatsSchema
+        """
+        return await self.manager.get_bloom_stats()
+
+    @staticmethod
+    def _encode_cursor(link: LinkSchema) -> str:
+        """
+        Формирует непрозрачный курсор следующей страницы по последней ссылке текущей.
+
+        :param link: Последняя ссылка страницы.
+        :type link: LinkSchema
+        :returns: Курсор в кодировке base64 для URL.
+        :rtype: str
+        """
+        return base64.urlsafe_b64encode(f"{link.created_at.isoformat()}|{link.id}".encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> tuple[datetime.datetime, uuid.UUID]:
+        """
+        Разбирает курсор страницы.
+
+        :param cursor: Курсор, полученный с предыдущей страницей.
+        :type cursor: str
+        :raises HTTPException: Если курсор повреждён.
+        :returns: Время создания и идентификатор последней ссылки предыдущей страницы.
+        :rtype: tuple[datetime.datetime, uuid.UUID]
+        """
+        try:
+            created_at, link_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+            return datetime.datetime.fromisoformat(created_at), uuid.UUID(link_id)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    async def get_links(
+        self, user: UserVerifySchema, limit: int, cursor: str | None = None, primary: bool = False
+    ) -> LinksPageSchema:
+        """
+        Возвращает страницу ссылок, принадлежащих пользователю, начиная с самых новых.
 
         :param user: Данные авторизованного пользователя.
         :type user: UserVerifySchema
-        :returns: Список ссылок пользователя.
-        :rtype: list[LinkSchema]
+        :param limit: Максимальное количество ссылок на странице.
+        :type limit: int
+        :param cursor: Курсор, полученный с предыдущей страницей, или None для первой страницы.
+        :type cursor: str | None
+        :param primary: Читать ли страницу из основной базы вместо реплики.
+        :type primary: bool
+        :raises HTTPException: Если курсор повреждён.
+        :returns: Ссылки страницы и курсор следующей страницы.
+        :rtype: LinksPageSchema
+        """
+        after = self._decode_cursor(cursor=cursor) if cursor else None
+        links = await self.manager.get_links(user_id=user.id, limit=limit + 1, after=after, primary=primary)
+
+        next_cursor = None
+        if len(links) > limit:
+            links = links[:limit]
+            next_cursor = self._encode_cursor(link=links[-1])
+
+        return LinksPageSchema(items=links, next_cursor=next_cursor)
+
+    async def get_links_etag(self, user: UserVerifySchema, limit: int, cursor: str | None = None) -> str | None:
+        """
+        Вычисляет ETag страницы ссылок пользователя без выполнения запроса к базе данных.
+
+        Тег строится из версии набора ссылок пользователя и параметров страницы. Версию нужно получить до чтения
+        страницы: если ссылки изменятся между этими шагами, ответ получит уже устаревший тег и будет запрошен
+        повторно, но клиент никогда не сохранит новое содержимое со старым тегом. Саму страницу с таким тегом
+        нужно читать из основной базы, так как реплика может ещё не содержать изменений, учтённых в версии.
+
+        :param user: Данные авторизованного пользователя.
+        :type user: UserVerifySchema
+        :param limit: Максимальное количество ссылок на странице.
+        :type limit: int
+        :param cursor: Курсор страницы или None для первой страницы.
+        :type cursor: str | None
+        :returns: Сильный ETag в кавычках или None, если версия недоступна.
+        :rtype: str | None
+        """
+        version = await self.manager.get_links_version(user_id=user.id)
+        if version is None:
+            return None
+
+        digest = hashlib.blake2b(f"{user.id}|{version}|{limit}|{cursor or ''}".encode(), digest_size=16)
+
+        return f'"{digest.hexdigest()}"'
+
+    @staticmethod
+    def match_etag(etag: str, if_none_match: str | None) -> bool:
+        """
+        Проверяет, совпадает ли ETag с одним из тегов заголовка If-None-Match.
+
+        :param etag: Текущий ETag страницы.
+        :type etag: str
+        :param if_none_match: Значение заголовка If-None-Match.
+        :type if_none_match: str | None
+        :returns: True, если у клиента актуальная версия страницы.
+        :rtype: bool
+        """
+        if not if_none_match:
+            return False
+
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+
+        return "*" in tags or etag in tags
+
+    async def export_links(self, user: UserVerifySchema, export_format: str) -> AsyncGenerator[str]:
         """
-        return await self.manager.get_links(user_id=user.id)
+        Выгружает все ссылки пользователя в формате NDJSON или CSV.
+
+        Строки читаются из базы данных пачками и сразу преобразуются в текст, поэтому потребление памяти
+        не зависит от количества ссылок.
+
+        :param user: Данные авторизованного пользователя.
+        :type user: UserVerifySchema
+        :param export_format: Формат выгрузки: ``ndjson`` или ``csv``.
+        :type export_format: str
+        :returns: Асинхронный генератор фрагментов выгрузки.
+        :rtype: AsyncGenerator[str]
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if export_format == "csv":
+            writer.writerow(self.export_fields)
+            yield buffer.getvalue()
+
+        async for rows in self.manager.stream_links(user_id=user.id):
+            records = [
+                (str(link_id), full_link, short_link, created_at.isoformat())
+                for link_id, full_link, short_link, created_at in rows
+            ]
+
+            if export_format == "csv":
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows(records)
+                yield buffer.getvalue()
+            else:
+                yield "".join(f"{json.dumps(dict(zip(self.export_fields, record)))}\n" for record in records)
+
+    @staticmethod
+    def _save_upload(file: UploadFile, file_path: str) -> None:
+        """
+        Копирует загруженный файл в каталог импорта.
+
+        Выполняется в пуле потоков, так как запись файла блокирует.
+
+        :param file: Загруженный файл.
+        :type file: UploadFile
+        :param file_path: Путь, по которому сохраняется файл.
+        :type file_path: str
+        :returns: None
+        """
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "wb") as destination:
+            shutil.copyfileobj(file.file, destination)
+
+    async def import_links(self, file: UploadFile, user: UserVerifySchema) -> ImportLinksTaskSchema:
+        """
+        Сохраняет загруженный CSV-файл и ставит задачу его импорта в очередь Celery.
+
+        Владелец задачи записывается до постановки в очередь, чтобы её состояние нельзя было получить
+        от имени другого пользователя ни на одном этапе.
+
+        :param file: Загруженный файл со ссылками.
+        :type file: UploadFile
+        :param user: Пользователь, которому будут принадлежать ссылки.
+        :type user: UserVerifySchema
+        :returns: Идентификатор задачи импорта.
+        :rtype: ImportLinksTaskSchema
+        """
+        file_path = os.path.join(settings.links_settings.link_import_dir, f"links_import_{uuid.uuid4().hex}.csv")
+        await run_in_threadpool(self._save_upload, file=file, file_path=file_path)
+
+        task_id = str(uuid.uuid4())
+        await self.manager.set_import_owner(task_id=task_id, user_id=user.id)
+        import_links.apply_async(kwargs={"file_path": file_path, "user_id": str(user.id)}, task_id=task_id)
+
+        return ImportLinksTaskSchema(task_id=task_id)
+
+    async def get_import_status(self, task_id: str, user: UserVerifySchema) -> ImportLinksStatusSchema:
+        """
+        Возвращает состояние задачи импорта ссылок.
+
+        :param task_id: Идентификатор задачи импорта.
+        :type task_id: str
+        :param user: Пользователь, запустивший импорт.
+        :type user: UserVerifySchema
+        :raises HTTPException: Если задача неизвестна или запущена другим пользователем.
+        :returns: Состояние задачи и ход импорта.
+        :rtype: ImportLinksStatusSchema
+        """
+        if await self.manager.get_import_owner(task_id=task_id) != str(user.id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import not found")
+
+        task = AsyncResult(task_id, app=celery_app)
+        state, info = await run_in_threadpool(lambda: (task.state, task.info))
+
+        progress = None
+        if isinstance(info, dict):
+            progress = ImportLinksResultSchema.model_validate(info)
+
+        return ImportLinksStatusSchema(task_id=task_id, state=state, progress=progress)
 
     async def create_link(self, link_data: CreateLinkSchema, user: UserVerifySchema) -> LinkSchema:
         """
         Создает новую сокращенную ссылку для пользователя.
 
-        :param link_data: Данные запроса с полным адресом ссылки.
+        Короткая ссылка берётся из пула заранее проверенных кодов или из счётчика, в зависимости от настроек.
+        Если пул пуст, код генерируется на месте, а при конфликте уникальности попытка повторяется с новым кодом.
+        Если в режиме без дублей возвращена существующая ссылка, код из пула возвращается обратно.
+
+        :param link_data: Данные запроса с полным адресом ссылки и её ограничениями.
         :type link_data: CreateLinkSchema
         :param user: Пользователь, которому будет принадлежать ссылка.
         :type user: UserVerifySchema
@@ -73,28 +391,131 @@ class LinksService:
         link_length = settings.link_length
 
         while True:
-            short_link = secrets.token_urlsafe(link_length)[:link_length]
+            taken_link = await self.manager.take_short_code()
+            short_link = taken_link or generate_short_code(length=link_length)
             try:
-                return await self.manager.create_link(
-                    full_link=link_data.full_link, user_id=user.id, short_link=short_link
+                link = await self.manager.create_link(
+                    full_link=link_data.full_link,
+                    user_id=user.id,
+                    short_link=short_link,
+                    expires_at=link_data.expires_at,
+                    max_clicks=link_data.max_clicks,
                 )
             except IntegrityError:
                 continue
 
+            if taken_link and link.short_link != taken_link:
+                await self.manager.release_short_codes(taken_link)
+
+            return link
+
+    async def create_links(self, links_data: list[CreateLinkSchema], user: UserVerifySchema) -> list[LinkSchema]:
+        """
+        Создает несколько сокращенных ссылок для пользователя.
+
+        Коды для всех ссылок получаются разом, а записи вставляются многострочными командами. Ссылки, коды которых
+        оказались заняты, получают новые коды, и вставка повторяется только для них. В режиме без дублей
+        одинаковые элементы запроса создаются один раз, а коды, не понадобившиеся из-за существующих ссылок,
+        возвращаются в пул.
+
+        :param links_data: Данные запроса с полными адресами ссылок.
+        :type links_data: list[CreateLinkSchema]
+        :param user: Пользователь, которому будут принадлежать ссылки.
+        :type user: UserVerifySchema
+        :returns: Созданные записи в порядке исходного запроса.
+        :rtype: list[LinkSchema]
+        """
+        link_length = settings.link_length
+        deduplicate = settings.links_settings.link_deduplicate
+        requested_links = [
+            (link_data.full_link, link_data.expires_at, link_data.max_clicks) for link_data in links_data
+        ]
+        if deduplicate:
+            requested_links = list(dict.fromkeys(requested_links))
+        positions = {requested_link: index for index, requested_link in enumerate(requested_links)}
+        created_links: list[LinkSchema | None] = [None] * len(requested_links)
+        pending = list(range(len(requested_links)))
+
+        while pending:
+            taken_links = await self.manager.take_short_codes(count=len(pending))
+            short_links = taken_links + [
+                generate_short_code(length=link_length) for _ in range(len(pending) - len(taken_links))
+            ]
+
+            attempt = {}
+            for index, short_link in zip(pending, short_links):
+                attempt.setdefault(short_link, index)
+
+            new_links = []
+            for short_link, index in attempt.items():
+                full_link, expires_at, max_clicks = requested_links[index]
+                new_links.append((full_link, short_link, expires_at, max_clicks))
+
+            links = await self.manager.create_links(links=new_links, user_id=user.id)
+            for link in links:
+                index = attempt.get(link.short_link)
+                if index is None or requested_links[index][0] != link.full_link:
+                    index = positions[(link.full_link, None, None)]
+                created_links[index] = link
+
+            used_links = {link.short_link for link in links}
+            unused_links = [
+                short_link
+                for short_link in taken_links
+                if short_link not in used_links and created_links[attempt[short_link]] is not None
+            ]
+            await self.manager.release_short_codes(*unused_links)
+
+            pending = [index for index in pending if created_links[index] is None]
+
+        if deduplicate:
+            return [
+                created_links[positions[(link_data.full_link, link_data.expires_at, link_data.max_clicks)]]
+                for link_data in links_data
+            ]
+
+        return created_links
+
     async def delete_link(self, link_data: DeleteLinkSchema, user: UserVerifySchema) -> None:
         """
-        Удаляет ссылку пользователя после проверки владельца.
+        Удаляет ссылку пользователя, проверяя владельца в той же команде удаления.
 
         :param link_data: Данные с идентификатором ссылки для удаления.
         :type link_data: DeleteLinkSchema
         :param user: Пользователь, запрашивающий удаление.
         :type user: UserVerifySchema
-        :raises HTTPException: Если пользователь не является владельцем ссылки.
+        :raises HTTPException: Если ссылка не найдена или пользователь не является ее владельцем.
         :returns: None
         """
-        link_owner = await self.manager.get_link_owner(link_id=link_data.id)
+        deleted_ids = await self.manager.delete_links(link_ids=[link_data.id], user_id=user.id)
 
-        if link_owner and link_owner == user.id:
-            await self.manager.delete_link(link_id=link_data.id)
-        else:
+        if not deleted_ids:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Wrong link owner")
+
+    async def delete_links(self, links_data: DeleteLinksSchema, user: UserVerifySchema) -> DeleteLinksResultSchema:
+        """
+        Удаляет несколько ссылок пользователя и сообщает, какие из них удалить не удалось.
+
+        Чужие и несуществующие ссылки различаются дополнительным запросом, который выполняется, только если
+        удалены не все ссылки.
+
+        :param links_data: Данные с идентификаторами ссылок для удаления.
+        :type links_data: DeleteLinksSchema
+        :param user: Пользователь, запрашивающий удаление.
+        :type user: UserVerifySchema
+        :returns: Идентификаторы удалённых, чужих и несуществующих ссылок.
+        :rtype: DeleteLinksResultSchema
+        """
+        link_ids = list(dict.fromkeys(links_data.ids))
+        deleted_ids = set(await self.manager.delete_links(link_ids=link_ids, user_id=user.id))
+        remaining_ids = [link_id for link_id in link_ids if link_id not in deleted_ids]
+        not_owned_ids = set()
+
+        if remaining_ids:
+            not_owned_ids.update(await self.manager.get_existing_link_ids(link_ids=remaining_ids))
+
+        return DeleteLinksResultSchema(
+            deleted=[link_id for link_id in link_ids if link_id in deleted_ids],
+            not_owned=[link_id for link_id in remaining_ids if link_id in not_owned_ids],
+            not_found=[link_id for link_id in remaining_ids if link_id not in not_owned_ids],
+        )
@@ -0,0 +1,91 @@
+"""
+Проект: Lkeep
+Автор: Иван Ашихмин
+Год: 2025
+Специально для проекта "Код на салфетке"
+https://pressanybutton.ru/category/servis-na-fastapi/
+"""
+
+import uuid
+from pathlib import Path
+
+from celery import Task, shared_task
+
+from lkeep.apps.links.importer import LinksImporter
+from lkeep.apps.links.managers import LinksManager
+from lkeep.apps.links.schemas import ImportLinksResultSchema
+from lkeep.core.core_dependency.db_dependency import DBDependency
+from lkeep.core.core_dependency.redis_dependency import RedisDependency
+from lkeep.core.task_runner import run_task
+
+
+@shared_task
+def refill_short_code_pool() -> int:
+    """
+    Пополняет пул заранее сгенерированных коротких ссылок.
+
+    :returns: Количество добавленных в пул кодов.
+    :rtype: int
+    """
+    return run_task(lambda db, redis: LinksManager(db=db, redis=redis).refill_short_code_pool())
+
+
+@shared_task
+def purge_expired_links() -> int:
+    """
+    Удаляет ссылки, срок действия которых истёк.
+
+    :returns: Количество удалённых ссылок.
+    :rtype: int
+    """
+    return run_task(lambda db, redis: LinksManager(db=db, redis=redis).purge_expired_links())
+
+
+async def _import_links(task: Task, db: DBDependency, redis: RedisDependency, file_path: str, user_id: str) -> dict:
+    """
+    Импортирует ссылки из файла, сообщая о ходе импорта через состояние задачи.
+
+    :param task: Выполняемая задача Celery.
+    :type task: Task
+    :param db: Зависимость базы данных задачи.
+    :type db: DBDependency
+    :param redis: Зависимость Redis задачи.
+    :type redis: RedisDependency
+    :param file_path: Путь к загруженному CSV-файлу.
+    :type file_path: str
+    :param user_id: Идентификатор владельца ссылок.
+    :type user_id: str
+    :returns: Итог импорта.
+    :rtype: dict
+    """
+
+    def report_progress(progress: ImportLinksResultSchema) -> None:
+        task.update_state(state="PROGRESS", meta=progress.model_dump())
+
+    importer = LinksImporter(db=db, redis=redis)
+    result = await importer.run(file_path=file_path, user_id=uuid.UUID(user_id), on_progress=report_progress)
+
+    return result.model_dump()
+
+
+@shared_task(bind=True)
+def import_links(self: Task, file_path: str, user_id: str) -> dict:
+    """
+    Импортирует ссылки пользователя из загруженного CSV-файла и удаляет файл.
+
+    Файла может уже не быть, например при повторном запуске задачи; тогда в результате задачи остаётся
+    исходная ошибка импорта.
+
+    :param file_path: Путь к загруженному CSV-файлу.
+    :type file_path: str
+    :param user_id: Идентификатор владельца ссылок.
+    :type user_id: str
+    :returns: Итог импорта.
+    :rtype: dict
+    """
+    try:
+        return run_task(
+            lambda db, redis: _import_links(task=self, db=db, redis=redis, file_path=file_path, user_id=user_id)
+        )
+    finally:
+        Path(file_path).unlink(missing_ok=True)
@@ -12,7 +12,7 @@ from typing import Any
 from fastapi import Depends
 from sqlalchemy import select, update
 
-from lkeep.core.core_dependency.db_dependency import DBDependency
+from lkeep.core.core_dependency.db_dependency import DBDependency, get_db_dependency
 from lkeep.database.models import User
 
 
@@ -21,7 +21,7 @@ class ProfileManager:
     Менеджер для работы с данными профиля в базе данных.
     """
 
-    def __init__(self, db: DBDependency = Depends(DBDependency)) -> None:
+    def __init__(self, db: DBDependency = Depends(get_db_dependency)) -> None:
         """
         Инициализирует менеджер с зависимостью доступа к базе данных.
 
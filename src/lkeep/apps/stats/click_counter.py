@@ -0,0 +1,189 @@
+"""
+Проект: Lkeep
+Автор: Иван Ашихмин
+Год: 2025
+Специально для проекта "Код на салфетке"
+https://pressanybutton.ru/category/servis-na-fastapi/
+"""
+
+import asyncio
+import datetime
+import hashlib
+import time
+from collections import Counter, defaultdict
+
+from redis.exceptions import RedisError
+
+from lkeep.apps.stats.trending import trending_links
+from lkeep.core.core_dependency.redis_dependency import RedisDependency
+from lkeep.core.settings import settings
+
+
+class ClickCounter:
+    """
+    Буфер переходов по коротким ссылкам в памяти процесса.
+
+    Переход учитывается увеличением словаря и, если включены события, добавлением времени перехода в список
+    без обращений к Redis или базе данных. Фоновая задача периодически переносит накопленные значения в общий
+    хеш и очередь событий Redis, откуда они пачками записываются в базу данных, и в общий рейтинг популярных
+    ссылок.
+
+    Уникальные посетители оцениваются структурами HyperLogLog Redis, по одной на ссылку и сутки по UTC. Отпечаток
+    посетителя - ключевой хеш его адреса и User-Agent, поэтому сами адреса никуда не записываются, а повторные
+    переходы посетителя до переноса буфера схлопываются в памяти процесса.
+
+    :ivar redis_key: Ключ хеша Redis с ещё не записанными в базу данных переходами.
+    :type redis_key: str
+    :ivar events_key: Ключ списка Redis с ещё не записанными в базу данных событиями переходов в виде строк
+        ``<время в миллисекундах> <короткая ссылка>``.
+    :type events_key: str
+    :ivar visitors_prefix: Префикс ключей суточных HyperLogLog посетителей.
+    :type visitors_prefix: str
+    """
+
+    redis_key = "stats:clicks"
+    events_key = "stats:click_events"
+    visitors_prefix = "stats:visitors"
+
+    def __init__(
+        self,
+        enabled: bool,
+        flush_interval: float,
+        events_enabled: bool,
+        visitors_enabled: bool,
+        visitors_ttl: int,
+        secret: str,
+    ) -> None:
+        """
+        Создаёт пустой буфер.
+
+        :param enabled: Учитываются ли переходы.
+        :type enabled: bool
+        :param flush_interval: Интервал переноса буфера в Redis в секундах.
+        :type flush_interval: float
+        :param events_enabled: Сохраняются ли отдельные события переходов.
+        :type events_enabled: bool
+        :param visitors_enabled: Оцениваются ли уникальные посетители.
+        :type visitors_enabled: bool
+        :param visitors_ttl: Время хранения суточных оценок посетителей в секундах.
+        :type visitors_ttl: int
+        :param secret: Секрет, которым подписываются отпечатки посетителей.
+        :type secret: str
+        """
+        self.enabled = enabled
+        self.flush_interval = flush_interval
+        self.events_enabled = events_enabled
+        self.visitors_enabled = visitors_enabled
+        self.visitors_ttl = visitors_ttl
+        self._secret = hashlib.blake2b(secret.encode(), digest_size=32).digest()
+        self._clicks: Counter[str] = Counter()
+        self._events: list[tuple[float, str]] = []
+        self._visitors: defaultdict[tuple[str, int], set[bytes]] = defaultdict(set)
+
+    def get_visitors_key(self, short_link: str, day: datetime.date) -> str:
+        """
+        Формирует ключ HyperLogLog посетителей ссылки за сутки.
+
+        :param short_link: Сокращенный идентификатор ссылки.
+        :type short_link: str
+        :param day: Дата по UTC.
+        :type day: datetime.date
+        :returns: Ключ в Redis.
+        :rtype: str
+        """
+        return f"{self.visitors_prefix}:{short_link}:{day:%Y%m%d}"
+
+    def record(self, short_link: str, visitor: str | None = None) -> None:
+        """
+        Учитывает переход по короткой ссылке.
+
+        :param short_link: Сокращенный идентификатор ссылки.
+        :type short_link: str
+        :param visitor: Адрес и User-Agent посетителя или None, если посетитель неизвестен.
+        :type visitor: str | None
+        :returns: None
+        """
+        if not self.enabled:
+            return
+
+        clicked_at = time.time()
+        self._clicks[short_link] += 1
+        if self.events_enabled:
+            self._events.append((clicked_at, short_link))
+        if self.visitors_enabled and visitor is not None:
+            fingerprint = hashlib.blake2b(visitor.encode(), digest_size=8, key=self._secret).digest()
+            self._visitors[(short_link, int(clicked_at // 86400))].add(fingerprint)
+
+    async def flush(self, redis: RedisDependency) -> None:
+        """
+        Переносит накопленные переходы в Redis.
+
+        Если Redis недоступен, переходы возвращаются в буфер и будут перенесены при следующей попытке.
+
+        :param redis: Зависимость Redis.
+        :type redis: RedisDependency
+        :returns: None
+        """
+        if not self._clicks and not self._events and not self._visitors:
+            return
+
+        clicks, self._clicks = self._clicks, Counter()
+        events, self._events = self._events, []
+        visitors, self._visitors = self._visitors, defaultdict(set)
+        try:
+            async with redis.get_client() as client, client.pipeline(transaction=False) as pipe:
+                for short_link, count in clicks.items():
+                    pipe.hincrby(self.redis_key, short_link, count)
+                trending_links.queue_increment(pipe=pipe, scope="all", clicks=clicks)
+                if events:
+                    pipe.rpush(
+                        self.events_key,
+                        *(f"{int(clicked_at * 1000)} {short_link}" for clicked_at, short_link in events),
+                    )
+                for (short_link, day), fingerprints in visitors.items():
+                    key = self.get_visitors_key(
+                        short_link=short_link, day=datetime.date(1970, 1, 1) + datetime.timedelta(days=day)
+                    )
+                    pipe.pfadd(key, *fingerprints)
+                    pipe.expire(key, self.visitors_ttl)
+                await pipe.execute()
+        except RedisError:
+            self._clicks.update(clicks)
+            self._events[:0] = events
+            for key, fingerprints in visitors.items():
+                self._visitors[key].update(fingerprints)
+
+    async def run(self, redis: RedisDependency) -> None:
+        """
+        Периодически переносит буфер в Redis до отмены задачи, после чего переносит остаток.
+
+        :param redis: Зависимость Redis.
+        :type redis: RedisDependency
+        :returns: None
+        """
+        try:
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush(redis=redis)
+        finally:
+            await self.flush(redis=redis)
+
+
+click_counter = ClickCounter(
+    enabled=settings.stats_settings.stats_click_counting,
+    flush_interval=settings.stats_settings.stats_click_flush_interval,
+    events_enabled=settings.stats_settings.stats_click_events,
+    visitors_enabled=settings.stats_settings.stats_visitor_counting,
+    visitors_ttl=settings.stats_settings.stats_visitor_retention_days * 86400,
+    secret=settings.secret_key.get_secret_value(),
+)
+
+
+def get_click_counter() -> ClickCounter:
+    """
+    Возвращает общий для процесса буфер переходов.
+
+    :returns: Буфер переходов в памяти процесса.
+    :rtype: ClickCounter
+    """
+    return click_counter
@@ -0,0 +1,23 @@
+"""
+Проект: Lkeep
+Автор: Иван Ашихмин
+Год: 2025
+Специально для проекта "Код на салфетке"
+https://pressanybutton.ru/category/servis-na-fastapi/
+"""
+
+from fastapi import Request
+
+
+def get_visitor(request: Request) -> str:
+    """
+    Возвращает данные посетителя, из которых строится его отпечаток.
+
+    :param request: Текущий запрос.
+    :type request: Request
+    :returns: Адрес клиента и значение заголовка User-Agent.
+    :rtype: str
+    """
+    host = request.client.host if request.client else ""
+
+    return f"{host} {request.headers.get('user-agent', '')}"
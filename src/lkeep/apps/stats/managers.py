@@ -0,0 +1,517 @@
+"""
+Проект: Lkeep
+Автор: Иван Ашихмин
+Год: 2025
+Специально для проекта "Код на салфетке"
+https://pressanybutton.ru/category/servis-na-fastapi/
+"""
+
+import datetime
+import uuid
+from collections import Counter, defaultdict
+
+from asyncpg import Connection
+from fastapi import Depends
+from sqlalchemy import (
+    Date,
+    Integer,
+    String,
+    any_,
+    bindparam,
+    case,
+    cast,
+    func,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+
+from lkeep.apps.links.managers import LinksManager
+from lkeep.apps.stats.click_counter import ClickCounter, click_counter
+from lkeep.apps.stats.trending import trending_links
+from lkeep.core.core_dependency.db_dependency import DBDependency, get_db_dependency
+from lkeep.core.core_dependency.redis_dependency import (
+    RedisDependency,
+    get_redis_dependency,
+)
+from lkeep.core.settings import settings
+from lkeep.database.models import ClickDaily, ClickEvent, ClickHourly, Link
+
+
+class StatsManager:
+    """
+    Менеджер статистики переходов по ссылкам.
+
+    :ivar flushing_prefix: Префикс ключей Redis, в которые переименовывается хеш переходов на время записи
+        в базу данных.
+    :type flushing_prefix: str
+    :ivar lock_key: Ключ блокировки, не позволяющей записывать переходы в базу данных одновременно.
+    :type lock_key: str
+    :ivar events_lock_key: Ключ блокировки, не позволяющей записывать события переходов одновременно.
+    :type events_lock_key: str
+    :ivar events_flushing_key: Ключ списка Redis, в который переносится пачка событий на время записи в базу данных.
+    :type events_flushing_key: str
+    :ivar move_events_script: Lua-скрипт, атомарно переносящий до ``ARGV[1]`` событий из начала очереди в конец
+        списка записываемой пачки и возвращающий их.
+    :type move_events_script: str
+    :ivar rollup_lock_key: Ключ блокировки, не позволяющей пересчитывать агрегаты одновременно.
+    :type rollup_lock_key: str
+    """
+
+    flushing_prefix = f"{ClickCounter.redis_key}:flushing"
+    lock_key = f"{ClickCounter.redis_key}:lock"
+    events_lock_key = f"{ClickCounter.events_key}:lock"
+    events_flushing_key = f"{ClickCounter.events_key}:flushing"
+    move_events_script = """
+        local events = {}
+        for _ = 1, tonumber(ARGV[1]) do
+            local event = redis.call("LMOVE", KEYS[1], KEYS[2], "LEFT", "RIGHT")
+            if not event then
+                break
+            end
+            table.insert(events, event)
+        end
+        return events
+    """
+    rollup_lock_key = "stats:rollup:lock"
+
+    def __init__(
+        self,
+        db: DBDependency = Depends(get_db_dependency),
+        redis: RedisDependency = Depends(get_redis_dependency),
+    ) -> None:
+        """
+        Инициализирует менеджер с зависимостями доступа к базе данных и Redis.
+
+        :param db: Объект для получения асинхронных сессий с базой данных.
+        :type db: DBDependency
+        :param redis: Объект для получения клиента Redis, в котором накапливаются переходы.
+        :type redis: RedisDependency
+        """
+        self.db = db
+        self.redis = redis
+
+    async def flush_clicks(self) -> int:
+        """
+        Переносит накопленные в Redis переходы в базу данных.
+
+        Хеш переходов атомарно переименовывается, поэтому новые переходы продолжают копиться в новом хеше.
+        Переименованный хеш удаляется только после записи в базу данных; если запись прервётся, он будет
+        записан при следующем запуске. Одновременно переходы записывает только один процесс.
+
+        Записанные переходы попадают и в рейтинги популярных ссылок владельцев: владелец ссылки известен только
+        здесь, поэтому рейтинг владельца отстаёт от общего на интервал записи.
+
+        :returns: Количество записанных переходов.
+        :rtype: int
+        """
+        flushed = 0
+
+        async with self.redis.get_client() as client:
+            if not await client.set(self.lock_key, 1, nx=True, ex=300):
+                return flushed
+
+            try:
+                flushing_keys = [key async for key in client.scan_iter(match=f"{self.flushing_prefix}:*")]
+                if await client.exists(ClickCounter.redis_key):
+                    flushing_key = f"{self.flushing_prefix}:{uuid.uuid4().hex}"
+                    await client.rename(ClickCounter.redis_key, flushing_key)
+                    flushing_keys.append(flushing_key)
+
+                for flushing_key in flushing_keys:
+                    clicks = await client.hgetall(flushing_key)
+                    owner_clicks = await self._apply_clicks(
+                        clicks={short_link: int(count) for short_link, count in clicks.items()}
+                    )
+                    async with client.pipeline(transaction=False) as pipe:
+                        for owner_id, links_clicks in owner_clicks.items():
+                            trending_links.queue_increment(pipe=pipe, scope=f"user:{owner_id}", clicks=links_clicks)
+                        pipe.delete(flushing_key)
+                        await pipe.execute()
+                    flushed += sum(int(count) for count in clicks.values())
+            finally:
+                await client.delete(self.lock_key)
+
+        return flushed
+
+    async def _apply_clicks(self, clicks: dict[str, int]) -> dict[uuid.UUID, Counter[str]]:
+        """
+        Прибавляет переходы к счётчикам ссылок пачками по одному запросу UPDATE.
+
+        Ссылки, набравшие максимальное количество переходов, в том же запросе помечаются истёкшими, их записи
+        сбрасываются в кэшах, а версии наборов ссылок владельцев увеличиваются. Сами переходы сверх ограничения
+        отклоняются раньше, при разрешении ссылки, а здесь состояние ссылки лишь приводится в соответствие.
+
+        :param clicks: Количество новых переходов по каждой короткой ссылке.
+        :type clicks: dict[str, int]
+        :returns: Количество переходов по ссылкам каждого владельца; удалённые ссылки не учитываются.
+        :rtype: dict[uuid.UUID, Counter[str]]
+        """
+        owner_clicks: defaultdict[uuid.UUID, Counter[str]] = defaultdict(Counter)
+        batch_size = settings.stats_settings.stats_click_db_batch_size
+        deltas = (
+            func.unnest(
+                bindparam("short_links", type_=ARRAY(String)),
+                bindparam("deltas", type_=ARRAY(Integer)),
+            )
+            .table_valued("short_link", "delta")
+            .render_derived(name="deltas", with_types=False)
+        )
+        query = (
+            update(Link)
+            .where(Link.short_link == deltas.c.short_link)
+            .values(
+                clicks=Link.clicks + deltas.c.delta,
+                expires_at=case(
+                    (Link.clicks + deltas.c.delta >= Link.max_clicks, func.least(Link.expires_at, func.now())),
+                    else_=Link.expires_at,
+                ),
+            )
+            .returning(Link.owner_id, Link.short_link, deltas.c.delta, Link.clicks, Link.max_clicks)
+            .execution_options(synchronize_session=False)
+        )
+        items = sorted(clicks.items())
+        exhausted_links = []
+        exhausted_owners = []
+
+        async with self.db.db_session() as session:
+            for offset in range(0, len(items), batch_size):
+                short_links, counts = zip(*items[offset : offset + batch_size])
+                result = await session.execute(query, {"short_links": list(short_links), "deltas": list(counts)})
+                for owner_id, short_link, delta, total_clicks, max_clicks in result.all():
+                    owner_clicks[owner_id][short_link] += delta
+                    if max_clicks is not None and total_clicks - delta < max_clicks <= total_clicks:
+                        exhausted_links.append(short_link)
+                        exhausted_owners.append(owner_id)
+            await session.commit()
+
+        links_manager = LinksManager(db=self.db, redis=self.redis)
+        await links_manager.invalidate_links_cache(*exhausted_links)
+        await links_manager.bump_links_version(*exhausted_owners)
+
+        return owner_clicks
+
+    async def get_clicks(self, short_link: str, user_id: uuid.UUID) -> int | None:
+        """
+        Возвращает количество переходов по ссылке пользователя.
+
+        К значению из базы данных прибавляются переходы, ещё не перенесённые из Redis. Переходы, которые
+        находятся в буфере процессов приложения, появятся в статистике после ближайшего переноса.
+
+        :param short_link: Сокращенный идентификатор ссылки.
+        :type short_link: str
+        :param user_id: Идентификатор владельца ссылки.
+        :type user_id: uuid.UUID
+        :returns: Количество переходов или None, если у пользователя нет такой ссылки.
+        :rtype: int | None
+        """
+        async with self.db.db_read_session() as session:
+            query = select(Link.clicks).where(Link.short_link == short_link, Link.owner_id == user_id)
+            clicks = await session.scalar(query)
+
+        if clicks is None:
+            return None
+
+        async with self.redis.get_client() as client:
+            pending_clicks = await client.hget(ClickCounter.redis_key, short_link)
+
+        return clicks + int(pending_clicks or 0)
+
+    async def flush_click_events(self) -> int:
+        """
+        Переносит события переходов из очереди Redis в базу данных.
+
+        Пачка событий атомарно переносится из начала очереди в отдельный список, записывается командой COPY
+        и только после этого удаляется, поэтому при сбое пачка будет записана повторно при следующем запуске.
+        Недостающие суточные секции создаются перед записью пачки. Одновременно события записывает только один
+        процесс, а за один запуск записывается не больше ``stats_click_event_max_batches`` пачек, чтобы запись
+        завершалась задолго до истечения блокировки.
+
+        :returns: Количество записанных событий.
+        :rtype: int
+        """
+        flushed = 0
+        stats_settings = settings.stats_settings
+
+        async with self.redis.get_client() as client:
+            if not await client.set(self.events_lock_key, 1, nx=True, ex=300):
+                return flushed
+
+            move_events = client.register_script(self.move_events_script)
+
+            try:
+                async with self.db.db_engine.connect() as connection:
+                    raw_connection = await connection.get_raw_connection()
+                    driver_connection = raw_connection.driver_connection
+
+                    for _ in range(stats_settings.stats_click_event_max_batches):
+                        events = await client.lrange(self.events_flushing_key, 0, -1)
+                        if not events:
+                            events = await move_events(
+                                keys=[ClickCounter.events_key, self.events_flushing_key],
+                                args=[stats_settings.stats_click_event_batch_size],
+                            )
+                        if not events:
+                            break
+
+                        records = []
+                        for event in events:
+                            clicked_at, short_link = event.split(" ", 1)
+                            records.append(
+                                (datetime.datetime.fromtimestamp(int(clicked_at) / 1000, datetime.UTC), short_link)
+                            )
+
+                        await self._create_partitions(
+                            connection=driver_connection, days={clicked_at.date() for clicked_at, _ in records}
+                        )
+                        await driver_connection.copy_records_to_table(
+                            ClickEvent.__tablename__, records=records, columns=("clicked_at", "short_link")
+                        )
+                        await client.delete(self.events_flushing_key)
+                        flushed += len(events)
+            finally:
+                await client.delete(self.events_lock_key)
+
+        return flushed
+
+    @staticmethod
+    async def _create_partitions(connection: Connection, days: set[datetime.date]) -> None:
+        """
+        Создаёт суточные секции таблицы событий, если их ещё нет.
+
+        :param connection: Соединение asyncpg.
+        :type connection: Connection
+        :param days: Даты по UTC, для которых нужны секции.
+        :type days: set[datetime.date]
+        :returns: None
+        """
+        for day in sorted(days):
+            next_day = day + datetime.timedelta(days=1)
+            await connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {ClickEvent.partition_prefix}{day:%Y%m%d} "
+                f"PARTITION OF {ClickEvent.__tablename__} "
+                f"FOR VALUES FROM ('{day.isoformat()} 00:00:00+00') TO ('{next_day.isoformat()} 00:00:00+00')"
+            )
+
+    async def maintain_click_partitions(self) -> int:
+        """
+        Создаёт секции событий на ближайшие дни и удаляет секции старше срока хранения.
+
+        :returns: Количество удалённых секций.
+        :rtype: int
+        """
+        today = datetime.datetime.now(datetime.UTC).date()
+        days_ahead = settings.stats_settings.stats_click_event_partitions_ahead
+        oldest_day = today - datetime.timedelta(days=settings.stats_settings.stats_click_event_retention_days)
+        dropped = 0
+
+        async with self.db.db_engine.connect() as connection:
+            raw_connection = await connection.get_raw_connection()
+            driver_connection = raw_connection.driver_connection
+
+            await self._create_partitions(
+                connection=driver_connection,
+                days={today + datetime.timedelta(days=offset) for offset in range(days_ahead + 1)},
+            )
+
+            partitions = await driver_connection.fetch(
+                "SELECT partition.relname FROM pg_inherits "
+                "JOIN pg_class AS partition ON partition.oid = pg_inherits.inhrelid "
+                "WHERE pg_inherits.inhparent = $1::regclass",
+                ClickEvent.__tablename__,
+            )
+            for partition in partitions:
+                name = partition["relname"]
+                day = datetime.datetime.strptime(name.removeprefix(ClickEvent.partition_prefix), "%Y%m%d").date()
+                if day < oldest_day:
+                    await driver_connection.execute(f"DROP TABLE {name}")
+                    dropped += 1
+
+        return dropped
+
+    async def rollup_clicks(self) -> int:
+        """
+        Пересчитывает почасовые и посуточные агрегаты переходов.
+
+        Пересчитываются только часы, начиная с последнего посчитанного за вычетом глубины пересчёта, и сутки,
+        в которые они попадают, поэтому каждый запуск читает лишь свежие события. Значения агрегатов заменяются
+        целиком, так что повторный пересчёт того же периода не искажает их.
+
+        :returns: Количество обновлённых почасовых агрегатов.
+        :rtype: int
+        """
+        async with self.redis.get_client() as client:
+            if not await client.set(self.rollup_lock_key, 1, nx=True, ex=300):
+                return 0
+
+            try:
+                async with self.db.db_session() as session:
+                    last_hour = await session.scalar(select(func.max(ClickHourly.hour)))
+                    if last_hour is None:
+                        last_hour = await session.scalar(select(func.min(ClickEvent.clicked_at)))
+                    if last_hour is None:
+                        return 0
+
+                    lookback = datetime.timedelta(seconds=settings.stats_settings.stats_click_rollup_lookback)
+                    start = (last_hour - lookback).astimezone(datetime.UTC).replace(minute=0, second=0, microsecond=0)
+
+                    hour = func.date_trunc("hour", ClickEvent.clicked_at, "UTC").label("hour")
+                    hourly = (
+                        select(ClickEvent.short_link, hour, func.count())
+                        .where(ClickEvent.clicked_at >= start)
+                        .group_by(ClickEvent.short_link, hour.name)
+                    )
+                    query = postgresql_insert(ClickHourly).from_select(["short_link", "hour", "clicks"], hourly)
+                    query = query.on_conflict_do_update(
+                        index_elements=[ClickHourly.short_link, ClickHourly.hour],
+                        set_={"clicks": query.excluded.clicks},
+                    )
+                    result = await session.execute(query)
+
+                    day = cast(func.timezone("UTC", ClickHourly.hour), Date).label("day")
+                    daily = (
+                        select(ClickHourly.short_link, day, func.sum(ClickHourly.clicks))
+                        .where(ClickHourly.hour >= start.replace(hour=0))
+                        .group_by(ClickHourly.short_link, day.name)
+                    )
+                    query = postgresql_insert(ClickDaily).from_select(["short_link", "day", "clicks"], daily)
+                    query = query.on_conflict_do_update(
+                        index_elements=[ClickDaily.short_link, ClickDaily.day],
+                        set_={"clicks": query.excluded.clicks},
+                    )
+                    await session.execute(query)
+                    await session.commit()
+            finally:
+                await client.delete(self.rollup_lock_key)
+
+        return result.rowcount
+
+    async def get_click_series(
+        self,
+        short_link: str,
+        user_id: uuid.UUID,
+        granularity: str,
+        start: datetime.datetime,
+        end: datetime.datetime,
+    ) -> list[tuple[datetime.datetime, int]] | None:
+        """
+        Возвращает количество переходов по ссылке пользователя по часам или суткам.
+
+        Данные берутся только из агрегатов. В ряд попадают часы или сутки по UTC, пересекающиеся с периодом;
+        периоды до создания ссылки отбрасываются, чтобы в ряд не попали переходы по удалённой ссылке с тем же
+        коротким идентификатором.
+
+        :param short_link: Сокращенный идентификатор ссылки.
+        :type short_link: str
+        :param user_id: Идентификатор владельца ссылки.
+        :type user_id: uuid.UUID
+        :param granularity: Шаг ряда: ``hour`` или ``day``.
+        :type granularity: str
+        :param start: Начало периода включительно.
+        :type start: datetime.datetime
+        :param end: Конец периода не включительно.
+        :type end: datetime.datetime
+        :returns: Начала периодов с ненулевым количеством переходов и сами количества либо None,
+            если у пользователя нет такой ссылки.
+        :rtype: list[tuple[datetime.datetime, int]] | None
+        """
+        async with self.db.db_read_session() as session:
+            query = select(Link.created_at).where(Link.short_link == short_link, Link.owner_id == user_id)
+            created_at = await session.scalar(query)
+
+            if created_at is None:
+                return None
+
+            if granularity == "hour":
+                start = max(start, created_at).astimezone(datetime.UTC).replace(minute=0, second=0, microsecond=0)
+                query = (
+                    select(ClickHourly.hour, ClickHourly.clicks)
+                    .where(ClickHourly.short_link == short_link, ClickHourly.hour >= start, ClickHourly.hour < end)
+                    .order_by(ClickHourly.hour)
+                )
+                result = await session.execute(query)
+                return [(hour, clicks) for hour, clicks in result.all()]
+
+            start_day = max(start, created_at).astimezone(datetime.UTC).date()
+            end_day = (end - datetime.timedelta(microseconds=1)).astimezone(datetime.UTC).date()
+            query = (
+                select(ClickDaily.day, ClickDaily.clicks)
+                .where(ClickDaily.short_link == short_link, ClickDaily.day >= start_day, ClickDaily.day <= end_day)
+                .order_by(ClickDaily.day)
+            )
+            result = await session.execute(query)
+            return [
+                (datetime.datetime.combine(day, datetime.time(), tzinfo=datetime.UTC), clicks)
+                for day, clicks in result.all()
+            ]
+
+    async def get_visitors(
+        self, short_link: str, user_id: uuid.UUID, start: datetime.date, end: datetime.date
+    ) -> int | None:
+        """
+        Оценивает количество уникальных посетителей ссылки пользователя за период.
+
+        Суточные HyperLogLog объединяются одной командой PFCOUNT, поэтому посетитель, приходивший в разные дни
+        периода, учитывается один раз. Погрешность оценки около 0.81%. Дни до создания ссылки не учитываются.
+
+        :param short_link: Сокращенный идентификатор ссылки.
+        :type short_link: str
+        :param user_id: Идентификатор владельца ссылки.
+        :type user_id: uuid.UUID
+        :param start: Первый день периода по UTC.
+        :type start: datetime.date
+        :param end: Последний день периода по UTC включительно.
+        :type end: datetime.date
+        :returns: Оценка количества посетителей или None, если у пользователя нет такой ссылки.
+        :rtype: int | None
+        """
+        async with self.db.db_read_session() as session:
+            query = select(Link.created_at).where(Link.short_link == short_link, Link.owner_id == user_id)
+            created_at = await session.scalar(query)
+
+        if created_at is None:
+            return None
+
+        start = max(start, created_at.astimezone(datetime.UTC).date())
+        keys = [
+            click_counter.get_visitors_key(short_link=short_link, day=start + datetime.timedelta(days=offset))
+            for offset in range((end - start).days + 1)
+        ]
+
+        if not keys:
+            return 0
+
+        async with self.redis.get_client() as client:
+            return await client.pfcount(*keys)
+
+    async def get_trending(self, window: str, limit: int, user_id: uuid.UUID | None = None) -> list[tuple[Link, float]]:
+        """
+        Возвращает самые популярные ссылки за окно вместе с их данными.
+
+        Данные ссылок загружаются одним запросом. Ссылки, удалённые после попадания в рейтинг, отбрасываются,
+        поэтому из рейтинга берётся вдвое больше ссылок, чем запрошено.
+
+        :param window: Название окна: ``hour`` или ``day``.
+        :type window: str
+        :param limit: Количество ссылок.
+        :type limit: int
+        :param user_id: Идентификатор владельца для рейтинга его ссылок или None для общего рейтинга.
+        :type user_id: uuid.UUID | None
+        :returns: Ссылки и их взвешенное количество переходов по убыванию.
+        :rtype: list[tuple[Link, float]]
+        """
+        scope = "all" if user_id is None else f"user:{user_id}"
+        top = await trending_links.get_top(redis=self.redis, scope=scope, window=window, limit=limit * 2)
+
+        if not top:
+            return []
+
+        async with self.db.db_read_session() as session:
+            query = select(Link).where(Link.short_link == any_(bindparam("short_links", type_=ARRAY(String))))
+            if user_id is not None:
+                query = query.where(Link.owner_id == user_id)
+            result = await session.scalars(query, {"short_links": [short_link for short_link, _ in top]})
+            links = {link.short_link: link for link in result.all()}
+
+        return [(links[short_link], score) for short_link, score in top if short_link in links][:limit]
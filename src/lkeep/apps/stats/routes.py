@@ -0,0 +1,137 @@
+"""
+Проект: Lkeep
+Автор: Иван Ашихмин
+Год: 2025
+Специально для проекта "Код на салфетке"
+https://pressanybutton.ru/category/servis-na-fastapi/
+"""
+
+import datetime
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Depends, Query
+from starlette import status
+
+from lkeep.apps.auth.depends import get_current_user
+from lkeep.apps.auth.schemas import UserVerifySchema
+from lkeep.apps.stats.schemas import (
+    ClickSeriesSchema,
+    ClickStatsSchema,
+    TrendingLinkSchema,
+    VisitorStatsSchema,
+)
+from lkeep.apps.stats.services import StatsService
+from lkeep.core.responses import PydanticJSONResponse
+from lkeep.core.settings import settings
+
+stats_router = APIRouter(prefix="/stats", tags=["stats"])
+
+
+@stats_router.get("/clicks", response_model=ClickStatsSchema, status_code=status.HTTP_200_OK)
+async def get_clicks(
+    short_link: str,
+    user: Annotated[UserVerifySchema, Depends(get_current_user)],
+    service: StatsService = Depends(StatsService),
+) -> ClickStatsSchema:
+    """
+    Возвращает количество переходов по ссылке текущего пользователя.
+
+    :param short_link: Короткий идентификатор ссылки.
+    :type short_link: str
+    :param user: Авторизованный пользователь, владеющий ссылкой.
+    :type user: UserVerifySchema
+    :param service: Сервис статистики.
+    :type service: StatsService
+    :returns: Количество переходов по ссылке.
+    :rtype: ClickStatsSchema
+    """
+    return await service.get_clicks(short_link=short_link, user=user)
+
+
+@stats_router.get("/clicks/series", response_model=ClickSeriesSchema, status_code=status.HTTP_200_OK)
+async def get_click_series(
+    short_link: str,
+    user: Annotated[UserVerifySchema, Depends(get_current_user)],
+    granularity: Literal["hour", "day"] = "hour",
+    start: datetime.datetime | None = None,
+    end: datetime.datetime | None = None,
+    service: StatsService = Depends(StatsService),
+) -> PydanticJSONResponse:
+    """
+    Возвращает количество переходов по ссылке текущего пользователя по часам или суткам.
+
+    :param short_link: Короткий идентификатор ссылки.
+    :type short_link: str
+    :param user: Авторизованный пользователь, владеющий ссылкой.
+    :type user: UserVerifySchema
+    :param granularity: Шаг ряда.
+    :type granularity: Literal["hour", "day"]
+    :param start: Начало периода.
+    :type start: datetime.datetime | None
+    :param end: Конец периода.
+    :type end: datetime.datetime | None
+    :param service: Сервис статистики.
+    :type service: StatsService
+    :returns: Временной ряд переходов.
+    :rtype: PydanticJSONResponse
+    """
+    return PydanticJSONResponse(
+        content=await service.get_click_series(
+            short_link=short_link, user=user, granularity=granularity, start=start, end=end
+        )
+    )
+
+
+@stats_router.get("/visitors", response_model=VisitorStatsSchema, status_code=status.HTTP_200_OK)
+async def get_visitors(
+    short_link: str,
+    user: Annotated[UserVerifySchema, Depends(get_current_user)],
+    start: datetime.date | None = None,
+    end: datetime.date | None = None,
+    service: StatsService = Depends(StatsService),
+) -> VisitorStatsSchema:
+    """
+    Возвращает оценку количества уникальных посетителей ссылки текущего пользователя за период.
+
+    :param short_link: Короткий идентификатор ссылки.
+    :type short_link: str
+    :param user: Авторизованный пользователь, владеющий ссылкой.
+    :type user: UserVerifySchema
+    :param start: Первый день периода.
+    :type start: datetime.date | None
+    :param end: Последний день периода включительно.
+    :type end: datetime.date | None
+    :param service: Сервис статистики.
+    :type service: StatsService
+    :returns: Оценка количества посетителей.
+    :rtype: VisitorStatsSchema
+    """
+    return await service.get_visitors(short_link=short_link, user=user, start=start, end=end)
+
+
+@stats_router.get("/trending", response_model=list[TrendingLinkSchema], status_code=status.HTTP_200_OK)
+async def get_trending(
+    user: Annotated[UserVerifySchema, Depends(get_current_user)],
+    window: Literal["hour", "day"] = "hour",
+    scope: Literal["all", "user"] = "user",
+    limit: Annotated[int, Query(ge=1, le=settings.stats_settings.stats_trending_max_limit)] = 10,
+    service: StatsService = Depends(StatsService),
+) -> PydanticJSONResponse:
+    """
+    Возвращает самые популярные ссылки за последний час или сутки.
+
+    :param user: Авторизованный пользователь.
+    :type user: UserVerifySchema
+    :param window: Окно рейтинга.
+    :type window: Literal["hour", "day"]
+    :param scope: Только ссылки текущего пользователя или все ссылки; общий рейтинг доступен только
+        суперпользователям.
+    :type scope: Literal["all", "user"]
+    :param limit: Количество ссылок.
+    :type limit: int
+    :param service: Сервис статистики.
+    :type service: StatsService
+    :returns: Ссылки по убыванию популярности.
+    :rtype: PydanticJSONResponse
+    """
+    return PydanticJSONResponse(content=await service.get_trending(user=user, window=window, scope=scope, limit=limit))
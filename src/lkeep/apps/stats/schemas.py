@@ -0,0 +1,97 @@
+"""
+Проект: Lkeep
+Автор: Иван Ашихмин
+Год: 2025
+Специально для проекта "Код на салфетке"
+https://pressanybutton.ru/category/servis-na-fastapi/
+"""
+
+import datetime
+from typing import Literal
+
+from pydantic import BaseModel
+
+
+class ClickStatsSchema(BaseModel):
+    """
+    Схема количества переходов по ссылке.
+
+    :ivar short_link: Сокращенный идентификатор ссылки.
+    :type short_link: str
+    :ivar clicks: Количество переходов.
+    :type clicks: int
+    """
+
+    short_link: str
+    clicks: int
+
+
+class ClickPointSchema(BaseModel):
+    """
+    Схема количества переходов за период временного ряда.
+
+    :ivar bucket: Начало периода.
+    :type bucket: datetime.datetime
+    :ivar clicks: Количество переходов за период.
+    :type clicks: int
+    """
+
+    bucket: datetime.datetime
+    clicks: int
+
+
+class ClickSeriesSchema(BaseModel):
+    """
+    Схема временного ряда переходов по ссылке.
+
+    :ivar short_link: Сокращенный идентификатор ссылки.
+    :type short_link: str
+    :ivar granularity: Шаг ряда.
+    :type granularity: Literal["hour", "day"]
+    :ivar points: Периоды с ненулевым количеством переходов в порядке возрастания.
+    :type points: list[ClickPointSchema]
+    """
+
+    short_link: str
+    granularity: Literal["hour", "day"]
+    points: list[ClickPointSchema]
+
+
+class VisitorStatsSchema(BaseModel):
+    """
+    Схема оценки количества уникальных посетителей ссылки за период.
+
+    :ivar short_link: Сокращенный идентификатор ссылки.
+    :type short_link: str
+    :ivar start: Первый день периода по UTC.
+    :type start: datetime.date
+    :ivar end: Последний день периода по UTC включительно.
+    :type end: datetime.date
+    :ivar visitors: Оценка количества уникальных посетителей.
+    :type visitors: int
+    """
+
+    short_link: str
+    start: datetime.date
+    end: datetime.date
+    visitors: int
+
+
+class TrendingLinkSchema(BaseModel):
+    """
+    Схема ссылки в рейтинге популярных ссылок.
+
+    :ivar short_link: Сокращенный идентификатор ссылки.
+    :type short_link: str
+    :ivar full_link: Полная ссылка.
+    :type full_link: str
+    :ivar created_at: Время создания ссылки.
+    :type created_at: datetime.datetime
+    :ivar score: Количество переходов за окно, взвешенное по давности.
+    :type score: float
+    """
+
+    short_link: str
+    full_link: str
+    created_at: datetime.datetime
+    score: float
@@ -0,0 +1,184 @@
+"""
+Проект: Lkeep
+Автор: Иван Ашихмин
+Год: 2025
+Специально для проекта "Код на салфетке"
+https://pressanybutton.ru/category/servis-na-fastapi/
+"""
+
+import datetime
+
+from fastapi import Depends, HTTPException
+from starlette import status
+
+from lkeep.apps.auth.managers import UserManager
+from lkeep.apps.auth.schemas import UserVerifySchema
+from lkeep.apps.stats.managers import StatsManager
+from lkeep.apps.stats.schemas import (
+    ClickPointSchema,
+    ClickSeriesSchema,
+    ClickStatsSchema,
+    TrendingLinkSchema,
+    VisitorStatsSchema,
+)
+from lkeep.core.settings import settings
+
+
+class StatsService:
+    """
+    Сервисный слой статистики переходов по ссылкам.
+
+    :ivar default_periods: Длина периода временного ряда по умолчанию для каждого шага.
+    :type default_periods: dict[str, datetime.timedelta]
+    """
+
+    default_periods = {"hour": datetime.timedelta(days=1), "day": datetime.timedelta(days=30)}
+
+    def __init__(
+        self, manager: StatsManager = Depends(StatsManager), user_manager: UserManager = Depends(UserManager)
+    ) -> None:
+        """
+        Создает сервис со связанным менеджером статистики.
+
+        :param manager: Менеджер, читающий счётчики переходов.
+        :type manager: StatsManager
+        :param user_manager: Менеджер пользователей, проверяющий права на общий рейтинг.
+        :type user_manager: UserManager
+        """
+        self.manager = manager
+        self.user_manager = user_manager
+
+    async def get_clicks(self, short_link: str, user: UserVerifySchema) -> ClickStatsSchema:
+        """
+        Возвращает количество переходов по ссылке пользователя.
+
+        :param short_link: Сокращенный идентификатор ссылки.
+        :type short_link: str
+        :param user: Владелец ссылки.
+        :type user: UserVerifySchema
+        :raises HTTPException: Если у пользователя нет такой ссылки.
+        :returns: Количество переходов.
+        :rtype: ClickStatsSchema
+        """
+        clicks = await self.manager.get_clicks(short_link=short_link, user_id=user.id)
+
+        if clicks is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Link not found")
+
+        return ClickStatsSchema(short_link=short_link, clicks=clicks)
+
+    async def get_click_series(
+        self,
+        short_link: str,
+        user: UserVerifySchema,
+        granularity: str,
+        start: datetime.datetime | None = None,
+        end: datetime.datetime | None = None,
+    ) -> ClickSeriesSchema:
+        """
+        Возвращает временной ряд переходов по ссылке пользователя.
+
+        Время без часового пояса считается временем по UTC.
+
+        :param short_link: Сокращенный идентификатор ссылки.
+        :type short_link: str
+        :param user: Владелец ссылки.
+        :type user: UserVerifySchema
+        :param granularity: Шаг ряда: ``hour`` или ``day``.
+        :type granularity: str
+        :param start: Начало периода; по умолчанию отсчитывается от конца на длину периода по умолчанию.
+        :type start: datetime.datetime | None
+        :param end: Конец периода; по умолчанию текущее время.
+        :type end: datetime.datetime | None
+        :raises HTTPException: Если период пуст или у пользователя нет такой ссылки.
+        :returns: Временной ряд переходов.
+        :rtype: ClickSeriesSchema
+        """
+        end = end or datetime.datetime.now(datetime.UTC)
+        start = start or end - self.default_periods[granularity]
+        start, end = (value if value.tzinfo else value.replace(tzinfo=datetime.UTC) for value in (start, end))
+
+        if start >= end:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid period")
+
+        points = await self.manager.get_click_series(
+            short_link=short_link, user_id=user.id, granularity=granularity, start=start, end=end
+        )
+
+        if points is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Link not found")
+
+        return ClickSeriesSchema(
+            short_link=short_link,
+            granularity=granularity,
+            points=[ClickPointSchema(bucket=bucket, clicks=clicks) for bucket, clicks in points],
+        )
+
+    async def get_visitors(
+        self,
+        short_link: str,
+        user: UserVerifySchema,
+        start: datetime.date | None = None,
+        end: datetime.date | None = None,
+    ) -> VisitorStatsSchema:
+        """
+        Возвращает оценку количества уникальных посетителей ссылки пользователя за период.
+
+        :param short_link: Сокращенный идентификатор ссылки.
+        :type short_link: str
+        :param user: Владелец ссылки.
+        :type user: UserVerifySchema
+        :param start: Первый день периода по UTC; по умолчанию за 29 дней до последнего.
+        :type start: datetime.date | None
+        :param end: Последний день периода по UTC включительно; по умолчанию текущий.
+        :type end: datetime.date | None
+        :raises HTTPException: Если период пуст или слишком длинный, либо у пользователя нет такой ссылки.
+        :returns: Оценка количества посетителей.
+        :rtype: VisitorStatsSchema
+        """
+        end = end or datetime.datetime.now(datetime.UTC).date()
+        start = start or end - datetime.timedelta(days=29)
+
+        if not 0 <= (end - start).days < settings.stats_settings.stats_visitor_max_days:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid period")
+
+        visitors = await self.manager.get_visitors(short_link=short_link, user_id=user.id, start=start, end=end)
+
+        if visitors is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Link not found")
+
+        return VisitorStatsSchema(short_link=short_link, start=start, end=end, visitors=visitors)
+
+    async def get_trending(
+        self, user: UserVerifySchema, window: str, scope: str, limit: int
+    ) -> list[TrendingLinkSchema]:
+        """
+        Возвращает самые популярные ссылки за окно.
+
+        Общий рейтинг раскрывает полные ссылки всех пользователей, поэтому доступен только суперпользователям.
+
+        :param user: Текущий пользователь.
+        :type user: UserVerifySchema
+        :param window: Название окна: ``hour`` или ``day``.
+        :type window: str
+        :param scope: ``all`` для всех ссылок или ``user`` для ссылок текущего пользователя.
+        :type scope: str
+        :param limit: Количество ссылок.
+        :type limit: int
+        :raises HTTPException: Если общий рейтинг запрашивает не суперпользователь.
+        :returns: Ссылки по убыванию популярности.
+        :rtype: list[TrendingLinkSchema]
+        """
+        if scope == "all" and not await self.user_manager.is_superuser(user_id=user.id):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+
+        trending = await self.manager.get_trending(
+            window=window, limit=limit, user_id=user.id if scope == "user" else None
+        )
+
+        return [
+            TrendingLinkSchema(
+                short_link=link.short_link, full_link=link.full_link, created_at=link.created_at, score=score
+            )
+            for link, score in trending
+        ]
@@ -0,0 +1,56 @@
+"""
+Проект: Lkeep
+Автор: Иван Ашихмин
+Год: 2025
+Специально для проекта "Код на салфетке"
+https://pressanybutton.ru/category/servis-na-fastapi/
+"""
+
+from celery import shared_task
+
+from lkeep.apps.stats.managers import StatsManager
+from lkeep.core.task_runner import run_task
+
+
+@shared_task
+def flush_click_counters() -> int:
+    """
+    Переносит накопленные в Redis переходы по ссылкам в базу данных.
+
+    :returns: Количество записанных переходов.
+    :rtype: int
+    """
+    return run_task(lambda db, redis: StatsManager(db=db, redis=redis).flush_clicks())
+
+
+@shared_task
+def flush_click_events() -> int:
+    """
+    Переносит накопленные в Redis события переходов в секционированную таблицу событий.
+
+    :returns: Количество записанных событий.
+    :rtype: int
+    """
+    return run_task(lambda db, redis: StatsManager(db=db, redis=redis).flush_click_events())
+
+
+@shared_task
+def maintain_click_partitions() -> int:
+    """
+    Создаёт секции событий переходов на ближайшие дни и удаляет устаревшие.
+
+    :returns: Количество удалённых секций.
+    :rtype: int
+    """
+    return run_task(lambda db, redis: StatsManager(db=db, redis=redis).maintain_click_partitions())
+
+
+@shared_task
+def rollup_clicks() -> int:
+    """
+    Пересчитывает почасовые и посуточные агрегаты переходов по свежим событиям.
+
+    :returns: Количество обновлённых почасовых агрегатов.
+    :rtype: int
+    """
+    return run_task(lambda db, redis: StatsManager(db=db, redis=redis).rollup_clicks())
@@ -0,0 +1,123 @@
+"""
+Проект: Lkeep
+Автор: Иван Ашихмин
+Год: 2025
+Специально для проекта "Код на салфетке"
+https://pressanybutton.ru/category/servis-na-fastapi/
+"""
+
+import time
+from collections.abc import Mapping
+
+from redis.asyncio.client import Pipeline
+
+from lkeep.core.core_dependency.redis_dependency import RedisDependency
+from lkeep.core.settings import settings
+
+
+class TrendingLinks:
+    """
+    Рейтинг популярных коротких ссылок на сортированных множествах Redis.
+
+    Переходы прибавляются к множеству текущего временного интервала. Рейтинг за окно строится командой
+    ZUNIONSTORE по интервалам окна с весами, убывающими с возрастом интервала, и кэшируется на короткое время,
+    поэтому запрос рейтинга никогда не агрегирует отдельные переходы.
+
+    Область рейтинга - ``all`` для всех ссылок или ``user:<идентификатор>`` для ссылок одного владельца.
+
+    :ivar key_prefix: Префикс ключей рейтинга в Redis.
+    :type key_prefix: str
+    :ivar windows: Длина окна рейтинга в секундах по его названию.
+    :type windows: dict[str, int]
+    """
+
+    key_prefix = "stats:trending"
+    windows = {"hour": 3600, "day": 86400}
+
+    def __init__(self, bucket_seconds: int, decay: float, cache_ttl: int) -> None:
+        """
+        Создаёт рейтинг с заданной длиной интервала и затуханием.
+
+        :param bucket_seconds: Длина временного интервала в секундах.
+        :type bucket_seconds: int
+        :param decay: Вес самого старого интервала окна относительно текущего.
+        :type decay: float
+        :param cache_ttl: Время хранения объединённого рейтинга в секундах.
+        :type cache_ttl: int
+        """
+        self.bucket_seconds = bucket_seconds
+        self.decay = decay
+        self.cache_ttl = cache_ttl
+        self.bucket_ttl = max(self.windows.values()) + bucket_seconds
+
+    def _get_bucket_key(self, scope: str, bucket: int) -> str:
+        """
+        Формирует ключ множества временного интервала.
+
+        :param scope: Область рейтинга.
+        :type scope: str
+        :param bucket: Номер интервала от начала эпохи.
+        :type bucket: int
+        :returns: Ключ в Redis.
+        :rtype: str
+        """
+        return f"{self.key_prefix}:{scope}:{bucket}"
+
+    def queue_increment(self, pipe: Pipeline, scope: str, clicks: Mapping[str, int]) -> None:
+        """
+        Добавляет в конвейер увеличение счётчиков ссылок в текущем интервале.
+
+        :param pipe: Конвейер Redis.
+        :type pipe: Pipeline
+        :param scope: Область рейтинга.
+        :type scope: str
+        :param clicks: Количество переходов по каждой короткой ссылке.
+        :type clicks: Mapping[str, int]
+        :returns: None
+        """
+        if not clicks:
+            return
+
+        key = self._get_bucket_key(scope=scope, bucket=int(time.time() // self.bucket_seconds))
+        for short_link, count in clicks.items():
+            pipe.zincrby(key, count, short_link)
+        pipe.expire(key, self.bucket_ttl)
+
+    async def get_top(self, redis: RedisDependency, scope: str, window: str, limit: int) -> list[tuple[str, float]]:
+        """
+        Возвращает самые популярные ссылки за окно.
+
+        :param redis: Зависимость Redis.
+        :type redis: RedisDependency
+        :param scope: Область рейтинга.
+        :type scope: str
+        :param window: Название окна: ``hour`` или ``day``.
+        :type window: str
+        :param limit: Количество ссылок.
+        :type limit: int
+        :returns: Короткие ссылки и их взвешенное количество переходов по убыванию.
+        :rtype: list[tuple[str, float]]
+        """
+        key = f"{self.key_prefix}:{scope}:{window}"
+        buckets = self.windows[window] // self.bucket_seconds
+
+        async with redis.get_client() as client:
+            if not await client.exists(key):
+                current_bucket = int(time.time() // self.bucket_seconds)
+                weights = {
+                    self._get_bucket_key(scope=scope, bucket=current_bucket - age): self.decay ** (age / buckets)
+                    for age in range(buckets)
+                }
+                async with client.pipeline(transaction=True) as pipe:
+                    pipe.zunionstore(key, weights)
+                    pipe.expire(key, self.cache_ttl)
+                    await pipe.execute()
+
+            return await client.zrevrange(key, 0, limit - 1, withscores=True)
+
+
+trending_links = TrendingLinks(
+    bucket_seconds=settings.stats_settings.stats_trending_bucket_seconds,
+    decay=settings.stats_settings.stats_trending_decay,
+    cache_ttl=settings.stats_settings.stats_trending_cache_ttl,
+)
@@ -12,4 +12,31 @@ from lkeep.core.settings import settings
 
 celery_app = Celery(main="lkeep", broker=settings.redis_settings.redis_url, backend=settings.redis_settings.redis_url)
 
-celery_app.autodiscover_tasks(packages=["lkeep.apps"])
+celery_app.autodiscover_tasks(packages=["lkeep.apps.auth", "lkeep.apps.links", "lkeep.apps.stats"])
+
+celery_app.conf.beat_schedule = {
+    "refill-short-code-pool": {
+        "task": "lkeep.apps.links.tasks.refill_short_code_pool",
+        "schedule": settings.links_settings.link_code_pool_refill_interval,
+    },
+    "purge-expired-links": {
+        "task": "lkeep.apps.links.tasks.purge_expired_links",
+        "schedule": settings.links_settings.link_expired_purge_interval,
+    },
+    "flush-click-counters": {
+        "task": "lkeep.apps.stats.tasks.flush_click_counters",
+        "schedule": settings.stats_settings.stats_click_db_flush_interval,
+    },
+    "flush-click-events": {
+        "task": "lkeep.apps.stats.tasks.flush_click_events",
+        "schedule": settings.stats_settings.stats_click_db_flush_interval,
+    },
+    "maintain-click-partitions": {
+        "task": "lkeep.apps.stats.tasks.maintain_click_partitions",
+        "schedule": settings.stats_settings.stats_click_partition_interval,
+    },
+    "rollup-clicks": {
+        "task": "lkeep.apps.stats.tasks.rollup_clicks",
+        "schedule": settings.stats_settings.stats_click_rollup_interval,
+    },
+}
@@ -6,7 +6,13 @@
 https://pressanybutton.ru/category/servis-na-fastapi/
 """
 
+import time
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
     AsyncEngine,
     AsyncSession,
     async_sessionmaker,
@@ -19,14 +25,94 @@ from lkeep.core.settings import settings
 class DBDependency:
     """
     Класс для управления зависимостями базы данных, используя SQLAlchemy.
+
+    Экземпляр хранит единственный движок и фабрику сессий на процесс. Движок создаётся при старте приложения
+    и освобождается при его остановке, поэтому пул соединений переиспользуется всеми запросами.
+
+    Если заданы реплики, для каждой создаётся свой движок, и соединения только для чтения выдаются по очереди
+    из реплик. Реплика, к которой не удалось подключиться, в том числе за ``db_replica_connect_timeout`` или
+    за время ожидания свободного соединения пула, исключается из очереди на время ``db_replica_retry_interval``;
+    если доступных реплик нет, соединение открывается с основной базой.
+
+    :ivar _engine: Асинхронный движок SQLAlchemy с пулом соединений.
+    :type _engine: AsyncEngine | None
+    :ivar _session_factory: Фабрика асинхронных сессий, привязанная к движку.
+    :type _session_factory: async_sessionmaker[AsyncSession] | None
+    :ivar _replica_engines: Движки реплик.
+    :type _replica_engines: list[AsyncEngine]
+    :ivar _replica_unavailable_until: Момент по монотонным часам, до которого реплика исключена из очереди.
+    :type _replica_unavailable_until: list[float]
+    :ivar _next_replica: Номер реплики, с которой начнётся выбор для следующей сессии.
+    :type _next_replica: int
     """
 
     def __init__(self) -> None:
         """
         Инициализирует экземпляр класса, отвечающего за взаимодействие с асинхронной базой данных.
         """
-        self._engine = create_async_engine(url=settings.db_settings.db_url, echo=settings.db_settings.db_echo)
+        self._engine: AsyncEngine | None = None
+        self._session_factory: async_sessionmaker[AsyncSession] | None = None
+        self._replica_engines: list[AsyncEngine] = []
+        self._replica_unavailable_until: list[float] = []
+        self._next_replica = 0
+
+    def init_engine(self) -> None:
+        """
+        Создаёт движок и фабрику сессий, если они ещё не созданы.
+
+        :returns: None
+        """
+        if self._engine is not None:
+            return
+
+        db_settings = settings.db_settings
+        self._engine = self._create_engine(url=db_settings.db_url)
         self._session_factory = async_sessionmaker(bind=self._engine, expire_on_commit=False, autocommit=False)
+        self._replica_engines = [
+            self._create_engine(url=url, connect_args={"timeout": db_settings.db_replica_connect_timeout})
+            for url in db_settings.db_replica_urls
+        ]
+        self._replica_unavailable_until = [0.0] * len(self._replica_engines)
+
+    @staticmethod
+    def _create_engine(url: str, connect_args: dict | None = None) -> AsyncEngine:
+        """
+        Создаёт движок с параметрами пула из настроек.
+
+        :param url: Строка подключения к базе данных.
+        :type url: str
+        :param connect_args: Дополнительные параметры подключения драйвера.
+        :type connect_args: dict | None
+        :returns: Асинхронный движок SQLAlchemy.
+        :rtype: AsyncEngine
+        """
+        db_settings = settings.db_settings
+
+        return create_async_engine(
+            url=url,
+            echo=db_settings.db_echo,
+            pool_size=db_settings.db_pool_size,
+            max_overflow=db_settings.db_max_overflow,
+            pool_timeout=db_settings.db_pool_timeout,
+            pool_recycle=db_settings.db_pool_recycle,
+            pool_pre_ping=db_settings.db_pool_pre_ping,
+            connect_args=connect_args or {},
+        )
+
+    async def dispose_engine(self) -> None:
+        """
+        Закрывает все соединения пула.
+
+        Сам движок остаётся пригодным к использованию: при следующем обращении пул будет создан заново.
+
+        :returns: None
+        """
+        if self._engine is None:
+            return
+
+        await self._engine.dispose()
+        for engine in self._replica_engines:
+            await engine.dispose()
 
     @property
     def db_session(self) -> async_sessionmaker[AsyncSession]:
@@ -36,12 +122,89 @@ class DBDependency:
         :returns: Возвращает фабрику асинхронных сессий.
         :rtype: async_sessionmaker[AsyncSession]
         """
+        self.init_engine()
         return self._session_factory
 
+    @asynccontextmanager
+    async def db_read_connection(self) -> AsyncGenerator[AsyncConnection]:
+        """
+        Открывает соединение для запросов только на чтение.
+
+        Реплики перебираются по кругу, начиная со следующей после выбранной в прошлый раз. Соединение берётся
+        сразу, чтобы недоступная реплика была пропущена до выполнения запросов. Данные реплик могут отставать
+        от основной базы, поэтому чтение сразу после записи должно идти через :attr:`db_session`.
+
+        :returns: Асинхронный генератор, выдающий соединение с репликой или основной базой.
+        :rtype: AsyncGenerator[AsyncConnection]
+        """
+        self.init_engine()
+        replicas_count = len(self._replica_engines)
+        start = self._next_replica
+        self._next_replica = (start + 1) % max(replicas_count, 1)
+
+        for offset in range(replicas_count):
+            index = (start + offset) % replicas_count
+            if self._replica_unavailable_until[index] > time.monotonic():
+                continue
+
+            try:
+                connection = await self._replica_engines[index].connect()
+            except (SQLAlchemyError, OSError, TimeoutError):
+                self._replica_unavailable_until[index] = (
+                    time.monotonic() + settings.db_settings.db_replica_retry_interval
+                )
+                continue
+
+            try:
+                yield connection
+            finally:
+                await connection.close()
+            return
+
+        async with self._engine.connect() as connection:
+            yield connection
+
+    @asynccontextmanager
+    async def db_read_session(self) -> AsyncGenerator[AsyncSession]:
+        """
+        Открывает сессию для запросов только на чтение поверх соединения из :meth:`db_read_connection`.
+
+        :returns: Асинхронный генератор, выдающий сессию реплики или основной базы.
+        :rtype: AsyncGenerator[AsyncSession]
+        """
+        async with self.db_read_connection() as connection, self._session_factory(bind=connection) as session:
+            yield session
+
     @property
     def db_engine(self) -> AsyncEngine:
+        """
+        Возвращает общий асинхронный движок базы данных.
+
+        :returns: Асинхронный движок SQLAlchemy.
+        :rtype: AsyncEngine
+        """
+        self.init_engine()
         return self._engine
 
 
+db_dependency = DBDependency()
+
+
+def get_db_dependency() -> DBDependency:
+    """
+    Возвращает общий для процесса экземпляр зависимости базы данных.
+
+    :returns: Зависимость базы данных с общим пулом соединений.
+    :rtype: DBDependency
+    """
+    return db_dependency
+
+
 def get_db_engine() -> AsyncEngine:
-    return DBDependency().db_engine
+    """
+    Возвращает общий асинхронный движок базы данных.
+
+    :returns: Асинхронный движок SQLAlchemy.
+    :rtype: AsyncEngine
+    """
+    return db_dependency.db_engine
@@ -9,7 +9,7 @@ https://pressanybutton.ru/category/servis-na-fastapi/
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
 
-from redis.asyncio import ConnectionPool, Redis
+from redis.asyncio import BlockingConnectionPool, ConnectionPool, Redis
 
 from lkeep.core.settings import settings
 
@@ -18,10 +18,15 @@ class RedisDependency:
     """
     Класс, предоставляющий инструменты для работы с Redis через асинхронный клиент.
 
+    Экземпляр хранит один пул соединений и один клиент на процесс. Пул создаётся при старте приложения
+    и закрывается при его остановке.
+
     :ivar _url: URL подключения к Redis серверу.
     :type _url: str
     :ivar _pool: Пул соединений для управления соединениями с Redis.
-    :type _pool: ConnectionPool
+    :type _pool: ConnectionPool | None
+    :ivar _client: Клиент Redis, работающий поверх общего пула.
+    :type _client: Redis | None
     """
 
     def __init__(self) -> None:
@@ -29,27 +34,88 @@ class RedisDependency:
         Инициализирует экземпляр класса для работы с Redis.
         """
         self._url = settings.redis_settings.redis_url
-        self._pool: ConnectionPool = self._init_pool()
+        self._pool: ConnectionPool | None = None
+        self._client: Redis | None = None
 
     def _init_pool(self) -> ConnectionPool:
         """
         Инициализирует пул соединений Redis.
 
+        При исчерпании пула запрос ожидает освобождения соединения, а не завершается ошибкой.
+
         :returns: Пул соединений для работы с Redis.
         :rtype: ConnectionPool
         """
-        return ConnectionPool.from_url(url=self._url, encoding="utf-8", decode_responses=True)
+        redis_settings = settings.redis_settings
+        return BlockingConnectionPool.from_url(
+            url=self._url,
+            encoding="utf-8",
+            decode_responses=True,
+            max_connections=redis_settings.redis_max_connections,
+            timeout=redis_settings.redis_socket_timeout,
+            socket_timeout=redis_settings.redis_socket_timeout,
+            socket_connect_timeout=redis_settings.redis_socket_connect_timeout,
+            health_check_interval=redis_settings.redis_health_check_interval,
+        )
+
+    def init_pool(self) -> None:
+        """
+        Создаёт пул соединений и клиент, если они ещё не созданы.
+
+        :returns: None
+        """
+        if self._pool is not None:
+            return
+
+        self._pool = self._init_pool()
+        self._client = Redis(connection_pool=self._pool)
+
+    async def close_pool(self) -> None:
+        """
+        Закрывает клиент и все соединения пула.
+
+        :returns: None
+        """
+        if self._pool is None:
+            return
+
+        await self._client.aclose()
+        await self._pool.aclose()
+        self._pool = None
+        self._client = None
+
+    @property
+    def client(self) -> Redis:
+        """
+        Возвращает общий клиент Redis.
+
+        :returns: Клиент Redis, работающий поверх общего пула.
+        :rtype: Redis
+        """
+        self.init_pool()
+        return self._client
 
     @asynccontextmanager
     async def get_client(self) -> AsyncGenerator[Redis]:
         """
         Получает клиентскую сессию Redis для взаимодействия с базой данных.
 
+        Клиент общий для процесса и не закрывается при выходе из контекста.
+
         :returns: Асинхронный генератор клиента Redis.
         :rtype: AsyncGenerator[Redis, None]
         """
-        redis_client = Redis(connection_pool=self._pool)
-        try:
-            yield redis_client
-        finally:
-            await redis_client.aclose()
+        yield self.client
+
+
+redis_dependency = RedisDependency()
+
+
+def get_redis_dependency() -> RedisDependency:
+    """
+    Возвращает общий для процесса экземпляр зависимости Redis.
+
+    :returns: Зависимость Redis с общим пулом соединений.
+    :rtype: RedisDependency
+    """
+    return redis_dependency
@@ -0,0 +1,33 @@
+"""
+Проект: Lkeep
+Автор: Иван Ашихмин
+Год: 2025
+Специально для проекта "Код на салфетке"
+https://pressanybutton.ru/category/servis-na-fastapi/
+"""
+
+from typing import Any
+
+from pydantic_core import to_json
+from starlette.responses import JSONResponse
+
+
+class PydanticJSONResponse(JSONResponse):
+    """
+    JSON-ответ, сериализуемый ядром Pydantic.
+
+    Схемы, их списки, UUID и даты кодируются сразу в байты без промежуточных словарей и модуля :mod:`json`.
+    Обработчик, возвращающий такой ответ с готовой схемой, не проходит повторную валидацию по ``response_model``,
+    который в этом случае используется только для документации.
+    """
+
+    def render(self, content: Any) -> bytes:
+        """
+        Сериализует содержимое ответа в JSON.
+
+        :param content: Схема, список схем или любое значение, поддерживаемое Pydantic.
+        :type content: Any
+        :returns: Тело ответа в кодировке UTF-8.
+        :rtype: bytes
+        """
+        return to_json(content)
@@ -6,7 +6,9 @@
 https://pressanybutton.ru/category/servis-na-fastapi/
 """
 
-from pydantic import SecretStr
+from typing import Literal
+
+from pydantic import SecretStr, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -26,6 +28,23 @@ class DBSettings(BaseSettings):
     :type db_port: int
     :ivar db_echo: Флаг для вывода отладочной информации о запросах к базе данных.
     :type db_echo: bool
+    :ivar db_pool_size: Количество постоянных соединений в пуле.
+    :type db_pool_size: int
+    :ivar db_max_overflow: Количество дополнительных соединений, открываемых сверх размера пула при пиковой нагрузке.
+    :type db_max_overflow: int
+    :ivar db_pool_timeout: Время ожидания свободного соединения из пула в секундах.
+    :type db_pool_timeout: int
+    :ivar db_pool_recycle: Время жизни соединения в секундах, после которого оно пересоздаётся.
+    :type db_pool_recycle: int
+    :ivar db_pool_pre_ping: Флаг проверки соединения перед выдачей его из пула.
+    :type db_pool_pre_ping: bool
+    :ivar db_replica_urls: Строки подключения к репликам для запросов только на чтение.
+    :type db_replica_urls: list[str]
+    :ivar db_replica_retry_interval: Время в секундах, на которое недоступная реплика исключается из очереди.
+    :type db_replica_retry_interval: int
+    :ivar db_replica_connect_timeout: Время ожидания подключения к реплике в секундах, после которого запрос
+        переключается на следующую реплику или основную базу.
+    :type db_replica_connect_timeout: float
     """
 
     db_name: str
@@ -34,6 +53,14 @@ class DBSettings(BaseSettings):
     db_host: str
     db_port: int
     db_echo: bool
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: int = 30
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_replica_urls: list[str] = []
+    db_replica_retry_interval: int = 30
+    db_replica_connect_timeout: float = 5.0
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf8", extra="ignore")
 
@@ -82,11 +109,23 @@ class RedisSettings(BaseSettings):
     :type redis_port: int
     :ivar redis_db: Номер базы данных для использования в Redis.
     :type redis_db: int
+    :ivar redis_max_connections: Максимальное количество соединений в пуле.
+    :type redis_max_connections: int
+    :ivar redis_socket_timeout: Таймаут операций чтения и записи в секундах.
+    :type redis_socket_timeout: float
+    :ivar redis_socket_connect_timeout: Таймаут установки соединения в секундах.
+    :type redis_socket_connect_timeout: float
+    :ivar redis_health_check_interval: Интервал проверки простаивающих соединений в секундах.
+    :type redis_health_check_interval: int
     """
 
     redis_host: str
     redis_port: int
     redis_db: int
+    redis_max_connections: int = 50
+    redis_socket_timeout: float = 5.0
+    redis_socket_connect_timeout: float = 5.0
+    redis_health_check_interval: int = 30
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf8", extra="ignore")
 
@@ -101,6 +140,205 @@ class RedisSettings(BaseSettings):
         return f"redis://{self.redis_host}:{self.redis_port}/{self.redis_db}"
 
 
+class LinksSettings(BaseSettings):
+    """
+    Класс для настройки работы с короткими ссылками.
+
+    :ivar link_cache_ttl: Время жизни записи о найденной ссылке в кэше Redis в секундах.
+    :type link_cache_ttl: int
+    :ivar link_negative_cache_ttl: Время жизни записи об отсутствующей ссылке в кэше Redis в секундах.
+    :type link_negative_cache_ttl: int
+    :ivar link_limited_cache_ttl: Время жизни записи о ссылке с ограничением переходов в кэшах Redis и процесса
+        в секундах.
+    :type link_limited_cache_ttl: int
+    :ivar link_local_cache_size: Максимальное количество записей в кэше ссылок внутри процесса.
+    :type link_local_cache_size: int
+    :ivar link_local_cache_ttl: Время жизни записи о найденной ссылке в кэше процесса в секундах.
+    :type link_local_cache_ttl: int
+    :ivar link_local_negative_cache_ttl: Время жизни записи об отсутствующей ссылке в кэше процесса в секундах.
+    :type link_local_negative_cache_ttl: int
+    :ivar link_redirect_status_code: Код ответа при перенаправлении по короткой ссылке (301 или 302).
+    :type link_redirect_status_code: Literal[301, 302]
+    :ivar link_bloom_capacity: Ожидаемое количество коротких ссылок, на которое рассчитан фильтр Блума.
+    :type link_bloom_capacity: int
+    :ivar link_bloom_error_rate: Допустимая доля ложноположительных ответов фильтра Блума.
+    :type link_bloom_error_rate: float
+    :ivar link_code_pool_size: Количество заранее сгенерированных свободных коротких ссылок, поддерживаемое в пуле.
+    :type link_code_pool_size: int
+    :ivar link_code_pool_batch_size: Количество коротких ссылок, генерируемых и проверяемых за одну итерацию пополнения.
+    :type link_code_pool_batch_size: int
+    :ivar link_code_pool_refill_interval: Интервал периодического пополнения пула в секундах.
+    :type link_code_pool_refill_interval: int
+    :ivar link_code_strategy: Способ получения новых коротких ссылок: пул случайных кодов (pool) или счётчик (counter).
+    :type link_code_strategy: str
+    :ivar link_code_block_size: Количество значений счётчика, резервируемых процессом за одно обращение к базе данных.
+    :type link_code_block_size: int
+    :ivar link_code_obfuscate: Переставлять ли значения счётчика, чтобы короткие ссылки не шли подряд.
+    :type link_code_obfuscate: bool
+    :ivar link_bulk_max_size: Максимальное количество ссылок в одном запросе на массовое создание.
+    :type link_bulk_max_size: int
+    :ivar link_bulk_chunk_size: Количество строк в одной команде INSERT при массовом создании ссылок.
+    :type link_bulk_chunk_size: int
+    :ivar link_page_size: Количество ссылок на странице списка ссылок пользователя по умолчанию.
+    :type link_page_size: int
+    :ivar link_page_max_size: Максимальное количество ссылок на странице списка ссылок пользователя.
+    :type link_page_max_size: int
+    :ivar link_export_batch_size: Количество строк, получаемых из базы данных за одну выборку при выгрузке ссылок.
+    :type link_export_batch_size: int
+    :ivar link_import_dir: Каталог для загруженных файлов импорта. Должен быть общим для приложения
+        и обработчиков Celery, например общим томом, если они запущены в разных контейнерах.
+    :type link_import_dir: str
+    :ivar link_import_batch_size: Количество строк файла импорта, загружаемых в базу данных за одну транзакцию.
+    :type link_import_batch_size: int
+    :ivar link_import_max_errors: Максимальное количество ошибок по строкам, сохраняемых в отчёте импорта.
+    :type link_import_max_errors: int
+    :ivar link_deduplicate: Возвращать ли при создании существующую ссылку пользователя с тем же полным адресом
+        вместо создания новой.
+    :type link_deduplicate: bool
+    :ivar link_resolver: Способ чтения полной ссылки из базы данных при промахе кэшей: запрос SQLAlchemy (orm)
+        или подготовленное выражение asyncpg (asyncpg).
+    :type link_resolver: str
+    :ivar link_expired_purge_interval: Интервал удаления истёкших ссылок в секундах.
+    :type link_expired_purge_interval: int
+    :ivar link_expired_purge_batch_size: Количество истёкших ссылок, удаляемых одной командой DELETE.
+    :type link_expired_purge_batch_size: int
+    :ivar link_expired_purge_max_batches: Максимальное количество пачек за один запуск удаления; оставшиеся
+        ссылки удаляются при следующих запусках.
+    :type link_expired_purge_max_batches: int
+    :ivar link_expired_purge_pause: Пауза между пачками удаления в секундах.
+    :type link_expired_purge_pause: float
+    :ivar link_warmup_size: Количество самых посещаемых ссылок, загружаемых в кэш при старте приложения;
+        0 отключает прогрев.
+    :type link_warmup_size: int
+    :ivar link_warmup_lookback: Период в секундах, за который учитываются переходы при выборе ссылок для прогрева.
+    :type link_warmup_lookback: int
+    :ivar link_warmup_timeout: Время в секундах, после которого прогрев прерывается и приложение начинает
+        принимать запросы.
+    :type link_warmup_timeout: float
+    :ivar link_http_cache_max_age: Время в секундах, в течение которого браузеры и CDN могут кэшировать ответ
+        с разрешённой ссылкой; 0 запрещает кэширование.
+    :type link_http_cache_max_age: int
+    """
+
+    link_cache_ttl: int = 3600
+    link_negative_cache_ttl: int = 60
+    link_limited_cache_ttl: int = 5
+    link_local_cache_size: int = 10000
+    link_local_cache_ttl: int = 60
+    link_local_negative_cache_ttl: int = 10
+    link_redirect_status_code: Literal[301, 302] = 302
+    link_bloom_capacity: int = 1000000
+    link_bloom_error_rate: float = 0.001
+    link_code_pool_size: int = 10000
+    link_code_pool_batch_size: int = 1000
+    link_code_pool_refill_interval: int = 60
+    link_code_strategy: Literal["pool", "counter"] = "pool"
+    link_code_block_size: int = 1000
+    link_code_obfuscate: bool = True
+    link_bulk_max_size: int = 1000
+    link_bulk_chunk_size: int = 500
+    link_page_size: int = 50
+    link_page_max_size: int = 500
+    link_export_batch_size: int = 1000
+    link_import_dir: str
+    link_import_batch_size: int = 10000
+    link_import_max_errors: int = 100
+    link_deduplicate: bool = False
+    link_resolver: Literal["orm", "asyncpg"] = "orm"
+    link_expired_purge_interval: int = 60
+    link_expired_purge_batch_size: int = 1000
+    link_expired_purge_max_batches: int = 100
+    link_expired_purge_pause: float = 0.1
+    link_warmup_size: int = 10000
+    link_warmup_lookback: int = 86400
+    link_warmup_timeout: float = 5.0
+    link_http_cache_max_age: int = 60
+
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf8", extra="ignore")
+
+    @field_validator("link_redirect_status_code", mode="before")
+    @classmethod
+    def parse_redirect_status_code(cls, value: int | str) -> int:
+        """
+        Приводит код перенаправления из переменной окружения к числу до проверки допустимых значений.
+
+        :param value: Код ответа из переменной окружения или из значения по умолчанию.
+        :type value: int | str
+        :returns: Код ответа в виде числа.
+        :rtype: int
+        """
+        return int(value)
+
+
+class StatsSettings(BaseSettings):
+    """
+    Класс для настройки сбора статистики переходов по ссылкам.
+
+    :ivar stats_click_counting: Включён ли подсчёт переходов.
+    :type stats_click_counting: bool
+    :ivar stats_click_flush_interval: Интервал переноса счётчиков из памяти процесса в Redis в секундах.
+    :type stats_click_flush_interval: float
+    :ivar stats_click_db_flush_interval: Интервал переноса счётчиков из Redis в базу данных в секундах.
+    :type stats_click_db_flush_interval: int
+    :ivar stats_click_db_batch_size: Количество ссылок, счётчики которых обновляются одной командой UPDATE.
+    :type stats_click_db_batch_size: int
+    :ivar stats_click_events: Сохраняются ли отдельные события переходов для построения временных рядов.
+    :type stats_click_events: bool
+    :ivar stats_click_event_batch_size: Количество событий, записываемых в базу данных одной командой COPY.
+    :type stats_click_event_batch_size: int
+    :ivar stats_click_event_max_batches: Максимальное количество пачек событий за один запуск записи; оставшиеся
+        события записываются при следующих запусках.
+    :type stats_click_event_max_batches: int
+    :ivar stats_click_event_retention_days: Количество дней, в течение которых хранятся секции событий.
+    :type stats_click_event_retention_days: int
+    :ivar stats_click_event_partitions_ahead: Количество дней, на которые секции событий создаются заранее.
+    :type stats_click_event_partitions_ahead: int
+    :ivar stats_click_partition_interval: Интервал обслуживания секций событий в секундах.
+    :type stats_click_partition_interval: int
+    :ivar stats_click_rollup_interval: Интервал обновления почасовых и посуточных агрегатов в секундах.
+    :type stats_click_rollup_interval: int
+    :ivar stats_click_rollup_lookback: Глубина пересчёта агрегатов назад от последнего посчитанного часа
+        в секундах; должна покрывать задержку записи событий.
+    :type stats_click_rollup_lookback: int
+    :ivar stats_visitor_counting: Оцениваются ли уникальные посетители ссылок.
+    :type stats_visitor_counting: bool
+    :ivar stats_visitor_retention_days: Количество дней, в течение которых хранятся суточные оценки посетителей.
+    :type stats_visitor_retention_days: int
+    :ivar stats_visitor_max_days: Максимальная длина периода, за который запрашивается количество посетителей.
+    :type stats_visitor_max_days: int
+    :ivar stats_trending_bucket_seconds: Длина временного интервала одного множества популярных ссылок в секундах.
+    :type stats_trending_bucket_seconds: int
+    :ivar stats_trending_decay: Вес самого старого интервала окна относительно текущего.
+    :type stats_trending_decay: float
+    :ivar stats_trending_cache_ttl: Время хранения объединённого рейтинга популярных ссылок в секундах.
+    :type stats_trending_cache_ttl: int
+    :ivar stats_trending_max_limit: Максимальное количество ссылок в рейтинге.
+    :type stats_trending_max_limit: int
+    """
+
+    stats_click_counting: bool = True
+    stats_click_flush_interval: float = 1.0
+    stats_click_db_flush_interval: int = 30
+    stats_click_db_batch_size: int = 5000
+    stats_click_events: bool = True
+    stats_click_event_batch_size: int = 10000
+    stats_click_event_max_batches: int = 100
+    stats_click_event_retention_days: int = 30
+    stats_click_event_partitions_ahead: int = 3
+    stats_click_partition_interval: int = 3600
+    stats_click_rollup_interval: int = 60
+    stats_click_rollup_lookback: int = 3600
+    stats_visitor_counting: bool = True
+    stats_visitor_retention_days: int = 400
+    stats_visitor_max_days: int = 366
+    stats_trending_bucket_seconds: int = 300
+    stats_trending_decay: float = 0.5
+    stats_trending_cache_ttl: int = 30
+    stats_trending_max_limit: int = 100
+
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf8", extra="ignore")
+
+
 class Settings(BaseSettings):
     """
     Класс для хранения настроек приложения.
@@ -111,6 +349,10 @@ class Settings(BaseSettings):
     :type email_settings: EmailSettings
     :ivar redis_settings: Настройки для работы с Redis.
     :type redis_settings: RedisSettings
+    :ivar links_settings: Настройки для работы с короткими ссылками.
+    :type links_settings: LinksSettings
+    :ivar stats_settings: Настройки для сбора статистики переходов.
+    :type stats_settings: StatsSettings
     :ivar secret_key: Секретный ключ приложения.
     :type secret_key: SecretStr
     :ivar templates_dir: Путь к директории шаблонов.
@@ -126,6 +368,8 @@ class Settings(BaseSettings):
     db_settings: DBSettings = DBSettings()
     email_settings: EmailSettings = EmailSettings()
     redis_settings: RedisSettings = RedisSettings()
+    links_settings: LinksSettings = LinksSettings()
+    stats_settings: StatsSettings = StatsSettings()
     secret_key: SecretStr
     templates_dir: str = "templates"
     frontend_url: str
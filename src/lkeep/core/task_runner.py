@@ -0,0 +1,55 @@
+"""
+Проект: Lkeep
+Автор: Иван Ашихмин
+Год: 2025
+Специально для проекта "Код на салфетке"
+https://pressanybutton.ru/category/servis-na-fastapi/
+"""
+
+import asyncio
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from typing import TypeVar
+
+from lkeep.core.core_dependency.db_dependency import DBDependency
+from lkeep.core.core_dependency.redis_dependency import RedisDependency
+
+T = TypeVar("T")
+
+
+@asynccontextmanager
+async def task_dependencies() -> AsyncGenerator[tuple[DBDependency, RedisDependency]]:
+    """
+    Создаёт собственные зависимости базы данных и Redis для задачи Celery и закрывает их по завершении.
+
+    Каждый запуск задачи выполняется в новом цикле событий, поэтому общие для процесса приложения пулы
+    соединений здесь не используются.
+
+    :returns: Асинхронный генератор, отдающий зависимости базы данных и Redis.
+    :rtype: AsyncGenerator[tuple[DBDependency, RedisDependency]]
+    """
+    db = DBDependency()
+    redis = RedisDependency()
+
+    try:
+        yield db, redis
+    finally:
+        await redis.close_pool()
+        await db.dispose_engine()
+
+
+def run_task(func: Callable[[DBDependency, RedisDependency], Awaitable[T]]) -> T:
+    """
+    Выполняет асинхронную функцию задачи в новом цикле событий с собственными зависимостями.
+
+    :param func: Функция, получающая зависимости базы данных и Redis.
+    :type func: Callable[[DBDependency, RedisDependency], Awaitable[T]]
+    :returns: Результат функции.
+    :rtype: T
+    """
+
+    async def run() -> T:
+        async with task_dependencies() as (db, redis):
+            return await func(db, redis)
+
+    return asyncio.run(run())
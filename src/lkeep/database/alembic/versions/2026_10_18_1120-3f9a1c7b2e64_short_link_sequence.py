@@ -0,0 +1,26 @@
+"""Short link sequence
+
+Revision ID: 3f9a1c7b2e64
+Revises: d93cd9da97e5
+Create Date: 2026-10-18 11:20:41.218377
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f9a1c7b2e64"
+down_revision: str | None = "d93cd9da97e5"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.execute(sa.schema.CreateSequence(sa.Sequence("link_short_link_seq")))
+
+
+def downgrade() -> None:
+    op.execute(sa.schema.DropSequence(sa.Sequence("link_short_link_seq")))
@@ -0,0 +1,34 @@
+"""Link owner pagination index
+
+Revision ID: 8b2d4e6f1a30
+Revises: 3f9a1c7b2e64
+Create Date: 2026-10-18 13:40:12.504316
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8b2d4e6f1a30"
+down_revision: str | None = "3f9a1c7b2e64"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_link_owner_id_created_at_id",
+            "link",
+            ["owner_id", sa.text("created_at DESC"), sa.text("id DESC")],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_link_owner_id_created_at_id", table_name="link", postgresql_concurrently=True)
@@ -0,0 +1,46 @@
+"""Link full link hash
+
+Revision ID: 7e4b9d2a6c51
+Revises: 1cba070cd607
+Create Date: 2026-10-18 18:30:41.502117
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7e4b9d2a6c51"
+down_revision: str | None = "1cba070cd607"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("link", sa.Column("full_link_hash", sa.LargeBinary(), nullable=True))
+    op.execute(
+        """
+        UPDATE link SET full_link_hash = sha256(convert_to(full_link, 'UTF8'))
+        WHERE id IN (
+            SELECT DISTINCT ON (owner_id, full_link) id FROM link ORDER BY owner_id, full_link, created_at, id
+        )
+        """
+    )
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_link_owner_id_full_link_hash",
+            "link",
+            ["owner_id", "full_link_hash"],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_link_owner_id_full_link_hash", table_name="link", postgresql_concurrently=True)
+
+    op.drop_column("link", "full_link_hash")
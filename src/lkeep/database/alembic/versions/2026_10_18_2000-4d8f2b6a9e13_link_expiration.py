@@ -0,0 +1,40 @@
+"""Link expiration
+
+Revision ID: 4d8f2b6a9e13
+Revises: 7e4b9d2a6c51
+Create Date: 2026-10-18 20:00:12.318452
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "4d8f2b6a9e13"
+down_revision: str | None = "7e4b9d2a6c51"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("link", sa.Column("expires_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column("link", sa.Column("max_clicks", sa.BigInteger(), nullable=True))
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_link_expires_at",
+            "link",
+            ["expires_at"],
+            postgresql_where=sa.text("expires_at IS NOT NULL"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_link_expires_at", table_name="link", postgresql_concurrently=True)
+
+    op.drop_column("link", "max_clicks")
+    op.drop_column("link", "expires_at")
@@ -7,8 +7,9 @@ https://pressanybutton.ru/category/servis-na-fastapi/
 """
 
 from lkeep.database.models.base import Base
-from lkeep.database.models.links import Link
+from lkeep.database.models.clicks import ClickDaily, ClickEvent, ClickHourly
+from lkeep.database.models.links import Link, short_link_sequence
 from lkeep.database.models.user import User
 
 
-__all__ = ("Base", "User", "Link")
+__all__ = ("Base", "User", "Link", "short_link_sequence", "ClickEvent", "ClickHourly", "ClickDaily")
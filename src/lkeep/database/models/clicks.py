@@ -0,0 +1,89 @@
+"""
+Проект: Lkeep
+Автор: Иван Ашихмин
+Год: 2025
+Специально для проекта "Код на салфетке"
+https://pressanybutton.ru/category/servis-na-fastapi/
+"""
+
+import datetime
+
+from sqlalchemy import (
+    BigInteger,
+    Date,
+    DateTime,
+    Identity,
+    PrimaryKeyConstraint,
+    String,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from lkeep.database.models import Base
+
+
+class ClickEvent(Base):
+    """
+    Модель события перехода по короткой ссылке.
+
+    Таблица секционирована по времени перехода: на каждые сутки создаётся отдельная секция, а устаревшие секции
+    удаляются целиком.
+
+    :ivar id: Идентификатор события
+    :type id: int
+    :ivar clicked_at: Время перехода
+    :type clicked_at: datetime.datetime
+    :ivar short_link: Сокращённая ссылка
+    :type short_link: str
+    :ivar partition_prefix: Префикс имён суточных секций
+    :type partition_prefix: str
+    """
+
+    __tablename__ = "click_event"
+    __table_args__ = (
+        PrimaryKeyConstraint("clicked_at", "id"),
+        {"postgresql_partition_by": "RANGE (clicked_at)"},
+    )
+
+    partition_prefix = "click_event_p"
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity())
+    clicked_at: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True))
+    short_link: Mapped[str] = mapped_column(String(12))
+
+
+class ClickHourly(Base):
+    """
+    Модель количества переходов по короткой ссылке за час.
+
+    :ivar short_link: Сокращённая ссылка
+    :type short_link: str
+    :ivar hour: Начало часа
+    :type hour: datetime.datetime
+    :ivar clicks: Количество переходов
+    :type clicks: int
+    """
+
+    __tablename__ = "click_hourly"
+
+    short_link: Mapped[str] = mapped_column(String(12), primary_key=True)
+    hour: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True), primary_key=True, index=True)
+    clicks: Mapped[int] = mapped_column(BigInteger)
+
+
+class ClickDaily(Base):
+    """
+    Модель количества переходов по короткой ссылке за сутки по UTC.
+
+    :ivar short_link: Сокращённая ссылка
+    :type short_link: str
+    :ivar day: Дата
+    :type day: datetime.date
+    :ivar clicks: Количество переходов
+    :type clicks: int
+    """
+
+    __tablename__ = "click_daily"
+
+    short_link: Mapped[str] = mapped_column(String(12), primary_key=True)
+    day: Mapped[datetime.date] = mapped_column(Date, primary_key=True)
+    clicks: Mapped[int] = mapped_column(BigInteger)
@@ -6,7 +6,18 @@
 https://pressanybutton.ru/category/servis-na-fastapi/
 """
 
-from sqlalchemy import UUID, ForeignKey, String
+import datetime
+
+from sqlalchemy import (
+    UUID,
+    BigInteger,
+    DateTime,
+    ForeignKey,
+    Index,
+    LargeBinary,
+    Sequence,
+    String,
+)
 from sqlalchemy.orm import Mapped, mapped_column
 
 from lkeep.database.mixins.id_mixins import IDMixin
@@ -24,8 +35,28 @@ class Link(IDMixin, CreatedAtMixin, Base):
     :type short_link: str
     :ivar owner_id: Создатель ссылки
     :type owner_id: UUID
+    :ivar clicks: Количество переходов по ссылке, перенесённых из счётчиков Redis
+    :type clicks: int
+    :ivar full_link_hash: SHA-256 полной ссылки; заполняется только у одной ссылки владельца с данным адресом,
+        которую возвращает создание ссылки в режиме без дублей
+    :type full_link_hash: bytes | None
+    :ivar expires_at: Время, после которого ссылка перестаёт открываться и удаляется фоновой задачей
+    :type expires_at: datetime.datetime | None
+    :ivar max_clicks: Количество переходов, после которого ссылка считается истёкшей
+    :type max_clicks: int | None
     """
 
     full_link: Mapped[str] = mapped_column(String)
     short_link: Mapped[str] = mapped_column(String(12), unique=True, index=True)
     owner_id: Mapped[UUID] = mapped_column(ForeignKey("user.id", ondelete="CASCADE"))
+    clicks: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0")
+    full_link_hash: Mapped[bytes | None] = mapped_column(LargeBinary)
+    expires_at: Mapped[datetime.datetime | None] = mapped_column(DateTime(timezone=True))
+    max_clicks: Mapped[int | None] = mapped_column(BigInteger)
+
+
+Index("ix_link_owner_id_created_at_id", Link.owner_id, Link.created_at.desc(), Link.id.desc())
+Index("ix_link_owner_id_full_link_hash", Link.owner_id, Link.full_link_hash, unique=True)
+Index("ix_link_expires_at", Link.expires_at, postgresql_where=Link.expires_at.is_not(None))
+
+short_link_sequence = Sequence("link_short_link_seq", metadata=Base.metadata)
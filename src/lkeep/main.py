@@ -6,14 +6,71 @@
 https://pressanybutton.ru/category/servis-na-fastapi/
 """
 
+import asyncio
+import logging
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
+from redis.exceptions import RedisError
+from sqlalchemy.exc import SQLAlchemyError
 from starlette.middleware.cors import CORSMiddleware
 
 from lkeep.apps import apps_router
 from lkeep.apps.admin.admin_base import setup_admin
+from lkeep.apps.links.local_cache import local_links_cache
+from lkeep.apps.links.managers import LinksManager
+from lkeep.apps.links.routes import redirect_router
+from lkeep.apps.stats.click_counter import click_counter
+from lkeep.core.core_dependency.db_dependency import db_dependency
+from lkeep.core.core_dependency.redis_dependency import redis_dependency
+from lkeep.core.responses import PydanticJSONResponse
+from lkeep.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncGenerator[None]:
+    """
+    Управляет общими ресурсами приложения на время его работы.
+
+    При старте создаёт движок базы данных и пул соединений Redis, запускает подписку на сброс кэша ссылок,
+    построение фильтра Блума, пополнение пула коротких ссылок и перенос учтённых переходов в Redis, после чего
+    прогревает кэш ссылок. Прогрев ограничен по времени ``link_warmup_timeout``, а его ошибки не мешают старту.
+    При остановке завершает фоновые задачи и закрывает все соединения.
+
+    :param app: Экземпляр приложения FastAPI.
+    :type app: FastAPI
+    :returns: Асинхронный генератор, передающий управление приложению.
+    :rtype: AsyncGenerator[None]
+    """
+    db_dependency.init_engine()
+    redis_dependency.init_pool()
+    links_manager = LinksManager(db=db_dependency, redis=redis_dependency)
+    background_tasks = [
+        asyncio.create_task(local_links_cache.listen_invalidations(redis=redis_dependency)),
+        asyncio.create_task(links_manager.rebuild_bloom_filter()),
+        asyncio.create_task(links_manager.refill_short_code_pool()),
+        asyncio.create_task(click_counter.run(redis=redis_dependency)),
+    ]
+    try:
+        try:
+            await asyncio.wait_for(links_manager.warm_up_cache(), timeout=settings.links_settings.link_warmup_timeout)
+        except (TimeoutError, SQLAlchemyError, RedisError, OSError) as error:
+            logger.warning("Link cache warm-up skipped: %r", error)
+
+        yield
+    finally:
+        for task in background_tasks:
+            task.cancel()
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+        await redis_dependency.close_pool()
+        await db_dependency.dispose_engine()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=PydanticJSONResponse)
 
 app.include_router(router=apps_router)
 
@@ -27,6 +84,8 @@ app.add_middleware(
 
 setup_admin(app=app)
 
+app.include_router(router=redirect_router)
+
 
 def start():
     """